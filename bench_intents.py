@@ -0,0 +1,93 @@
+import argparse
+import random
+import string
+import time
+
+import intents
+
+# Chat intent latency as the intent table grows. Compares the compiled
+# matcher with a linear scan that tests every keyword with `in` (the old
+# prostudy chain), per message and for a batch of messages.
+
+
+def vocabulary(size, rng):
+    return [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+            for _ in range(size)]
+
+
+def intent_table(count, words, rng):
+    table = {}
+    for i in range(count):
+        keywords = [' '.join(rng.sample(words, rng.randint(1, 3))) for _ in range(6)]
+        table[f'intent {i}'] = (keywords, f"response {i}")
+    return table
+
+
+def messages(count, words, table, rng):
+    keywords = [k for keys, _ in table.values() for k in keys]
+    out = []
+    for _ in range(count):
+        parts = rng.sample(words, rng.randint(5, 15))
+        if rng.random() < 0.7:
+            parts.insert(rng.randrange(len(parts)), rng.choice(keywords))
+        out.append(' '.join(parts) + rng.choice(['?', '!', '.', '']))
+    return out
+
+
+def linear_classify(table, text):
+    text = intents.normalize(text)
+    best, best_score = None, 0
+    for name, (keywords, _) in table.items():
+        score = sum(len(k.split()) for k in keywords if intents.normalize(k) in text)
+        if score > best_score:
+            best, best_score = name, score
+    return best
+
+
+def percentile(samples, share):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+
+def timed(function, inputs):
+    samples = []
+    for text in inputs:
+        start = time.perf_counter()
+        function(text)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat intent matcher benchmark")
+    parser.add_argument('--intents', type=int, nargs='+', default=[7, 100, 500, 1000])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    words = vocabulary(5000, rng)
+
+    print(f"{'intents':>8} {'keywords':>9} {'build ms':>9} {'p50 us':>8} {'p99 us':>8} "
+          f"{'linear p50':>11} {'batch msg/s':>12}")
+    for count in args.intents:
+        table = intents.INTENTS if count == len(intents.INTENTS) else intent_table(count, words, rng)
+        sample = messages(args.messages, words, table, rng)
+        start = time.perf_counter()
+        matcher = intents.IntentMatcher(table)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        compiled = timed(matcher.classify, sample)
+        linear = timed(lambda text: linear_classify(table, text), sample[:200])
+        assert [matcher.classify(t) for t in sample[:200]] == [linear_classify(table, t) for t in sample[:200]]
+
+        batch = [rng.choice(sample) for _ in range(args.batch)]
+        start = time.perf_counter()
+        matcher.classify_many(batch)
+        rate = args.batch / (time.perf_counter() - start)
+        print(f"{count:>8} {len(matcher.keywords):>9} {build_ms:>9.1f} {percentile(compiled, 0.5):>8.1f} "
+              f"{percentile(compiled, 0.99):>8.1f} {percentile(linear, 0.5):>11.1f} {rate:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+import optimizer
+
+# Runs the study-window optimizer on synthetic workloads and reports solution
+# quality against runtime. Quality is the priority weight scheduled on time,
+# next to the EDF greedy plan the search starts from (a zero time budget) and
+# the fractional-knapsack upper bound no schedule can beat.
+
+
+def workload(count, days, seed):
+    rng = np.random.default_rng(seed)
+    minutes = rng.choice([30, 45, 60, 90, 120], size=count).astype(float)
+    weights = 6 - rng.integers(1, 6, size=count).astype(float)
+    due = rng.uniform(1, days, size=count).round() * 1440 - 60  # 23:00 on some day
+    return minutes, weights, due
+
+
+def run(count, days, time_limit, seed):
+    minutes, weights, due = workload(count, days, seed)
+    start = datetime(2024, 1, 1)  # a Monday at midnight
+    packer = optimizer.Packer(*optimizer.study_windows(start, horizon_days=days + 1))
+    return optimizer.branch_and_bound(minutes, weights, due, packer, time_limit=time_limit)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Study-window optimizer benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--limits', type=float, nargs='+', default=[0.0, 0.5, 2.0],
+                        help="time limits in seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>6} {'days':>5} {'limit s':>8} {'greedy':>9} {'best':>9} {'bound':>9} "
+          f"{'% bound':>8} {'nodes':>10} {'secs':>7} {'optimal':>8}")
+    for count in args.sizes:
+        # Roughly twice as much work as there is window time, so choices matter
+        days = max(7, count * 75 * 7 // (2 * 28 * 60))
+        for limit in args.limits:
+            best = run(count, days, limit, args.seed)
+            share = 100 * best['value'] / best['bound'] if best['bound'] else 100.0
+            print(f"{count:>6} {days:>5} {limit:>8.1f} {best['greedy']:>9.0f} {best['value']:>9.0f} "
+                  f"{best['bound']:>9.1f} {share:>7.1f}% {best['nodes']:>10} {best['seconds']:>7.2f} "
+                  f"{'yes' if best['optimal'] else 'no':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import service
+
+# Load test for service.py: concurrent keep-alive clients, each acting for a
+# random student, mixing task listing, adds, deletes and timetable runs.
+# Reports requests/s and p50/p99 latency overall and per request kind.
+# --spawn starts a service on --port for the run and stops it afterwards.
+
+MIX = {'list': 40, 'add': 30, 'delete': 10, 'timetable': 20}
+SUBJECTS = ['Maths', 'Physics', 'History', 'Chemistry', 'Biology', 'English', 'French', 'Art']
+
+
+def random_task(rng):
+    return {'subject': rng.choice(SUBJECTS), 'duration': f"{rng.randint(0, 2)}:{rng.choice(['15', '30', '45'])}",
+            'priority': rng.randint(1, 5), 'deadline': f"in {rng.randint(1, 14)} days"}
+
+
+class Client:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+def percentile(samples, share):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * share))] if samples else float('nan')
+
+
+async def seed(args, students, rng):
+    client = Client(args.host, args.port)
+    ids = {}
+    for student in students:
+        await client.request('DELETE', f"/students/{student}/tasks")
+        _, reply = await client.request('POST', f"/students/{student}/tasks",
+                                        [random_task(rng) for _ in range(args.tasks)])
+        ids[student] = list(reply['ids'])
+    client.close()
+    return ids
+
+
+async def worker(args, students, ids, rng, stop_at, samples, errors):
+    client = Client(args.host, args.port)
+    kinds, weights = zip(*MIX.items())
+    try:
+        while time.perf_counter() < stop_at:
+            student = rng.choice(students)
+            kind = rng.choices(kinds, weights)[0]
+            if kind == 'delete' and not ids[student]:
+                kind = 'add'
+            start = time.perf_counter()
+            if kind == 'list':
+                status, _ = await client.request('GET', f"/students/{student}/tasks?limit=100")
+            elif kind == 'add':
+                status, reply = await client.request('POST', f"/students/{student}/tasks", random_task(rng))
+                if status == 201:
+                    ids[student].append(reply['id'])
+            elif kind == 'delete':
+                task_id = ids[student].pop(rng.randrange(len(ids[student])))
+                status, _ = await client.request('DELETE', f"/students/{student}/tasks/{task_id}")
+            else:
+                status, _ = await client.request('POST', f"/students/{student}/timetable",
+                                                 {'mode': rng.choice(args.modes)})
+            samples.setdefault(kind, []).append((time.perf_counter() - start) * 1e3)
+            if status >= 400:
+                errors[kind] = errors.get(kind, 0) + 1
+    finally:
+        client.close()
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    students = [f"student-{i}" for i in range(args.students)]
+    ids = await seed(args, students, rng)
+    samples, errors = {}, {}
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    await asyncio.gather(*(worker(args, students, ids, random.Random(args.seed + i + 1), stop_at, samples, errors)
+                           for i in range(args.clients)))
+    elapsed = time.perf_counter() - start
+
+    total = [ms for values in samples.values() for ms in values]
+    print(f"{args.clients} clients, {args.students} students x {args.tasks} tasks, {elapsed:.1f} s")
+    print(f"{'request':>10} {'count':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind, values in sorted(samples.items()) + [('all', total)]:
+        failed = sum(errors.values()) if kind == 'all' else errors.get(kind, 0)
+        print(f"{kind:>10} {len(values):>8} {len(values) / elapsed:>9.1f} "
+              f"{percentile(values, 0.5):>8.2f} {percentile(values, 0.99):>8.2f} {failed:>7}")
+
+
+async def wait_ready(args, server=None, timeout=30.0):
+    # Until the service answers; a spawned one that exits first is reported
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            client = Client(args.host, args.port)
+            await client.request('GET', '/health')
+            client.close()
+            return
+        except OSError:
+            if server is not None and server.poll() is not None:
+                raise SystemExit(f"service.py exited with code {server.returncode} before it was ready")
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the planner service")
+    parser.add_argument('--host', default=service.HOST)
+    parser.add_argument('--port', type=int, default=service.PORT)
+    parser.add_argument('--spawn', action='store_true', help="start service.py for the run")
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--students', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=200, help="tasks seeded per student")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--modes', nargs='+', default=['Priority', 'Earliest deadline'],
+                        choices=service.modes.SCHEDULE_MODES)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service.py')
+        server = subprocess.Popen([sys.executable, script, '--host', args.host, '--port', str(args.port)],
+                                  stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_ready(args, server) if server else asyncio.sleep(0))
+        asyncio.run(run(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
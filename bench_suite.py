@@ -0,0 +1,318 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+# Headless benchmark of the planner handlers at growing task counts.
+#
+# tkinter is replaced by a small in-process stub before a planner module is
+# imported, so the real handlers (add_task, delete_task, save_tasks,
+# load_tasks, display_tasks, generate_timetable, change_breaks, undo, redo,
+# search_tasks, chat_response) run unchanged without a display. Background
+# jobs are driven to completion by polling the worker pool directly. Results
+# go to a JSON file; --compare flags operations that got slower than a
+# previous results file.
+
+VARIANTS = ['smartstudyplanner', 'prostudy', 'finalsmartstudy']
+SUBJECTS = ['Math', 'Physics', 'Chemistry', 'Biology', 'History', 'English']
+DEADLINES = ['Monday', 'Friday', 'tomorrow', 'in 3 days', '2030-01-15', '']
+# Search bar changes, one per keystroke or pick: a subject typed a letter at
+# a time, narrowed by priority and deadline, then cleared again
+SEARCH_STEPS = ([('search_text', 'Physics'[:end]) for end in range(1, 8)] +
+                [('priority_low', '2'), ('priority_high', '3'), ('deadline_window', 'Due within 7 days'),
+                 ('search_text', ''), ('priority_low', '1'), ('priority_high', '5'),
+                 ('deadline_window', 'Any deadline')])
+CHAT_MESSAGES = 500  # past the chat box's limit, so old messages are dropped
+
+
+# Tk stub
+
+class Widget:
+    def __init__(self, *args, **options):
+        self.options = options
+        self.items = []
+        self.value = ''
+        self.selected = ()
+
+    def __getattr__(self, name):
+        # pack, grid, bind, configure, see, after, ... are no-ops
+        return lambda *args, **kwargs: None
+
+    def cget(self, option):
+        return self.options.get(option, {'height': 20, 'font': 'TkDefaultFont'}.get(option, ''))
+
+    def get(self, *args):
+        return self.value
+
+    def insert(self, index, *values):
+        if index == 'end' or not isinstance(index, int):
+            self.items.extend(values)
+        else:
+            self.items[index:index] = values
+
+    def delete(self, first, last=None):
+        if not isinstance(first, int):
+            self.items = []
+            self.value = ''
+        elif last is None:
+            del self.items[first]
+        elif last == 'end':
+            del self.items[first:]
+        else:
+            del self.items[first:last + 1]
+
+    def size(self):
+        return len(self.items)
+
+    def curselection(self):
+        return self.selected
+
+
+class Variable(Widget):
+    def __init__(self, *args, value=None, **options):
+        super().__init__()
+        self.value = value if value is not None else ''
+
+    def set(self, value):
+        self.value = value
+
+
+class Font:
+    def __init__(self, *args, **options):
+        pass
+
+    def metrics(self, *args):
+        return 15
+
+
+def install_tk_stub():
+    tk = types.ModuleType('tkinter')
+    for name in ['Tk', 'Toplevel', 'Frame', 'Label', 'Entry', 'Button', 'Listbox', 'Text',
+                 'Scrollbar', 'OptionMenu', 'Canvas', 'Menu']:
+        setattr(tk, name, Widget)
+    for name in ['StringVar', 'IntVar', 'BooleanVar', 'DoubleVar']:
+        setattr(tk, name, Variable)
+    tk.END = 'end'
+    tk.EXTENDED = 'extended'
+    tk.TclError = RuntimeError
+    ttk = types.ModuleType('tkinter.ttk')
+    for name in ['Style', 'Frame', 'LabelFrame', 'Label', 'Entry', 'Button', 'Combobox',
+                 'Scrollbar', 'Progressbar', 'Checkbutton']:
+        setattr(ttk, name, Widget)
+    messagebox = types.ModuleType('tkinter.messagebox')
+    messagebox.shown = []
+    for name in ['showinfo', 'showwarning', 'showerror']:
+        setattr(messagebox, name, lambda *args, _name=name, **kwargs: messagebox.shown.append((_name,) + args))
+    messagebox.askyesno = lambda *args, **kwargs: True
+    filedialog = types.ModuleType('tkinter.filedialog')
+    filedialog.askopenfilename = lambda *args, **kwargs: ''
+    filedialog.asksaveasfilename = lambda *args, **kwargs: ''
+    scrolledtext = types.ModuleType('tkinter.scrolledtext')
+    scrolledtext.ScrolledText = Widget
+    font = types.ModuleType('tkinter.font')
+    font.Font = Font
+    tk.ttk, tk.messagebox, tk.scrolledtext, tk.font = ttk, messagebox, scrolledtext, font
+    tk.filedialog = filedialog
+    sys.modules.update({'tkinter': tk, 'tkinter.ttk': ttk, 'tkinter.messagebox': messagebox,
+                        'tkinter.filedialog': filedialog,
+                        'tkinter.scrolledtext': scrolledtext, 'tkinter.font': font})
+
+
+# Workload
+
+def synthetic_tasks(count, seed=1):
+    rng = np.random.default_rng(seed)
+    hours = rng.integers(0, 3, size=count)
+    minutes = rng.choice([0, 15, 30, 45], size=count)
+    durations = pd.Series(hours).astype(str) + ':' + pd.Series(minutes).map('{:02d}'.format)
+    return pd.DataFrame({
+        'Subject': np.array(SUBJECTS, dtype=object)[rng.integers(0, len(SUBJECTS), size=count)],
+        'Duration': durations,
+        'Priority': rng.integers(1, 6, size=count),
+        'Deadline': np.array(DEADLINES, dtype=object)[rng.integers(0, len(DEADLINES), size=count)],
+    })
+
+
+def settle(planner, timeout=600):
+    # Run the worker pool's Tk-side poll until every job has finished
+    deadline = time.perf_counter() + timeout
+    while planner.worker_pool.jobs:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("background jobs did not finish")
+        time.sleep(0.001)
+        planner.worker_pool._poll()
+
+
+def timed(action):
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+
+def fill_entries(planner, index):
+    planner.subject_entry.value = f"Bench {index}"
+    planner.duration_entry.value = '1:30'
+    planner.priority_entry.value = '2'
+    planner.deadline_entry.value = 'Friday'
+
+
+def bench_variant(variant, count, adds):
+    # Seconds per operation for one planner at one task count
+    sys.modules.pop(variant, None)
+    results = {}
+    start = time.perf_counter()
+    planner = importlib.import_module(variant)
+    settle(planner)
+    results['startup'] = time.perf_counter() - start
+
+    def load():
+        planner.load_tasks()
+        settle(planner)
+    results['load'] = timed(load)
+
+    display = getattr(planner, 'display_tasks', None) or planner.task_list.refresh
+    results['display'] = timed(display)
+
+    def add():
+        for i in range(adds):
+            fill_entries(planner, i)
+            planner.add_task()
+    results['add'] = timed(add) / adds
+    settle(planner)  # autosaves from the adds
+
+    if hasattr(planner, 'delete_task'):
+        def delete():
+            for _ in range(adds):
+                planner.task_list.selected = {len(planner.study_data) // 2}
+                planner.delete_task()
+        results['delete'] = timed(delete) / adds
+        settle(planner)
+
+    def undo():
+        # Step back over the deletes (the adds in prostudy) and forward again
+        for _ in range(adds):
+            planner.undo()
+        for _ in range(adds):
+            planner.redo()
+        settle(planner)
+    results['undo'] = timed(undo) / (2 * adds)
+
+    if hasattr(planner, 'search_tasks'):
+        def search():
+            for name, value in SEARCH_STEPS:
+                getattr(planner, name).set(value)
+                planner.search_tasks()
+        results['search'] = timed(search) / len(SEARCH_STEPS)
+
+    def chat():
+        for i in range(CHAT_MESSAGES):
+            planner.chat_input.value = 'study tips'
+            planner.chat_response()
+    results['chat'] = timed(chat) / CHAT_MESSAGES
+
+    def save():
+        planner.save_tasks()
+        settle(planner)
+    results['save'] = timed(save)
+
+    def generate():
+        planner.generate_timetable()
+        settle(planner)
+    results['generate'] = timed(generate)
+
+    def breaks():
+        # Every break policy in turn on the live timetable, redrawn each time
+        for name in planner.modes.BREAK_POLICIES:
+            planner.break_policy.set(name)
+            planner.change_breaks()
+        settle(planner)
+    results['breaks'] = timed(breaks) / len(planner.modes.BREAK_POLICIES)
+    return results
+
+
+def run(sizes, variants, adds, repeat):
+    install_tk_stub()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    # Pay for the pandas imports up front so 'startup' compares like with like
+    importlib.import_module('startup').preload()
+    home = os.getcwd()
+    rows = []
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as scratch:
+            tasks = synthetic_tasks(count)
+            os.chdir(scratch)
+            try:
+                for variant in variants:
+                    best = {}
+                    for _ in range(repeat):
+                        tasks.to_csv('study_tasks.csv', index=False)
+                        for operation, seconds in bench_variant(variant, count, adds).items():
+                            best[operation] = min(seconds, best.get(operation, float('inf')))
+                    for operation, seconds in best.items():
+                        rows.append({'variant': variant, 'operation': operation,
+                                     'tasks': count, 'seconds': seconds})
+                        print(f"{variant:<18} {operation:<9} {count:>8} {seconds * 1e3:>10.2f} ms", flush=True)
+            finally:
+                os.chdir(home)
+    return rows
+
+
+def compare(rows, baseline_path, threshold, floor):
+    # Rows slower than the baseline by more than threshold (a fraction) and
+    # by at least floor seconds
+    with open(baseline_path) as f:
+        baseline = {(r['variant'], r['operation'], r['tasks']): r['seconds']
+                    for r in json.load(f)['results']}
+    regressions = []
+    for row in rows:
+        before = baseline.get((row['variant'], row['operation'], row['tasks']))
+        if before is None:
+            continue
+        if row['seconds'] > before * (1 + threshold) and row['seconds'] - before > floor:
+            regressions.append({**row, 'baseline': before, 'ratio': row['seconds'] / before})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless planner handler benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--variants', nargs='+', default=VARIANTS, choices=VARIANTS)
+    parser.add_argument('--adds', type=int, default=100, help="adds/deletes timed per size")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per size; the fastest is kept")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE', help="previous results file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown that counts as a regression (0.25 = 25%%)")
+    parser.add_argument('--floor', type=float, default=0.001,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    rows = run(args.sizes, args.variants, args.adds, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump({
+            'meta': {'python': platform.python_version(), 'pandas': pd.__version__,
+                     'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': rows,
+        }, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        regressions = compare(rows, args.compare, args.threshold, args.floor)
+        for r in regressions:
+            print(f"REGRESSION {r['variant']} {r['operation']} {r['tasks']}: "
+                  f"{r['baseline'] * 1e3:.2f} ms -> {r['seconds'] * 1e3:.2f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
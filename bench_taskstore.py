@@ -0,0 +1,53 @@
+import argparse
+import time
+
+import pandas as pd
+
+from taskstore import TaskStore
+
+# Appends N tasks one at a time and reports time per append. TaskStore should
+# stay flat as N grows; the old pd.concat path grows with N (O(N^2) overall).
+
+SUBJECTS = ['Math', 'Physics', 'Chemistry', 'Biology', 'History']
+
+
+def bench_store(count):
+    store = TaskStore()
+    start = time.perf_counter()
+    for i in range(count):
+        store.append(SUBJECTS[i % 5], '0:45', i % 5 + 1, 'Monday')
+    elapsed = time.perf_counter() - start
+    view_start = time.perf_counter()
+    store.frame()
+    return elapsed, time.perf_counter() - view_start
+
+
+def bench_concat(count):
+    study_data = pd.DataFrame(columns=['Subject', 'Duration', 'Priority', 'Deadline'])
+    start = time.perf_counter()
+    for i in range(count):
+        task = pd.DataFrame({'Subject': [SUBJECTS[i % 5]], 'Duration': ['0:45'],
+                             'Priority': [i % 5 + 1], 'Deadline': ['Monday']})
+        study_data = pd.concat([study_data, task], ignore_index=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task append benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--concat-limit', type=int, default=10000,
+                        help="largest size to also run through pd.concat")
+    args = parser.parse_args()
+
+    print(f"{'tasks':>9} {'store s':>9} {'us/append':>10} {'frame() s':>10} {'concat s':>9} {'us/append':>10}")
+    for count in args.sizes:
+        store_s, view_s = bench_store(count)
+        line = f"{count:>9} {store_s:>9.3f} {store_s / count * 1e6:>10.2f} {view_s:>10.4f}"
+        if count <= args.concat_limit:
+            concat_s = bench_concat(count)
+            line += f" {concat_s:>9.3f} {concat_s / count * 1e6:>10.2f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
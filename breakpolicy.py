@@ -0,0 +1,91 @@
+import numpy as np
+
+# Break policies: where breaks go between already-ordered tasks and how long
+# they are. Tasks are never split, so a break is taken in front of the first
+# task that starts once `study` minutes have been studied since the last one
+# (smartstudyplanner's hourly rule with any threshold); every `every`th break
+# is `long_pause` minutes instead of `pause`. `gap` minutes are left between
+# consecutive tasks without a break row (prostudy's layout).
+#
+# Break lengths only depend on how many breaks came before, so every offset
+# comes out of cumulative sums over the duration array: switching policy on a
+# large timetable is one vectorized pass.
+
+
+def cycle_breaks(minutes, study):
+    # Break before task i once the study time since the last break reaches
+    # study minutes. Returns a bool array.
+    count = len(minutes)
+    flags = np.zeros(count, dtype=bool)
+    if not count:
+        return flags
+    # Counting restarts at a break, so from a break before task i the next
+    # one comes before the first task j with study_before[j] - study_before[i]
+    # >= study: one searchsorted, then follow the jumps
+    study_before = np.concatenate(([0], np.cumsum(minutes)[:-1]))
+    after = np.searchsorted(study_before, study_before + study, side='left').tolist()
+    hits = []
+    i = after[0]
+    while i < count:
+        hits.append(i)
+        i = after[i]
+    flags[hits] = True
+    return flags
+
+
+class BreakPolicy:
+    def __init__(self, study=None, pause=0, long_pause=None, every=None, gap=0):
+        self.study = study
+        self.pause = pause
+        self.long_pause = pause if long_pause is None else long_pause
+        self.every = every
+        self.gap = gap
+
+    def __repr__(self):
+        return (f"BreakPolicy(study={self.study}, pause={self.pause}, long_pause={self.long_pause}, "
+                f"every={self.every}, gap={self.gap})")
+
+    def paused(self, taken):
+        # Break minutes of the first `taken` breaks (int or array)
+        total = taken * self.pause
+        if self.every:
+            total = total + (taken // self.every) * (self.long_pause - self.pause)
+        return total
+
+    def length(self, number):
+        # Minutes of break `number` (1-based)
+        return self.long_pause if self.every and number % self.every == 0 else self.pause
+
+    def flags(self, minutes):
+        if not self.study:
+            return np.zeros(len(minutes), dtype=bool)
+        return cycle_breaks(minutes, self.study)
+
+    def plan(self, minutes):
+        # (task start offsets in minutes, break-before flags, break lengths)
+        # for tasks of the given durations laid out from offset 0
+        count = len(minutes)
+        flags = self.flags(minutes)
+        taken = np.cumsum(flags)
+        paused = self.paused(taken)
+        lengths = paused - self.paused(np.maximum(taken - 1, 0))
+        study_before = np.concatenate(([0], np.cumsum(minutes)[:-1])) if count else np.zeros(0, dtype=np.int64)
+        starts = study_before + paused + np.arange(count) * self.gap
+        return starts, flags, lengths
+
+
+POLICIES = {
+    'Hourly': BreakPolicy(study=60, pause=15),
+    'Pomodoro 25/5': BreakPolicy(study=25, pause=5),
+    'Pomodoro, long break every 4': BreakPolicy(study=25, pause=5, long_pause=20, every=4),
+    '10 min after each task': BreakPolicy(gap=10),
+    'No breaks': BreakPolicy(),
+}
+
+
+def policy(name):
+    # BreakPolicy for a name from modes.BREAK_POLICIES (the keys above); a
+    # BreakPolicy or None (no breaks) passes through
+    if name is None or isinstance(name, BreakPolicy):
+        return name
+    return POLICIES[name]
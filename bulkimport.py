@@ -0,0 +1,146 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import recurrence
+from timetable import TASK_COLUMNS
+
+# Bulk import of external task lists (course exports) under add_task's rules:
+# Subject, Duration and Priority required, Duration as HH:MM, Priority an
+# integer from 1 to 5. A bare "review" Deadline is anchored to the import day,
+# as Add Task does.
+#
+# The file is read CHUNK_ROWS at a time and each chunk is validated with
+# column operations. Valid rows go to a callback (the planner's task store,
+# the CSV save file, the SQLite database); rejected rows are appended to a
+# single report with their line number and reason. Only one chunk is held
+# at a time, so memory stays flat however long the file is.
+
+CHUNK_ROWS = 50000
+DURATION = r"\d{1,2}:\d{2}"
+INTEGER = r"[+-]?\d+"
+MISSING = "Subject, Duration and Priority are required"
+BAD_DURATION = "Duration must be in HH:MM format"
+BAD_PRIORITY = "Priority must be an integer between 1 and 5"
+
+
+def report_path(path):
+    return os.path.splitext(path)[0] + '.rejected.csv'
+
+
+def _header(columns):
+    # Export column -> task column, matching names case-insensitively
+    wanted = {name.lower(): name for name in TASK_COLUMNS}
+    mapping = {column: wanted[column.strip().lower()] for column in columns
+               if column.strip().lower() in wanted}
+    missing = set(TASK_COLUMNS[:3]) - set(mapping.values())
+    if missing:
+        raise ValueError(f"Import file has no {', '.join(sorted(missing))} column.")
+    return mapping
+
+
+def validate(chunk):
+    # (valid tasks, rejected rows with a Reason column) for one chunk of
+    # strings; the checks run in add_task's order and the first failure is
+    # the reason given
+    tasks = pd.DataFrame({name: chunk[name].str.strip() if name in chunk else ''
+                          for name in TASK_COLUMNS}, index=chunk.index)
+    missing = (tasks[TASK_COLUMNS[:3]] == '').any(axis=1).to_numpy()
+    bad_duration = ~tasks['Duration'].str.fullmatch(DURATION).to_numpy(dtype=bool)
+    whole = tasks['Priority'].str.fullmatch(INTEGER).to_numpy(dtype=bool)
+    priority = pd.to_numeric(tasks['Priority'].where(whole), errors='coerce').to_numpy()
+    bad_priority = ~(whole & (priority >= 1) & (priority <= 5))
+    reason = np.select([missing, bad_duration, bad_priority], [MISSING, BAD_DURATION, BAD_PRIORITY], '')
+    ok = reason == ''
+
+    valid = tasks[ok].reset_index(drop=True)
+    valid['Priority'] = priority[ok].astype(np.int64)
+    valid['Deadline'] = recurrence.anchor_all(valid['Deadline'].to_numpy())
+    rejected = chunk[~ok].copy()
+    rejected.insert(0, 'Reason', reason[~ok])
+    return valid, rejected
+
+
+def import_csv(path, accept, report=None, chunksize=CHUNK_ROWS, job=None):
+    # Stream path through validate(), handing each chunk's valid tasks to
+    # accept(frame). job (workers.Job) gets progress and can cancel between
+    # chunks. Returns {'rows', 'imported', 'rejected', 'report'}; the report
+    # is only written when something was rejected.
+    report = report or report_path(path)
+    if os.path.exists(report):
+        os.remove(report)
+    stats = {'rows': 0, 'imported': 0, 'rejected': 0, 'report': None}
+    total = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        reader = pd.read_csv(f, chunksize=chunksize, dtype=str, keep_default_na=False,
+                             skipinitialspace=True)
+        mapping = None
+        for chunk in reader:
+            if job:
+                job.check()
+            if mapping is None:
+                mapping = _header(chunk.columns)
+            chunk = chunk.rename(columns=mapping)
+            # Line in the file: 1 is the header
+            chunk.index = chunk.index + 2
+            valid, rejected = validate(chunk)
+            if len(valid):
+                accept(valid)
+            if len(rejected):
+                rejected.to_csv(report, mode='a', header=not stats['rejected'], index_label='Line')
+                stats['report'] = report
+            stats['rows'] += len(chunk)
+            stats['imported'] += len(valid)
+            stats['rejected'] += len(rejected)
+            if job:
+                job.progress(f"{job.label}: {stats['imported']} of {stats['rows']} rows", f.tell(), total)
+    return stats
+
+
+def summary(stats):
+    text = f"Imported {stats['imported']} of {stats['rows']} tasks."
+    if stats['rejected']:
+        text += f" {stats['rejected']} rejected rows are listed in {stats['report']}."
+    return text
+
+
+def append_csv(target):
+    # accept() that appends to a planner CSV save file in its own column
+    # layout; an empty Id is numbered when the planner loads the file
+    columns = TASK_COLUMNS + ['Id']
+    if os.path.exists(target) and os.path.getsize(target):
+        columns = list(pd.read_csv(target, nrows=0).columns)
+
+    def accept(frame):
+        header = not os.path.exists(target) or not os.path.getsize(target)
+        frame.reindex(columns=columns).to_csv(target, mode='a', header=header, index=False)
+    return accept
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a task list into the planner's saved tasks.")
+    parser.add_argument('source', help="CSV with Subject, Duration, Priority and optional Deadline columns")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--csv', default='study_tasks.csv', help="CSV save file to append to")
+    target.add_argument('--db', help="SQLite task database to insert into (see sqlitestore.py)")
+    parser.add_argument('--report', help="rejected rows report (default: <source>.rejected.csv)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if args.db:
+        import sqlitestore
+
+        database = sqlitestore.TaskDatabase(args.db)
+        try:
+            stats = import_csv(args.source, database.insert_frame, args.report, args.chunk_rows)
+        finally:
+            database.close()
+    else:
+        stats = import_csv(args.source, append_csv(args.csv), args.report, args.chunk_rows)
+    print(summary(stats))
+
+
+if __name__ == '__main__':
+    main()
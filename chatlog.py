@@ -0,0 +1,196 @@
+import json
+import os
+
+# Bounded chat transcript.
+#
+# Every chat message is appended to a log file as one JSON line, and the
+# Text widget only ever holds a window of at most LIMIT consecutive messages
+# (STUDY_CHAT_MESSAGES, default 200). Sending drops the oldest message from
+# the top of the window. Scrolling to the top pages the PAGE messages before
+# the window back in from the log (dropping as many from the bottom), and
+# scrolling back down pages newer ones in again, so the widget and the
+# memory behind it stay the same size however long the session runs. The
+# window is tracked as the byte offsets of its messages in the log; a page
+# is read backwards from the first offset a block at a time, so nothing
+# reads the whole log, including the start-up page of the latest messages.
+# The intro text (finalsmartstudy's welcome) sits above the oldest message
+# and is never logged.
+
+LIMIT = max(1, int(os.environ.get('STUDY_CHAT_MESSAGES', 200)))
+PAGE = 50
+BLOCK = 1 << 16
+INTRO = -1  # start offset of the intro's entry
+
+
+def _text(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        # A line cut short by a crash mid-write
+        return line.decode('utf-8', 'replace')
+
+
+class ChatLog:
+    def __init__(self, widget, scrollbar, path, intro='', limit=LIMIT, page=PAGE):
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.path = path
+        self.intro = intro
+        self.limit = limit
+        self.page = max(1, min(page, limit))
+        self.log = None  # opened for appending on the first message
+        self.end = os.path.getsize(path) if os.path.exists(path) else 0
+        self.shown = []  # (start, end) log offsets of each message in the widget
+        self.paging = False
+        widget.configure(yscrollcommand=self._scrolled)
+        self._older()
+        widget.see('end')
+
+    # Log file
+    def _write(self, text):
+        if self.log is None:
+            self.log = open(self.path, 'ab')
+        record = (json.dumps(text) + '\n').encode('utf-8')
+        self.log.write(record)
+        self.log.flush()
+        self.end = self.log.tell()
+        return self.end - len(record), self.end
+
+    def _read_before(self, offset, count):
+        # The last count messages ending at offset, oldest first, as
+        # (start, end, text)
+        if offset <= 0:
+            return []
+        with open(self.path, 'rb') as log:
+            begin, data = offset, b''
+            while begin > 0 and data.count(b'\n') <= count:
+                step = min(BLOCK, begin)
+                begin -= step
+                log.seek(begin)
+                data = log.read(step) + data
+        lines = data[:-1].split(b'\n')
+        if begin > 0:
+            lines = lines[1:]  # the tail of a message before the block
+        messages = []
+        for line in reversed(lines[-count:]):
+            start = offset - len(line) - 1
+            messages.append((start, offset, _text(line)))
+            offset = start
+        return messages[::-1]
+
+    def _read_after(self, offset, count):
+        # The first count messages from offset, as (start, end, text)
+        messages = []
+        with open(self.path, 'rb') as log:
+            log.seek(offset)
+            for _ in range(count):
+                line = log.readline()
+                if not line.endswith(b'\n'):
+                    break
+                messages.append((offset, offset + len(line), _text(line[:-1])))
+                offset += len(line)
+        return messages
+
+    # Widget
+    @staticmethod
+    def _tag(start):
+        # Each message is inserted under its own tag, so its text can be
+        # found and deleted without counting characters
+        return f'chat{start}'
+
+    def _tagged(self, messages):
+        # insert() arguments for messages: text, tag, text, tag, ...
+        return [part for start, _, text in messages for part in (text, self._tag(start))]
+
+    def _drop_top(self, count):
+        if count <= 0:
+            return
+        tags = [self._tag(start) for start, _ in self.shown[:count]]
+        del self.shown[:count]
+        self.widget.delete('1.0', f'{tags[-1]}.last')
+        self.widget.tag_delete(*tags)
+
+    def _drop_bottom(self, count):
+        if count <= 0:
+            return
+        tags = [self._tag(start) for start, _ in self.shown[-count:]]
+        del self.shown[-count:]
+        self.widget.delete(f'{tags[0]}.first', 'end')
+        self.widget.tag_delete(*tags)
+
+    def _keep_view(self, action):
+        # Run action, then scroll back to the text that was at the top
+        self.widget.mark_set('chatview', '@0,0')
+        action()
+        self.widget.yview('chatview')
+        self.widget.mark_unset('chatview')
+
+    def _older(self):
+        # Page the messages before the window in at the top
+        first = self.shown[0][0] if self.shown else self.end
+        if first == INTRO:
+            return
+        messages = self._read_before(first, self.page)
+        if self.intro and (not messages or messages[0][0] == 0):
+            messages.insert(0, (INTRO, 0, self.intro))
+        if not messages:
+            return
+
+        def insert():
+            self.widget.insert('1.0', *self._tagged(messages))
+            self.shown[:0] = [(start, end) for start, end, _ in messages]
+            self._drop_bottom(len(self.shown) - self.limit)
+        self._keep_view(insert)
+
+    def _newer(self):
+        # Page the messages after the window in at the bottom
+        messages = self._read_after(self.shown[-1][1], self.page)
+        if not messages:
+            return
+
+        def insert():
+            self.widget.insert('end', *self._tagged(messages))
+            self.shown.extend((start, end) for start, end, _ in messages)
+            self._drop_top(len(self.shown) - self.limit)
+        self._keep_view(insert)
+
+    def _latest(self):
+        return not self.shown or self.shown[-1][1] >= self.end
+
+    def _at_start(self):
+        return not self.shown or self.shown[0][0] == INTRO or (self.shown[0][0] == 0 and not self.intro)
+
+    def _scrolled(self, first, last):
+        # yscrollcommand: move the scrollbar, and page in more messages
+        # once the view reaches either end of the window
+        self.scrollbar.set(first, last)
+        if self.paging:
+            return
+        first, last = float(first), float(last)
+        if first <= 0 and last < 1 and not self._at_start():
+            self._page(self._older)
+        elif last >= 1 and first > 0 and not self._latest():
+            self._page(self._newer)
+
+    def _page(self, action):
+        def run():
+            try:
+                action()
+            finally:
+                self.paging = False
+        self.paging = True
+        self.widget.after_idle(run)
+
+    def add(self, text):
+        # Log a message and show it at the bottom, scrolling to it
+        latest = self._latest()
+        start, end = self._write(text)
+        if latest:
+            self.widget.insert('end', text, self._tag(start))
+            self.shown.append((start, end))
+            self._drop_top(len(self.shown) - self.limit)
+        else:
+            # Scrolled back through older messages: back to the latest page
+            self._drop_top(len(self.shown))
+            self._older()
+        self.widget.see('end')
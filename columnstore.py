@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from timetable import TASK_COLUMNS, task_minutes
+
+# Typed columnar task store: a directory of .npy files that np.load can
+# memory-map, so readers only touch the columns they ask for.
+#
+#   minutes.npy         int32      Duration in minutes (-1 when invalid)
+#   priority.npy        int32      Priority (0 when missing; int8 in older stores)
+#   deadline_at.npy     datetime64 Deadline as a timestamp (NaT when not a date)
+#   subject.npy         int32      codes into subjects.json
+#   deadline.npy        int32      codes into deadlines.json (the text as typed)
+#   ids.npy             int64      task Id (-1 when missing; absent in older stores)
+#
+# Loads map the files copy-on-write (except on Windows, see MMAP), and
+# load_frame hands the numeric columns on without copying them, so
+# TaskStore.from_columns can keep them mapped as they are.
+
+COLUMN_STORE = 'study_tasks.cols'
+FORMAT_VERSION = 1
+
+# Columns load_frame can produce and the files each one needs
+FRAME_COLUMNS = {
+    'Subject': ['subject.npy', 'subjects.json'],
+    'Duration': ['minutes.npy'],
+    'Minutes': ['minutes.npy'],
+    'Priority': ['priority.npy'],
+    'Deadline': ['deadline.npy', 'deadlines.json'],
+    'DeadlineAt': ['deadline_at.npy'],
+    'Id': ['ids.npy', 'meta.json'],
+}
+# Files a store written by an older version may not have
+OPTIONAL_FILES = {'ids.npy'}
+PRIORITY_RANGE = np.iinfo(np.int32)
+# Windows can't replace a directory whose files are still mapped, and a
+# loaded store keeps its columns for as long as the planner runs
+MMAP = os.name != 'nt'
+
+
+def _encode(values):
+    codes, uniques = pd.factorize(pd.Series(values, copy=False).fillna('').astype(str))
+    return codes.astype(np.int32), [str(u) for u in uniques]
+
+
+def _parse_deadlines(labels):
+    parsed = np.full(len(labels), np.datetime64('NaT'), dtype='datetime64[s]')
+    for i, label in enumerate(labels):
+        try:
+            parsed[i] = pd.Timestamp(label).to_datetime64() if label else np.datetime64('NaT')
+        except (ValueError, TypeError):
+            pass
+    return parsed
+
+
+def format_minutes(minutes):
+    # Minutes -> "HH:MM" strings, formatting each distinct value only once
+    uniques, inverse = np.unique(minutes, return_inverse=True)
+    labels = [f"{m // 60:02d}:{m % 60:02d}" if m >= 0 else '' for m in uniques.tolist()]
+    return pd.Categorical.from_codes(inverse.reshape(-1), labels)
+
+
+def exists(path=COLUMN_STORE):
+    return os.path.exists(os.path.join(path, 'meta.json')) or \
+        os.path.exists(os.path.join(path + '.old', 'meta.json'))
+
+
+def write_columns(frame, path=COLUMN_STORE):
+    minutes = task_minutes(frame)
+    minutes = np.nan_to_num(minutes, nan=-1).astype(np.int32)
+    priority = pd.to_numeric(frame['Priority'], errors='coerce').fillna(0).to_numpy()
+    if len(priority) and (priority.min() < PRIORITY_RANGE.min or priority.max() > PRIORITY_RANGE.max):
+        raise ValueError("Priority is out of range for the column store.")
+    priority = priority.astype(np.int32)
+    subject_codes, subjects = _encode(frame['Subject'])
+    deadline_codes, deadlines = _encode(frame['Deadline'])
+    deadline_at = _parse_deadlines(deadlines)[deadline_codes] if deadlines \
+        else np.empty(0, dtype='datetime64[s]')
+    if 'Id' in frame:
+        ids = pd.to_numeric(frame['Id'], errors='coerce').fillna(-1).to_numpy().astype(np.int64)
+    else:
+        ids = np.full(len(frame), -1, dtype=np.int64)
+
+    # Build the new store next to the old one and swap directories, so a
+    # crash leaves either the old or the new store readable
+    tmp = path + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, 'minutes.npy'), minutes)
+    np.save(os.path.join(tmp, 'priority.npy'), priority)
+    np.save(os.path.join(tmp, 'deadline_at.npy'), deadline_at)
+    np.save(os.path.join(tmp, 'subject.npy'), subject_codes)
+    np.save(os.path.join(tmp, 'deadline.npy'), deadline_codes)
+    np.save(os.path.join(tmp, 'ids.npy'), ids)
+    with open(os.path.join(tmp, 'subjects.json'), 'w') as f:
+        json.dump(subjects, f)
+    with open(os.path.join(tmp, 'deadlines.json'), 'w') as f:
+        json.dump(deadlines, f)
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'version': FORMAT_VERSION, 'rows': len(frame)}, f)
+
+    old = path + '.old'
+    if _resolve(path) == old:
+        # The last write stopped between the renames, and .old is the only
+        # copy: keep it until the new store is in place
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old)
+    os.rename(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _resolve(path):
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return path
+    # Crash between the two renames in write_columns
+    return path + '.old'
+
+
+def read_columns(path=COLUMN_STORE, files=None, mmap=MMAP):
+    # Raw arrays keyed by file name; .npy files come back memory-mapped
+    # copy-on-write, so a caller may change them without touching the files
+    path = _resolve(path)
+    if files is None:
+        files = sorted({name for needed in FRAME_COLUMNS.values() for name in needed})
+    arrays = {}
+    for name in files:
+        full = os.path.join(path, name)
+        if name in OPTIONAL_FILES and not os.path.exists(full):
+            continue
+        if name.endswith('.json'):
+            with open(full) as f:
+                arrays[name] = json.load(f)
+        else:
+            arrays[name] = np.load(full, mmap_mode='c' if mmap else None)
+    return arrays
+
+
+def load_frame(path=COLUMN_STORE, columns=TASK_COLUMNS, mmap=MMAP):
+    # Task DataFrame built only from the files the requested columns need
+    files = sorted({name for column in columns for name in FRAME_COLUMNS[column]})
+    arrays = read_columns(path, files, mmap)
+    data = {}
+    for column in columns:
+        if column == 'Subject':
+            data[column] = pd.Categorical.from_codes(arrays['subject.npy'], arrays['subjects.json'])
+        elif column == 'Duration':
+            data[column] = format_minutes(arrays['minutes.npy'])
+        elif column == 'Minutes':
+            data[column] = arrays['minutes.npy']
+        elif column == 'Priority':
+            data[column] = arrays['priority.npy']
+        elif column == 'Deadline':
+            data[column] = pd.Categorical.from_codes(arrays['deadline.npy'], arrays['deadlines.json'])
+        elif column == 'DeadlineAt':
+            data[column] = arrays['deadline_at.npy']
+        elif column == 'Id':
+            data[column] = arrays.get('ids.npy', np.full(arrays['meta.json']['rows'], -1, dtype=np.int64))
+    # copy=False keeps the numeric columns on the mapped arrays
+    return pd.DataFrame(data, columns=list(columns), copy=False)
+
+
+def csv_to_columns(csv_path, path=COLUMN_STORE):
+    write_columns(pd.read_csv(csv_path, dtype={'Subject': str, 'Duration': str, 'Deadline': str}), path)
+
+
+def columns_to_csv(path=COLUMN_STORE, csv_path='study_tasks.csv'):
+    # The planners' CSV layout (taskstore.SAVED_COLUMNS), so ids survive;
+    # a store written without ids gets -1, which a load numbers
+    load_frame(path, columns=TASK_COLUMNS + ['Id']).to_csv(csv_path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between study_tasks.csv and the columnar task store.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    to_columns = sub.add_parser('to-columns', help="CSV -> columnar store")
+    to_columns.add_argument('csv', nargs='?', default='study_tasks.csv')
+    to_columns.add_argument('store', nargs='?', default=COLUMN_STORE)
+    to_csv = sub.add_parser('to-csv', help="columnar store -> CSV")
+    to_csv.add_argument('store', nargs='?', default=COLUMN_STORE)
+    to_csv.add_argument('csv', nargs='?', default='study_tasks.csv')
+    args = parser.parse_args()
+
+    if args.command == 'to-columns':
+        csv_to_columns(args.csv, args.store)
+    else:
+        columns_to_csv(args.store, args.csv)
+
+
+if __name__ == '__main__':
+    main()
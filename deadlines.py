@@ -0,0 +1,240 @@
+import heapq
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import optimizer
+import recurrence
+import strategies
+import timetable
+
+# Deadline-aware scheduling.
+#
+# The Deadline field is free text ("Monday", "tomorrow", "2024-05-01 18:00").
+# parse_deadlines turns it into real datetimes, then a heap orders the tasks
+# either earliest-deadline-first or by weighted slack, with Priority as the
+# tiebreak. Tasks whose slot ends after their deadline are flagged Late.
+# 'Study windows' hands the tasks to the multi-day optimizer instead, and
+# 'Best of strategies' to a parallel search over several orders
+# (strategies.py).
+# Recurring tasks (recurrence.py) are expanded to their occurrences over the
+# horizon being planned before any of this, so each occurrence is scheduled
+# as a task of its own.
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+RELATIVE = re.compile(r"^in\s+(\d+)\s*(day|days|hour|hours|h|d)$")
+CLOCK = re.compile(r"^(.*?)\s*(?:at\s+)?(\d{1,2}):(\d{2})$")
+
+
+def end_of_day(day):
+    return datetime(day.year, day.month, day.day, 23, 59)
+
+
+def parse_deadline(text, now=None):
+    # One free-text deadline -> datetime, or None when it can't be read
+    if now is None:
+        now = datetime.now()
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return None
+    text = str(text).strip().lower()
+    if not text:
+        return None
+
+    match = RELATIVE.match(text)
+    if match:
+        amount = int(match.group(1))
+        if match.group(2).startswith('h'):
+            return now + timedelta(hours=amount)
+        return end_of_day(now + timedelta(days=amount))
+
+    # Optional "HH:MM" after a day name, e.g. "friday 17:00"
+    clock = None
+    match = CLOCK.match(text)
+    if match and match.group(1):
+        text = match.group(1).strip()
+        clock = (int(match.group(2)), int(match.group(3)))
+
+    day = None
+    if text in ('today', 'tonight'):
+        day = now
+    elif text == 'tomorrow':
+        day = now + timedelta(days=1)
+    else:
+        name = text[5:] if text.startswith('next ') else text
+        for index, weekday in enumerate(WEEKDAYS):
+            if len(name) >= 3 and weekday.startswith(name):
+                ahead = (index - now.weekday()) % 7
+                if text.startswith('next ') and ahead == 0:
+                    ahead = 7
+                day = now + timedelta(days=ahead)
+                break
+
+    if day is not None:
+        if clock:
+            return datetime(day.year, day.month, day.day, *clock)
+        return end_of_day(day)
+
+    try:
+        stamp = pd.Timestamp(text if clock is None else f"{text} {clock[0]:02d}:{clock[1]:02d}")
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(stamp):
+        return None
+    stamp = stamp.to_pydatetime().replace(tzinfo=None)
+    if clock is None and stamp.hour == 0 and stamp.minute == 0 and ':' not in text:
+        return end_of_day(stamp)
+    return stamp
+
+
+def parse_deadlines(deadlines, now=None):
+    # Vectorized parse_deadline: datetime64 array, NaT where unreadable.
+    # Deadlines repeat a lot, so only the distinct values are parsed.
+    if now is None:
+        now = datetime.now()
+    codes, uniques = pd.factorize(pd.Series(deadlines, copy=False), use_na_sentinel=True)
+    # "YYYY-MM-DD HH:MM", the form saved by the planners and recurrence, in
+    # one vectorized pass; parse_deadline reads it the same way
+    stamps = pd.to_datetime(pd.Series(uniques, dtype=object), format=recurrence.DUE_FORMAT, errors='coerce')
+    lookup = np.append(stamps.to_numpy(dtype='datetime64[m]'), np.datetime64('NaT'))
+    for i in np.flatnonzero(stamps.isna().to_numpy()).tolist():
+        parsed = parse_deadline(uniques[i], now)
+        lookup[i] = np.datetime64(parsed, 'm') if parsed else np.datetime64('NaT')
+    return lookup[codes]
+
+
+def _priority_keys(tasks):
+    key = pd.to_numeric(tasks['Priority'], errors='coerce')
+    return key.to_numpy(dtype=float, na_value=np.inf)
+
+
+def heap_order(keys, priorities):
+    # Pop order from a min-heap on (key, priority). Tasks sharing a pair form
+    # one FIFO bucket, so the heap only holds the k distinct pairs and the
+    # whole ordering is O(n + k log k), at worst O(n log n).
+    groups = pd.DataFrame({'key': keys, 'priority': priorities})
+    codes = groups.groupby(['key', 'priority'], sort=False, dropna=False).ngroup().to_numpy()
+    first = np.unique(codes, return_index=True)[1]
+    heap = [(keys[i], priorities[i], code) for code, i in enumerate(first)]
+    heapq.heapify(heap)
+    rank = np.empty(len(heap), dtype=np.int64)
+    for position in range(len(heap)):
+        rank[heapq.heappop(heap)[2]] = position
+    return np.argsort(rank[codes], kind='stable')
+
+
+def deadline_keys(due, minutes, priorities, start, mode):
+    # Minutes from start; tasks without a readable deadline go last
+    due_minutes = (due - np.datetime64(start, 'm')).astype('timedelta64[m]').astype(float)
+    due_minutes[np.isnat(due)] = np.inf
+    if mode == 'Earliest deadline':
+        return due_minutes
+    # Weighted slack: time to spare if started now, scaled by priority
+    # weight (priority 1 weighs 5, priority 5 weighs 1)
+    slack = due_minutes - np.nan_to_num(minutes, nan=0.0)
+    weight = 6 - np.clip(np.nan_to_num(priorities, posinf=5), 1, 5)
+    return np.where(slack >= 0, slack / weight, slack * weight)
+
+
+def _late_slots(tasks, order, due, minutes, start, **layout):
+    # timetable.schedule of tasks in order, plus Due and Late columns
+    ordered = tasks.iloc[order]
+    slots, skipped = timetable.schedule(ordered, start, **layout)
+    valid = ~np.isnan(minutes[order])
+    task_rows = ~slots['Break'].to_numpy()
+    slot_due = np.full(len(slots), np.datetime64('NaT'), dtype='datetime64[m]')
+    slot_due[task_rows] = due[order][valid]
+    slots['Due'] = slot_due
+    slots['Late'] = slots['End'].to_numpy() > slot_due
+    return slots, skipped
+
+
+def deadline_timetable(tasks, start=None, mode='Earliest deadline', **layout):
+    # Same output as timetable.build_timetable plus Due and Late columns
+    if start is None:
+        start = datetime.now()
+    due = parse_deadlines(tasks['Deadline'], now=start)
+    minutes = timetable.task_minutes(tasks)
+    priorities = _priority_keys(tasks)
+    keys = deadline_keys(due, minutes, priorities, start, mode)
+    order = heap_order(keys, priorities)
+    return _late_slots(tasks, order, due, minutes, start, **layout)
+
+
+def strategy_timetable(tasks, start=None, time_limit=optimizer.DEFAULT_TIME_LIMIT, stop=None, policy=None):
+    # deadline_timetable for the best order strategies.search finds; the
+    # winner and every finished candidate's score ride along in slots.attrs
+    if start is None:
+        start = datetime.now()
+    due = parse_deadlines(tasks['Deadline'], now=start)
+    minutes = timetable.task_minutes(tasks)
+    valid = np.flatnonzero(~np.isnan(minutes))
+    due_minutes = (due - np.datetime64(start, 'm')).astype('timedelta64[m]').astype(float)
+    due_minutes[np.isnat(due)] = np.inf
+    subjects = pd.factorize(pd.Series(tasks['Subject'], dtype=object, copy=False).iloc[valid])[0]
+    best, results = strategies.search(minutes[valid], due_minutes[valid], _priority_keys(tasks)[valid],
+                                      subjects, policy, time_limit, stop)
+    # Tasks with a bad Duration go to the end, where schedule skips them
+    order = np.concatenate([valid[best], np.flatnonzero(np.isnan(minutes))])
+    slots, skipped = _late_slots(tasks, order, due, minutes, start, policy=policy)
+    slots.attrs['strategy'] = results[0][1]
+    slots.attrs['strategies'] = results
+    return slots, skipped
+
+
+def window_timetable(tasks, start=None, time_limit=optimizer.DEFAULT_TIME_LIMIT, stop=None):
+    # Optimizer plan; tasks that didn't fit before their deadline and the
+    # search stats ride along in slots.attrs
+    if start is None:
+        start = datetime.now()
+    due = parse_deadlines(tasks['Deadline'], now=start)
+    slots, skipped, unscheduled, stats = optimizer.optimize(tasks, due, start, time_limit=time_limit, stop=stop)
+    slots.attrs['unscheduled'] = unscheduled
+    slots.attrs['search'] = stats
+    return slots, skipped
+
+
+def build(tasks, mode, start=None, time_limit=optimizer.DEFAULT_TIME_LIMIT, stop=None, horizon_days=None,
+          **layout):
+    # Generate Timetable entry point for every scheduling mode. Study window
+    # plans have no breaks: the windows themselves are the study sessions.
+    # stop() lets a background caller cut the optimizer search short.
+    # Recurring tasks repeat over horizon_days: by default the optimizer's
+    # window horizon for Study windows, recurrence.HORIZON_DAYS otherwise.
+    if start is None:
+        start = datetime.now()
+    if horizon_days is None:
+        horizon_days = optimizer.DEFAULT_HORIZON_DAYS if mode == 'Study windows' else recurrence.HORIZON_DAYS
+    expanded = recurrence.expand_tasks(tasks, start, horizon_days)
+    if mode == 'Study windows':
+        slots, skipped = window_timetable(expanded, start, time_limit, stop)
+    elif mode == 'Best of strategies':
+        slots, skipped = strategy_timetable(expanded, start, time_limit, stop, **layout)
+    elif mode in ('Earliest deadline', 'Weighted slack'):
+        slots, skipped = deadline_timetable(expanded, start, mode, **layout)
+    else:
+        slots, skipped = timetable.build_timetable(expanded, start, **layout)
+    if expanded is not tasks and 'Id' in skipped:
+        # A recurring task with a bad Duration is reported once
+        skipped = skipped.drop_duplicates('Id')
+    return slots, skipped
+
+
+def _names(frame, limit):
+    names = [str(s) for s in frame['Subject'].head(limit)]
+    more = len(frame) - len(names)
+    return ", ".join(names) + (f" and {more} more" if more > 0 else "")
+
+
+def late_warning(slots, limit=10):
+    unscheduled = slots.attrs.get('unscheduled')
+    if unscheduled is not None and not unscheduled.empty:
+        return (f"{len(unscheduled)} task(s) do not fit in the study windows before their "
+                f"deadline: {_names(unscheduled, limit)}.")
+    if 'Late' not in slots:
+        return None
+    late = slots[slots['Late']]
+    if late.empty:
+        return None
+    return f"{len(late)} task(s) cannot meet their deadline: {_names(late, limit)}."
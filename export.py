@@ -0,0 +1,174 @@
+import argparse
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import deadlines
+import modes
+import timetable
+
+# Timetable export to CSV and iCalendar (.ics).
+#
+# Slots are read CHUNK_ROWS at a time, from a slot table (deadlines.build) or
+# from a LiveTimetable, which renders only the rows asked for. Each chunk is
+# formatted with column operations and handed on by a generator, so memory
+# stays flat however many slots there are. The file is written under a temp
+# name and renamed over the target at the end: a cancelled or failed export
+# leaves any previous file untouched.
+
+CHUNK_ROWS = 20000
+FORMATS = ('.csv', '.ics')
+CSV_COLUMNS = timetable.SLOT_COLUMNS + ['Due', 'Late']
+PRODID = '-//smartstudyplanner//Timetable export//EN'
+BREAK_SUMMARY = 'Break'
+# Time-of-day parts of the CSV ("2025-01-31 09:30") and iCalendar
+# ("20250131T093000") timestamps, indexed by minute-of-day
+CSV_CLOCK = ' ' + timetable.CLOCK_LABELS
+ICS_CLOCK = np.array([f"T{m // 60:02d}{m % 60:02d}00" for m in range(24 * 60)], dtype=object)
+
+
+def slot_chunks(source, chunksize=CHUNK_ROWS):
+    # Consecutive slot frames of a slot table or LiveTimetable
+    for first in range(0, len(source), chunksize):
+        if isinstance(source, pd.DataFrame):
+            yield source.iloc[first:first + chunksize]
+        else:
+            yield source.slots(first, first + chunksize)
+
+
+def _labels(times, day_format, clock):
+    # Timestamp labels: strftime once per distinct day, plus the time of day
+    # from a label table indexed by minute-of-day
+    values = pd.DatetimeIndex(times).values.astype('datetime64[m]')
+    days = values.astype('datetime64[D]')
+    unique, inverse = np.unique(days, return_inverse=True)
+    day_labels = np.asarray(pd.DatetimeIndex(unique).strftime(day_format), dtype=object)
+    return pd.Series(day_labels[inverse] + clock[(values - days).astype(np.int64)])
+
+
+def csv_text(chunks):
+    # CSV pieces: the header with the first chunk, then one piece per chunk
+    columns = None
+    for chunk in chunks:
+        header = columns is None
+        if header:
+            columns = [c for c in CSV_COLUMNS if c in chunk]
+        chunk = chunk.reindex(columns=columns)
+        out = {name: chunk[name].to_numpy() for name in columns}
+        out['Start'] = _labels(chunk['Start'], '%Y-%m-%d', CSV_CLOCK)
+        out['End'] = _labels(chunk['End'], '%Y-%m-%d', CSV_CLOCK)
+        if 'Due' in out:
+            due = chunk['Due'].notna().to_numpy()
+            out['Due'] = np.full(len(chunk), '', dtype=object)
+            out['Due'][due] = _labels(chunk['Due'][due], '%Y-%m-%d', CSV_CLOCK).to_numpy()
+        yield pd.DataFrame(out, columns=columns).to_csv(index=False, header=header, lineterminator='\n')
+
+
+def _escape(text):
+    # RFC 5545 TEXT values
+    return (text.str.replace('\\', '\\\\', regex=False).str.replace(';', '\\;', regex=False)
+            .str.replace(',', '\\,', regex=False).str.replace('\n', '\\n', regex=False))
+
+
+def _fold(line):
+    # Content lines longer than 75 octets continue on lines starting with a space
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    cut = 75
+    while len(data) > cut:
+        while (data[cut] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+        cut = 74  # after the leading space
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def ics_text(chunks):
+    # iCalendar pieces: the calendar header, one piece of VEVENTs per chunk,
+    # then the footer. Times are floating local time, as shown in the planner.
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield ('BEGIN:VCALENDAR\r\nVERSION:2.0\r\n' + _fold(f'PRODID:{PRODID}') +
+           'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n')
+    row = 0
+    for chunk in chunks:
+        starts = _labels(chunk['Start'], '%Y%m%d', ICS_CLOCK)
+        ends = _labels(chunk['End'], '%Y%m%d', ICS_CLOCK)
+        is_break = chunk['Break'].to_numpy(dtype=bool)
+        summary = _escape(chunk['Subject'].astype(str).reset_index(drop=True)).where(~is_break, BREAK_SUMMARY)
+        details = ('Priority ' + chunk['Priority'].astype(str).reset_index(drop=True)).where(~is_break, '')
+        if 'Late' in chunk:
+            late = chunk['Late'].to_numpy(dtype=bool)
+            details = details.where(~late, details + '\\nMisses its deadline')
+        events = []
+        for number, (start, end, text, detail, pause) in enumerate(
+                zip(starts, ends, summary, details, is_break), row):
+            events.append(
+                f'BEGIN:VEVENT\r\nUID:{stamp}-{number}@smartstudyplanner\r\nDTSTAMP:{stamp}\r\n'
+                f'DTSTART:{start}\r\nDTEND:{end}\r\n' + _fold(f'SUMMARY:{text}') +
+                (_fold(f'DESCRIPTION:{detail}') if detail else '') +
+                ('TRANSP:TRANSPARENT\r\n' if pause else '') + 'END:VEVENT\r\n')
+        row += len(chunk)
+        yield ''.join(events)
+    yield 'END:VCALENDAR\r\n'
+
+
+def write(source, path, job=None, chunksize=CHUNK_ROWS):
+    # Stream source (slot table or LiveTimetable) to path; the format follows
+    # the extension. job (workers.Job) gets progress and can cancel between
+    # chunks. Returns the number of slots written.
+    kind = os.path.splitext(path)[1].lower()
+    if kind not in FORMATS:
+        raise ValueError(f"Export to a .csv or .ics file, not '{os.path.basename(path)}'.")
+    total = len(source)
+    done = 0
+
+    def chunks():
+        nonlocal done
+        for chunk in slot_chunks(source, chunksize):
+            if job:
+                job.check()
+            yield chunk
+            done += len(chunk)
+            if job:
+                job.progress(f"{job.label}: {done} of {total} slots", done, total)
+
+    pieces = csv_text(chunks()) if kind == '.csv' else ics_text(chunks())
+    tmp = path + '.tmp'
+    try:
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            for piece in pieces:
+                f.write(piece)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a timetable from saved tasks and export it.")
+    parser.add_argument('output', help="file to write: .ics (iCalendar) or .csv")
+    parser.add_argument('--tasks', default='study_tasks.csv', help="saved tasks (CSV)")
+    parser.add_argument('--mode', default=modes.SCHEDULE_MODES[0], choices=modes.SCHEDULE_MODES)
+    parser.add_argument('--breaks', default='Hourly', choices=modes.BREAK_POLICIES)
+    parser.add_argument('--start', type=datetime.fromisoformat, help="YYYY-MM-DD HH:MM (default: now)")
+    args = parser.parse_args()
+
+    tasks = pd.read_csv(args.tasks, dtype={'Subject': str, 'Duration': str, 'Deadline': str})
+    slots, skipped = deadlines.build(tasks, args.mode, args.start, policy=args.breaks)
+    if not skipped.empty:
+        print(timetable.skipped_warning(skipped))
+    print(f"wrote {write(slots, args.output)} slots to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
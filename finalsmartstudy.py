@@ -1,9 +1,35 @@
+import startup
 import tkinter as tk
-from tkinter import messagebox, scrolledtext, ttk
-import pandas as pd
+from tkinter import filedialog, messagebox, scrolledtext, ttk
 import os
 from datetime import datetime, timedelta
 import re
+import instrument
+import modes
+import strategypool
+import workers
+from chatlog import ChatLog
+from virtualview import VirtualListbox, VirtualText
+
+# The strategy search's worker processes are forked while this is still the
+# only thread (see strategypool.py)
+strategypool.start()
+
+# pandas and the modules built on it are imported in the background while
+# the window paints (see startup.py)
+timetable = startup.lazy('timetable')
+deadlines = startup.lazy('deadlines')
+intents = startup.lazy('intents')
+journal = startup.lazy('journal')
+columnstore = startup.lazy('columnstore')
+sqlitestore = startup.lazy('sqlitestore')
+taskstore = startup.lazy('taskstore')
+bulkimport = startup.lazy('bulkimport')
+livetimetable = startup.lazy('livetimetable')
+export = startup.lazy('export')
+recurrence = startup.lazy('recurrence')
+history = startup.lazy('history')
+taskindex = startup.lazy('taskindex')
 
 # Color Scheme
 COLORS = {
@@ -59,63 +85,399 @@ def setup_styles():
 
 # Data Setup
 SAVE_FILE = 'study_tasks.csv'
-if os.path.exists(SAVE_FILE):
-    study_data = pd.read_csv(SAVE_FILE)
-else:
-    study_data = pd.DataFrame(columns=['Subject', 'Duration', 'Priority', 'Deadline'])
+COLUMN_STORE = 'study_tasks.cols'
+DB_FILE = 'study_tasks.db'
+CHAT_LOG = 'study_chat.log'  # every chat message; the chat box shows the latest (chatlog.py)
+# 'csv' (default), 'columns' for the typed memory-mapped store, or 'sqlite'
+# to commit every edit to DB_FILE as it is made
+PERSISTENCE_MODE = os.environ.get('STUDY_PERSISTENCE', 'csv')
+COLUMNAR_LOAD = ['Subject', 'Duration', 'Priority', 'Deadline', 'Minutes', 'Id']
+task_db = None
+study_data = None  # TaskStore, set once the startup load finishes
+live_timetable = None  # LiveTimetable while a generated timetable follows edits
+timetable_slots = None  # slot table of a generated timetable that is not live, for Export
+task_history = None  # history.History of the edits since the tasks were loaded, for Undo/Redo
+task_matches = None  # slots of the tasks the search bar shows, None when it doesn't filter
 
 # Define missing functions
+@instrument.timed('Add Task')
 def add_task():
     subject = subject_entry.get()
     duration = duration_entry.get()
     priority = priority_entry.get()
     deadline = deadline_entry.get()
-    
+    if loading():
+        return
+
     if subject and duration and priority and deadline:
-        # Add task to the DataFrame
-        study_data.loc[len(study_data)] = [subject, duration, priority, deadline]
-        task_listbox.insert(tk.END, f"{subject} - {duration} - Priority: {priority} - Deadline: {deadline}")
+        # Add task to the task store; a bare "review" series starts today
+        deadline = recurrence.anchor(deadline)
+        shown = task_count()
+        task_id = task_db.add(subject, duration, priority, deadline) if task_db else -1
+        task_id = study_data.append(subject, duration, priority, deadline, task_id)
+        task_history.added([task_id], [(subject, duration, priority, deadline)], "Add Task")
+        filter_tasks()
+        if task_count() > shown:
+            # Last in the list, and in the search results if it matches
+            task_list.inserted(task_count() - 1)
+        update_statistics()
+        follow_edit(lambda live: live.add(task_id, subject, duration, priority, deadline))
         clear_entries()
     else:
         messagebox.showerror("Input Error", "Please fill in all fields.")
 
+def write_tasks(frame):
+    # Runs on a worker thread (see workers.py)
+    if PERSISTENCE_MODE == 'columns':
+        with instrument.span('Save Tasks/write_columns'):
+            columnstore.write_columns(frame, COLUMN_STORE)
+    else:
+        with instrument.span('Save Tasks/to_csv'):
+            journal.write_snapshot(frame[taskstore.SAVED_COLUMNS], SAVE_FILE)
+
+@instrument.timed('Save Tasks')
 def save_tasks():
-    study_data.to_csv(SAVE_FILE, index=False)
-    messagebox.showinfo("Save Successful", "Tasks saved successfully.")
+    # study_data.frame() is a snapshot: TaskStore never rewrites a slot
+    if loading():
+        return
+    if task_db:
+        # Every edit is already committed; Save only checkpoints the WAL
+        worker_pool.submit('save', lambda job: task_db.checkpoint(),
+                           on_done=lambda result: messagebox.showinfo("Save Successful", "Tasks saved successfully."),
+                           label="Saving tasks", cancellable=False)
+        return
+    task_saver.request(study_data.frame(),
+                       lambda: messagebox.showinfo("Save Successful", "Tasks saved successfully."))
 
-def load_tasks():
-    task_listbox.delete(0, tk.END)
+@instrument.timed('Load Tasks/read')
+def read_tasks(job):
+    # Runs on a worker thread; None when there is nothing to load
+    if task_db:
+        return taskstore.TaskStore.from_frame(task_db.load())
+    if PERSISTENCE_MODE == 'columns' and columnstore.exists(COLUMN_STORE):
+        return taskstore.TaskStore.from_columns(columnstore.load_frame(COLUMN_STORE, columns=COLUMNAR_LOAD))
     if os.path.exists(SAVE_FILE):
-        global study_data
-        study_data = pd.read_csv(SAVE_FILE)
-        for index, row in study_data.iterrows():
-            task_listbox.insert(tk.END, f"{row['Subject']} - {row['Duration']} - Priority: {row['Priority']} - Deadline: {row['Deadline']}")
+        return taskstore.TaskStore.from_frame(workers.read_csv(SAVE_FILE, job))
+    return None
+
+def read_loaded(job):
+    # Runs on a worker thread: the tasks with their search index built, and
+    # the undo history's tree of them
+    store = read_tasks(job)
+    if store is None:
+        return None, None
+    store.search_index()
+    store.rollups()
+    return store, history.TaskTree.from_frame(store.frame())
+
+@instrument.timed('Load Tasks/show')
+def tasks_loaded(result):
+    global study_data, live_timetable
+    store, tree = result
+    if store is None:
+        return
+    study_data = store
+    task_history.reset(tree)
+    update_task_list()
+    if live_timetable is not None:
+        # Every task changed; start the timetable over
+        live_timetable = None
+        generate_timetable()
+
+def open_tasks(job):
+    # Startup load on a worker thread: the deferred imports, then the saved
+    # tasks. Returns (database or None, TaskStore, the undo history's
+    # TaskTree of it).
+    startup.preload()
+    database = None
+    if PERSISTENCE_MODE == 'sqlite':
+        database = sqlitestore.TaskDatabase(DB_FILE)
+        store = taskstore.TaskStore.from_frame(database.load())
+    else:
+        store = read_tasks(job)
+        if store is None:
+            store = taskstore.TaskStore()
+    store.search_index()
+    store.rollups()
+    return database, store, history.TaskTree.from_frame(store.frame())
+
+def tasks_opened(result):
+    global task_db, study_data, task_history
+    task_db, study_data, tree = result
+    task_history = history.History(tree)
+    update_task_list()
+    startup.loaded()
+
+def open_failed(error):
+    global study_data, task_history
+    study_data = taskstore.TaskStore()
+    task_history = history.History()
+    update_task_list()
+    startup.loaded()
+    worker_pool.report_error(error)
+
+@instrument.timed('Import Tasks')
+def import_tasks():
+    if loading():
+        return
+    path = filedialog.askopenfilename(title="Import tasks",
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
+        return
+    # Rows inserted into the database can't be taken back, so a SQLite
+    # import runs to the end
+    imported = ([], [])  # ids and rows added so far, for one undo step at the end
+    worker_pool.submit('import', lambda job: read_import(path, job),
+                       on_chunk=lambda frame: add_imported(imported, frame),
+                       on_done=lambda stats: tasks_imported(imported, stats),
+                       on_cancel=lambda: tasks_imported(imported),
+                       on_error=lambda error: tasks_imported(imported, error=error),
+                       label="Importing tasks", cancellable=task_db is None)
+
+def read_import(path, job):
+    # Runs on a worker thread: each validated chunk goes to the Tk thread as
+    # soon as it is read, so only a couple of chunks are held at a time
+    def accept(frame):
+        if task_db:
+            frame['Id'] = task_db.insert_frame(frame)
+        job.deliver(frame)
+    return bulkimport.import_csv(path, accept, job=job)
+
+@instrument.timed('Import Tasks/chunk')
+def add_imported(imported, frame):
+    task_ids, rows = imported
+    task_ids.extend(study_data.extend(frame).tolist())
+    rows.extend(history.task_rows(frame))
+
+@instrument.timed('Import Tasks/show')
+def tasks_imported(imported, stats=None, error=None):
+    # Also runs when the import is cancelled or fails (stats None): the
+    # tasks added before it stopped stay, and are saved and undoable
+    task_ids, rows = imported
+    if task_ids:
+        task_history.added(task_ids, rows, "Import Tasks")
+    update_task_list()
+    if live_timetable is not None:
+        generate_timetable()
+    if error is not None:
+        worker_pool.report_error(error)
+    elif stats is None:
+        messagebox.showinfo("Info", f"Import cancelled after {len(task_ids)} tasks.")
+    else:
+        messagebox.showinfo("Info", bulkimport.summary(stats))
+
+@instrument.timed('Load Tasks')
+def load_tasks():
+    if worker_pool.running('load'):
+        return
+    worker_pool.submit('load', read_loaded, on_done=tasks_loaded, label="Loading tasks")
+
+def loading():
+    # Edits made while a load runs would be lost when it finishes
+    if worker_pool.running('load'):
+        messagebox.showwarning("Warning", "Tasks are still loading.")
+        return True
+    return False
+
+def task_count():
+    if task_matches is not None:
+        return len(task_matches)
+    return len(study_data) if study_data is not None else 0
+
+@instrument.timed('render/task list')
+def task_list_rows(start, stop):
+    # Only the visible rows are rendered; see virtualview.py
+    if study_data is None:
+        return []
+    return [f"{subject} - {duration} - Priority: {priority} - Deadline: {deadline}"
+            for subject, duration, priority, deadline in study_data.rows(start, stop, task_matches)]
+
+def update_task_list():
+    filter_tasks()
+    task_list.refresh()
+    update_statistics()
 
+@instrument.timed('render/statistics')
+def update_statistics():
+    # Running totals kept by the task store (rollups.py), not a pass over the tasks
+    if study_data is not None:
+        statistics_text.set("\n".join(study_data.rollups().summary()))
+
+def filter_tasks():
+    # Run the search bar's filters over the current tasks (taskindex.py)
+    global task_matches
+    text = search_text.get()
+    low, high = sorted((int(priority_low.get()), int(priority_high.get())))
+    priorities = (low, high) if (low, high) != (1, 5) else None
+    due = taskindex.due_window(deadline_window.get()) if study_data is not None else None
+    if study_data is None or (not text.strip() and priorities is None and due is None):
+        task_matches = None
+    else:
+        task_matches = study_data.search(text, priorities, due)
+
+@instrument.timed('Search')
+def search_tasks(*args):
+    filter_tasks()
+    task_list.reset()
+
+@instrument.timed('Clear All Tasks')
 def clear_tasks():
-    global study_data
-    study_data = pd.DataFrame(columns=['Subject', 'Duration', 'Priority', 'Deadline'])
-    task_listbox.delete(0, tk.END)
+    if loading():
+        return
+    if task_db:
+        task_db.clear()
+    task_history.cleared("Clear All Tasks")
+    study_data.clear()
+    update_task_list()
+    follow_edit(lambda live: live.clear())
     messagebox.showinfo("Clear Successful", "All tasks cleared.")
 
+@instrument.timed('Delete Selected Task')
 def delete_task():
+    if loading():
+        return
     try:
-        selected_task = task_listbox.curselection()
+        selected_task = task_list.selection()
         if selected_task:
-            task_listbox.delete(selected_task)
-            study_data.drop(study_data.index[selected_task[0]], inplace=True)
+            # Resolve the selected rows to task ids before anything moves
+            task_ids = study_data.ids_at(selected_task, task_matches)
+            if task_db:
+                task_db.delete_many(task_ids)
+            study_data.delete_ids(task_ids)
+            task_history.deleted(task_ids, "Delete Selected Task")
+            filter_tasks()
+            for position in reversed(selected_task):
+                task_list.deleted(position)
+            update_statistics()
+            follow_edit(lambda live: live.remove_many(task_ids))
     except Exception as e:
         messagebox.showerror("Deletion Error", str(e))
 
+@instrument.timed('Undo')
+def undo():
+    if loading():
+        return
+    change = task_history.undo()
+    if change is None:
+        messagebox.showinfo("Undo", "Nothing to undo.")
+        return
+    apply_change(change)
+
+@instrument.timed('Redo')
+def redo():
+    if loading():
+        return
+    change = task_history.redo()
+    if change is None:
+        messagebox.showinfo("Redo", "Nothing to redo.")
+        return
+    apply_change(change)
+
+def apply_change(change):
+    # Bring the tasks, a live timetable and the database to the version the
+    # history stepped to
+    restore = change.restore
+    if change.clear:
+        if task_db:
+            task_db.clear()
+        study_data.clear()
+        follow_edit(lambda live: live.clear())
+    elif change.remove:
+        if task_db:
+            task_db.delete_many(change.remove)
+        study_data.delete_ids(change.remove)
+        follow_edit(lambda live: live.remove_many(change.remove))
+    if len(restore):
+        if task_db:
+            task_db.restore(restore)
+        study_data.restore(restore)
+        if live_timetable is not None and len(restore) > livetimetable.BLOCK_SIZE:
+            # Many tasks back at once: start the timetable over, as an import does
+            generate_timetable()
+        else:
+            follow_edit(lambda live: live.add_many(restore))
+    update_task_list()
+
+@instrument.timed('Generate Timetable')
 def generate_timetable():
-    task_display.delete(1.0, tk.END)
-    timetable = "Generated timetable (to be implemented)"
-    task_display.insert(tk.END, timetable)
+    if loading():
+        return
+    if study_data.empty:
+        task_view.show(lambda: 0, lambda start, stop: [])
+        messagebox.showwarning("Warning", "No tasks available to generate a timetable.")
+        return
+
+    # A newer request replaces one still running
+    worker_pool.cancel('generate')
+    frame, mode, policy = study_data.frame(), schedule_mode.get(), break_policy.get()
+    worker_pool.submit('generate', lambda job: build_timetable(frame, mode, policy, job),
+                       on_done=show_timetable, label="Generating timetable")
+
+@instrument.timed('Generate Timetable/build')
+def build_timetable(frame, mode, policy, job):
+    # Runs on a worker thread. Returns (slots, live, skipped, late warning);
+    # modes livetimetable supports give a LiveTimetable instead of slots.
+    if mode in livetimetable.LIVE_MODES:
+        live = livetimetable.LiveTimetable.from_tasks(frame, mode, policy=policy)
+        return None, live, live.skipped_frame(), deadlines.late_warning(live.late_frame())
+    slots, skipped = deadlines.build(frame, mode, policy=policy, stop=lambda: job.cancelled)
+    return slots, None, skipped, deadlines.late_warning(slots)
+
+@instrument.timed('Generate Timetable/show')
+def show_timetable(result):
+    global live_timetable, timetable_slots
+    slots, live_timetable, skipped, late = result
+    timetable_slots = slots
+    if not skipped.empty:
+        messagebox.showwarning("Warning", timetable.skipped_warning(skipped))
+    if late:
+        messagebox.showwarning("Warning", late)
+    if live_timetable is not None:
+        task_view.show(live_count, live_rows)
+        return
+    task_view.show(lambda: len(slots) + 1,
+                   lambda start, stop: timetable_display_rows(slots, start, stop))
+
+def follow_edit(update):
+    # Apply an edit to the live timetable and redraw it. A Generate still
+    # running started from the old tasks, so it is restarted.
+    if live_timetable is not None:
+        update(live_timetable)
+        task_view.refresh()
+    if worker_pool.running('generate'):
+        generate_timetable()
+
+def change_breaks(event=None):
+    # A live timetable takes the new break policy in place
+    follow_edit(lambda live: live.set_policy(break_policy.get()))
 
+@instrument.timed('Export Timetable')
+def export_timetable():
+    if live_timetable is None and timetable_slots is None:
+        messagebox.showwarning("Warning", "Generate a timetable before exporting it.")
+        return
+    path = filedialog.asksaveasfilename(title="Export timetable", defaultextension=".ics",
+                                        filetypes=[("iCalendar", "*.ics"), ("CSV files", "*.csv")])
+    if not path:
+        return
+    # The live timetable keeps following edits while the file is written
+    source = live_timetable.copy() if live_timetable is not None else timetable_slots
+    worker_pool.submit('export', lambda job: export.write(source, path, job=job),
+                       on_done=lambda count: messagebox.showinfo("Info", f"Exported {count} slots to {path}."),
+                       label="Exporting timetable")
+
+def live_count():
+    return len(live_timetable) + 1
+
+@instrument.timed('render/timetable')
+def live_rows(start, stop):
+    return live_timetable.rows(start, stop)
+
+@instrument.timed('Send')
 def chat_response():
     user_input = chat_input.get()
-    chat_display.insert(tk.END, f"\nYou: {user_input}")
-    response = "AI Response Placeholder (to be implemented)"
-    chat_display.insert(tk.END, f"\nAssistant: {response}")
+    response = intents.respond(user_input)
+    chat_log.add(f"\nYou: {user_input}\nAssistant: {response}")
     chat_input.delete(0, tk.END)
 
 def clear_entries():
@@ -124,6 +486,10 @@ def clear_entries():
     priority_entry.delete(0, tk.END)
     deadline_entry.delete(0, tk.END)
 
+@instrument.timed('render/timetable')
+def timetable_display_rows(slots, start, stop):
+    return timetable.timetable_rows(slots, start, stop)
+
 # Tkinter GUI Setup
 root = tk.Tk()
 root.title("Smart Study Planner")
@@ -133,6 +499,14 @@ root.configure(bg=COLORS['background'])
 # Apply custom styles
 setup_styles()
 
+# Save/Load/Generate run in the background; the status bar shows progress
+worker_pool = workers.WorkerPool(root)
+task_saver = workers.LatestWriter(worker_pool, write_tasks)
+# Handler timings and the F12 overlay, when STUDY_INSTRUMENT is set
+instrument.install(root)
+status_bar = workers.StatusBar(root, worker_pool)
+status_bar.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+
 # Input Frame
 input_frame = ttk.LabelFrame(root, text="Add New Task", style='Custom.TLabelframe')
 input_frame.pack(fill="x", padx=10, pady=5)
@@ -161,33 +535,87 @@ button_frame.pack(fill="x", padx=10, pady=5)
 ttk.Button(button_frame, text="Add Task", command=add_task, style='Primary.TButton').pack(side="left", padx=5)
 ttk.Button(button_frame, text="Save Tasks", command=save_tasks, style='Primary.TButton').pack(side="left", padx=5)
 ttk.Button(button_frame, text="Load Tasks", command=load_tasks, style='Primary.TButton').pack(side="left", padx=5)
+ttk.Button(button_frame, text="Import Tasks", command=import_tasks, style='Primary.TButton').pack(side="left", padx=5)
 ttk.Button(button_frame, text="Clear All Tasks", command=clear_tasks, style='Primary.TButton').pack(side="left", padx=5)
 ttk.Button(button_frame, text="Generate Timetable", command=generate_timetable, style='Primary.TButton').pack(side="left", padx=5)
+ttk.Button(button_frame, text="Export Timetable", command=export_timetable, style='Primary.TButton').pack(side="left", padx=5)
+ttk.Button(button_frame, text="Undo", command=undo, style='Primary.TButton').pack(side="left", padx=5)
+ttk.Button(button_frame, text="Redo", command=redo, style='Primary.TButton').pack(side="left", padx=5)
+schedule_mode = tk.StringVar(value=modes.SCHEDULE_MODES[0])
+ttk.Combobox(button_frame, textvariable=schedule_mode, values=modes.SCHEDULE_MODES,
+             state="readonly", width=16).pack(side="left", padx=5)
+# No breaks by default
+break_policy = tk.StringVar(value='No breaks')
+break_choice = ttk.Combobox(button_frame, textvariable=break_policy, values=modes.BREAK_POLICIES,
+                            state="readonly", width=16)
+break_choice.pack(side="left", padx=5)
+break_choice.bind('<<ComboboxSelected>>', change_breaks)
 
 # Task List Frame
 task_list_frame = ttk.LabelFrame(root, text="Task List", style='Custom.TLabelframe')
 task_list_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
+# Search bar: subject words as typed, a priority range and a deadline window
+search_frame = ttk.Frame(task_list_frame, style='Custom.TLabelframe')
+search_frame.pack(fill="x", pady=(0, 5))
+ttk.Label(search_frame, text="Search:", style='Custom.TLabel').pack(side="left", padx=5)
+search_text = tk.StringVar()
+ttk.Entry(search_frame, textvariable=search_text, style='Custom.TEntry').pack(side="left", fill="x", expand=True, padx=5)
+search_text.trace_add('write', search_tasks)
+ttk.Label(search_frame, text="Priority", style='Custom.TLabel').pack(side="left", padx=5)
+priority_low = tk.StringVar(value='1')
+priority_low_choice = ttk.Combobox(search_frame, textvariable=priority_low, values=['1', '2', '3', '4', '5'],
+                                   state="readonly", width=3)
+priority_low_choice.pack(side="left", padx=5)
+priority_low_choice.bind('<<ComboboxSelected>>', search_tasks)
+ttk.Label(search_frame, text="to", style='Custom.TLabel').pack(side="left")
+priority_high = tk.StringVar(value='5')
+priority_high_choice = ttk.Combobox(search_frame, textvariable=priority_high, values=['1', '2', '3', '4', '5'],
+                                    state="readonly", width=3)
+priority_high_choice.pack(side="left", padx=5)
+priority_high_choice.bind('<<ComboboxSelected>>', search_tasks)
+deadline_window = tk.StringVar(value=modes.DEADLINE_WINDOWS[0])
+deadline_choice = ttk.Combobox(search_frame, textvariable=deadline_window, values=modes.DEADLINE_WINDOWS,
+                               state="readonly", width=18)
+deadline_choice.pack(side="left", padx=5)
+deadline_choice.bind('<<ComboboxSelected>>', search_tasks)
+
+task_list_body = ttk.Frame(task_list_frame, style='Custom.TLabelframe')
+task_list_body.pack(fill="both", expand=True)
+task_list_scrollbar = ttk.Scrollbar(task_list_body, orient="vertical")
+task_list_scrollbar.pack(side="right", fill="y")
+
 # Custom style for Listbox
-task_listbox = tk.Listbox(task_list_frame, height=6,
+task_listbox = tk.Listbox(task_list_body, height=6, selectmode=tk.EXTENDED,
                          bg=COLORS['white'],
                          fg=COLORS['text'],
                          selectbackground=COLORS['secondary'],
                          selectforeground=COLORS['white'],
                          font=('Helvetica', 10))
 task_listbox.pack(fill="both", expand=True)
+task_list = VirtualListbox(task_listbox, task_list_scrollbar, count=task_count, render=task_list_rows)
 ttk.Button(task_list_frame, text="Delete Selected Task", command=delete_task, style='Primary.TButton').pack(pady=5)
 
+# Statistics Frame
+statistics_frame = ttk.LabelFrame(root, text="Statistics", style='Custom.TLabelframe')
+statistics_frame.pack(fill="x", padx=10, pady=5)
+statistics_text = tk.StringVar()
+ttk.Label(statistics_frame, textvariable=statistics_text, justify="left", style='Custom.TLabel').pack(anchor="w")
+
 # Display Frame
 display_frame = ttk.LabelFrame(root, text="Timetable Display", style='Custom.TLabelframe')
 display_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
+task_display_scrollbar = ttk.Scrollbar(display_frame, orient="vertical")
+task_display_scrollbar.pack(side="right", fill="y")
+
 # Custom style for Text widget
 task_display = tk.Text(display_frame, height=10,
                       bg=COLORS['white'],
                       fg=COLORS['text'],
                       font=('Helvetica', 10))
 task_display.pack(fill="both", expand=True)
+task_view = VirtualText(task_display, task_display_scrollbar)
 
 # Chat Frame
 chat_frame = ttk.LabelFrame(root, text="AI Study Assistant", style='Custom.TLabelframe')
@@ -219,6 +647,17 @@ You can ask me about:
 
 How can I help you today?
 """
-chat_display.insert(tk.END, welcome_message)
+chat_log = ChatLog(chat_display, chat_display.vbar, CHAT_LOG, intro=welcome_message)
+
+# Undo/Redo from anywhere in the window
+root.bind('<Control-z>', lambda event: undo())
+root.bind('<Control-y>', lambda event: redo())
+root.bind('<Control-Z>', lambda event: redo())
+
+# Window first, tasks second. The load can't be cancelled: every handler needs
+# the task store it sets up.
+startup.watch(root)
+worker_pool.submit('load', open_tasks, on_done=tasks_opened, on_error=open_failed, label="Loading tasks",
+                   cancellable=False)
 
 root.mainloop()
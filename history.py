@@ -0,0 +1,317 @@
+import os
+from collections import deque
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from timetable import TASK_COLUMNS
+
+# Undo/redo for task edits (add, delete, clear, import).
+#
+# Each version of the task list is a TaskTree: a persistent map from task Id
+# to its (Subject, Duration, Priority, Deadline) row, stored as a 32-way trie
+# over the bits of the Id. Trees are never changed in place. An edit copies
+# only the nodes on the paths to the ids it touches and shares every other
+# node with the version before, so a history step costs O(log n) nodes per
+# task changed rather than a copy of the table, and Clear All only keeps the
+# old root. Steps are dropped oldest first once their estimated size passes
+# the cap (STUDY_UNDO_MB, default 256); the newest step is always kept so
+# the last edit, even a Clear All, can be undone.
+
+BITS = 5
+BRANCH = 1 << BITS
+MASK = BRANCH - 1
+MEMORY_LIMIT = int(os.environ.get('STUDY_UNDO_MB', 256)) * 2 ** 20
+# Rough sizes for the history cap: a trie node (a 32-slot tuple), and a row
+# tuple with its strings once only the history holds it
+NODE_BYTES = 56 + 8 * BRANCH
+ROW_BYTES = 260
+
+
+def _groups(ids, shift):
+    # (child index, start, stop) runs of sorted ids under one node
+    children = (ids >> shift) & MASK
+    cuts = np.flatnonzero(children[1:] != children[:-1]) + 1
+    bounds = [0] + cuts.tolist() + [len(ids)]
+    return zip(children[bounds[:-1]].tolist(), bounds[:-1], bounds[1:])
+
+
+def _assoc(node, ids, rows, shift):
+    # node with rows set at ids (sorted, unique); returns (node, copied
+    # nodes, ids that were not there before)
+    slots = list(node) if node is not None else [None] * BRANCH
+    if shift == 0:
+        fresh = 0
+        for index, row in zip((ids & MASK).tolist(), rows):
+            fresh += slots[index] is None
+            slots[index] = row
+        return tuple(slots), 1, fresh
+    copied = 1
+    fresh = 0
+    for index, first, last in _groups(ids, shift):
+        slots[index], count, new = _assoc(slots[index], ids[first:last], rows[first:last], shift - BITS)
+        copied += count
+        fresh += new
+    return tuple(slots), copied, fresh
+
+
+def _dissoc(node, ids, shift):
+    # node without ids; returns (node or None when emptied, copied nodes,
+    # removed (id, row) pairs in id order)
+    if node is None:
+        return None, 0, []
+    slots = list(node)
+    removed = []
+    if shift == 0:
+        for task_id, index in zip(ids.tolist(), (ids & MASK).tolist()):
+            if slots[index] is not None:
+                removed.append((task_id, slots[index]))
+                slots[index] = None
+        copied = 1
+    else:
+        copied = 1
+        for index, first, last in _groups(ids, shift):
+            slots[index], count, gone = _dissoc(slots[index], ids[first:last], shift - BITS)
+            copied += count
+            removed.extend(gone)
+    if not removed:
+        return node, 0, []
+    if all(slot is None for slot in slots):
+        return None, copied, removed
+    return tuple(slots), copied, removed
+
+
+def _select(node, ids, shift, found, rows):
+    # Ids present under node and their rows, in id order
+    if node is None:
+        return
+    if shift == 0:
+        for task_id, index in zip(ids.tolist(), (ids & MASK).tolist()):
+            if node[index] is not None:
+                found.append(task_id)
+                rows.append(node[index])
+        return
+    for index, first, last in _groups(ids, shift):
+        _select(node[index], ids[first:last], shift - BITS, found, rows)
+
+
+def _objects(items, count):
+    # 1-D object array of tuples (np.array would make them a 2-D table)
+    return np.fromiter(items, dtype=object, count=count)
+
+
+def _walk(node, shift, base, ids, rows):
+    for index, child in enumerate(node):
+        if child is None:
+            continue
+        if shift == 0:
+            ids.append(base | index)
+            rows.append(child)
+        else:
+            _walk(child, shift - BITS, base | (index << shift), ids, rows)
+
+
+class TaskTree:
+    __slots__ = ('root', 'shift', 'count')
+
+    def __init__(self, root=None, shift=0, count=0):
+        self.root = root
+        self.shift = shift  # bit offset of the root's children
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def build(cls, ids, rows):
+        # Fresh tree in one bottom-up pass, a level of nodes at a time
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return cls()
+        order = np.argsort(ids, kind='stable')
+        ids = ids[order]
+        nodes = _objects(rows, len(ids))[order]
+        last = np.append(ids[1:] != ids[:-1], True)  # the last row given for an id wins
+        ids, nodes = ids[last], nodes[last]
+        count = len(ids)
+        shift = 0
+        while True:
+            parents = ids >> BITS
+            first = np.append(True, parents[1:] != parents[:-1])
+            slots = np.full((int(first.sum()), BRANCH), None, dtype=object)
+            slots[np.cumsum(first) - 1, ids & MASK] = nodes
+            ids, nodes = parents[first], _objects(map(tuple, slots.tolist()), len(slots))
+            if ids[-1] == 0:
+                return cls(nodes[0], shift, count)
+            shift += BITS
+
+    @classmethod
+    def from_frame(cls, frame):
+        # Tree of a TaskStore.frame(); a large one takes a while, so the
+        # planners build it on the worker thread that loads the tasks
+        return cls.build(frame['Id'].to_numpy(dtype=np.int64), task_rows(frame))
+
+    def _grown(self, top):
+        # Tree with a root tall enough for ids up to top
+        root, shift = self.root, self.shift
+        while top >> (shift + BITS):
+            if root is not None:
+                root = (root,) + (None,) * (BRANCH - 1)
+            shift += BITS
+        return root, shift
+
+    def assoc(self, ids, rows):
+        # New tree with rows at ids; returns (tree, copied nodes)
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return self, 0
+        order = np.argsort(ids, kind='stable')
+        ids = ids[order]
+        rows = [rows[i] for i in order.tolist()]
+        root, shift = self._grown(int(ids[-1]))
+        root, copied, fresh = _assoc(root, ids, rows, shift)
+        return TaskTree(root, shift, self.count + fresh), copied
+
+    def dissoc(self, ids):
+        # New tree without ids; returns (tree, copied nodes, ids removed)
+        ids = self._within(ids)
+        root, copied, removed = _dissoc(self.root, ids, self.shift) if len(ids) else (self.root, 0, [])
+        if not removed:
+            return self, 0, np.empty(0, dtype=np.int64)
+        tree = TaskTree(root, self.shift if root is not None else 0, self.count - len(removed))
+        return tree, copied, np.array([task_id for task_id, _ in removed], dtype=np.int64)
+
+    def _within(self, ids):
+        # Sorted distinct ids the trie can hold
+        ids = np.sort(np.asarray(ids, dtype=np.int64))
+        ids = ids[np.append(True, ids[1:] != ids[:-1])] if len(ids) else ids
+        return ids[(ids >= 0) & (ids < (1 << (self.shift + BITS)))]
+
+    def select(self, ids):
+        # Frame of the rows at ids that are present, in id order
+        ids = self._within(ids)
+        found, rows = [], []
+        if len(ids):
+            _select(self.root, ids, self.shift, found, rows)
+        return _frame(found, rows)
+
+    def frame(self):
+        # Every row, in id order
+        ids, rows = [], []
+        if self.root is not None:
+            _walk(self.root, self.shift, 0, ids, rows)
+        return _frame(ids, rows)
+
+
+def _frame(ids, rows):
+    # Task frame with Id from rows; object columns, like TaskStore.frame()
+    frame = {name: pd.Series(np.fromiter(map(itemgetter(column), rows), dtype=object, count=len(rows)),
+                             dtype=object, copy=False)
+             for column, name in enumerate(TASK_COLUMNS)}
+    frame['Id'] = pd.Series(np.asarray(ids, dtype=np.int64), copy=False)
+    return pd.DataFrame(frame)
+
+
+def task_rows(frame):
+    # (Subject, Duration, Priority, Deadline) tuples, the rows a tree holds
+    return list(zip(*(frame[name].to_numpy(dtype=object).tolist() for name in TASK_COLUMNS)))
+
+
+class Step:
+    # One undoable edit: the tree before and after, and the ids it added and
+    # removed (removed is None for Clear All, which removed everything)
+    __slots__ = ('label', 'before', 'after', 'added', 'removed', 'size')
+
+    def __init__(self, label, before, after, added, removed, size):
+        self.label, self.before, self.after = label, before, after
+        self.added, self.removed, self.size = added, removed, size
+
+
+class Change:
+    # What undo or redo does to the task list: clear it, or delete the tasks
+    # in remove, then put back the rows in restore (a frame with Id)
+    __slots__ = ('label', 'clear', 'remove', 'restore')
+
+    def __init__(self, label, clear=False, remove=(), restore=None):
+        self.label, self.clear, self.remove = label, clear, remove
+        self.restore = restore if restore is not None else _frame([], [])
+
+
+class History:
+    def __init__(self, tree=None, limit=MEMORY_LIMIT):
+        self.limit = limit
+        self.tree = tree if tree is not None else TaskTree()
+        self.undos = deque()
+        self.redos = []
+        self.size = 0  # estimated bytes held only by the steps
+
+    def reset(self, tree=None):
+        # Start over from freshly loaded tasks (TaskTree.from_frame)
+        self.undos.clear()
+        self.redos.clear()
+        self.size = 0
+        self.tree = tree if tree is not None else TaskTree()
+
+    def _record(self, label, after, added, removed, copied, rows):
+        size = copied * NODE_BYTES + rows * ROW_BYTES
+        self.undos.append(Step(label, self.tree, after, added, removed, size))
+        self.tree = after
+        for step in self.redos:
+            self.size -= step.size
+        self.redos.clear()
+        self.size += size
+        self._trim()
+
+    def _trim(self):
+        while self.size > self.limit and len(self.undos) > 1:
+            self.size -= self.undos.popleft().size
+
+    def added(self, task_ids, rows, label):
+        # Tasks added under their ids (Add Task, Import Tasks)
+        ids = np.asarray(task_ids, dtype=np.int64)
+        after, copied = self.tree.assoc(ids, rows)
+        self._record(label, after, ids, np.empty(0, dtype=np.int64), copied, len(ids))
+
+    def deleted(self, task_ids, label):
+        after, copied, removed = self.tree.dissoc(task_ids)
+        if len(removed):
+            self._record(label, after, np.empty(0, dtype=np.int64), removed, copied, len(removed))
+
+    def cleared(self, label):
+        if len(self.tree):
+            nodes = len(self.tree) // BRANCH + 1
+            self._record(label, TaskTree(), np.empty(0, dtype=np.int64), None, nodes, len(self.tree))
+
+    @property
+    def can_undo(self):
+        return bool(self.undos)
+
+    @property
+    def can_redo(self):
+        return bool(self.redos)
+
+    def undo(self):
+        # Change that takes the task list back one step, or None
+        if not self.undos:
+            return None
+        step = self.undos.pop()
+        self.redos.append(step)
+        self.tree = step.before
+        if step.removed is None:
+            restore = step.before.frame()
+        else:
+            restore = step.before.select(step.removed)
+        return Change(step.label, remove=step.added.tolist(), restore=restore)
+
+    def redo(self):
+        # Change that repeats the last undone step, or None
+        if not self.redos:
+            return None
+        step = self.redos.pop()
+        self.undos.append(step)
+        self.tree = step.after
+        restore = step.after.select(step.added)
+        if step.removed is None:
+            return Change(step.label, clear=True, restore=restore)
+        return Change(step.label, remove=step.removed.tolist(), restore=restore)
@@ -0,0 +1,185 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+# Opt-in timing for the planner handlers.
+#
+# With STUDY_INSTRUMENT=1 every @timed handler and every span() records wall
+# time, CPU time of the calling thread and the net change in allocated
+# blocks; STUDY_INSTRUMENT=memory also traces allocated bytes (slower). The
+# metrics are written to STUDY_METRICS (default planner_metrics) as .json
+# and Prometheus .prom text on exit, and F12 toggles an overlay in the
+# window with the latest timings. Without STUDY_INSTRUMENT, timed() returns
+# the function unchanged and span() is a no-op.
+
+MODE = os.environ.get('STUDY_INSTRUMENT', '')
+ENABLED = MODE not in ('', '0')
+TRACE_MEMORY = MODE == 'memory'
+METRICS_PATH = os.environ.get('STUDY_METRICS', 'planner_metrics')
+OVERLAY_KEY = '<F12>'
+OVERLAY_REFRESH_MS = 500
+
+_stats = {}
+_lock = threading.Lock()
+
+
+class Stat:
+    __slots__ = ('calls', 'wall', 'cpu', 'blocks', 'bytes', 'max_wall',
+                 'last_wall', 'last_cpu', 'last_blocks', 'last_bytes')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def add(self, wall, cpu, blocks, size):
+        self.calls += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.blocks += blocks
+        self.bytes += size
+        self.max_wall = max(self.max_wall, wall)
+        self.last_wall, self.last_cpu, self.last_blocks, self.last_bytes = wall, cpu, blocks, size
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Span:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.size = tracemalloc.get_traced_memory()[0] if TRACE_MEMORY else 0
+        self.blocks = sys.getallocatedblocks()
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        blocks = sys.getallocatedblocks() - self.blocks
+        size = tracemalloc.get_traced_memory()[0] - self.size if TRACE_MEMORY else 0
+        with _lock:
+            stat = _stats.get(self.name)
+            if stat is None:
+                stat = _stats[self.name] = Stat()
+            stat.add(wall, cpu, blocks, size)
+        return False
+
+
+def span(name):
+    # with span('Save Tasks/write'): ... -- times a sub-step
+    return _Span(name) if ENABLED else nullcontext()
+
+
+def timed(name):
+    # Decorator for a handler or sub-step
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    with _lock:
+        return {name: stat.as_dict() for name, stat in _stats.items()}
+
+
+def export_json(path):
+    with open(path, 'w') as f:
+        json.dump({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'metrics': snapshot()}, f, indent=2)
+
+
+def prometheus_text():
+    metrics = snapshot()
+    families = [
+        ('planner_handler_calls_total', 'counter', 'Calls', 'calls'),
+        ('planner_handler_seconds_total', 'counter', 'Wall time in seconds', 'wall'),
+        ('planner_handler_cpu_seconds_total', 'counter', 'CPU time of the calling thread in seconds', 'cpu'),
+        ('planner_handler_allocated_blocks_total', 'counter', 'Net change in allocated blocks', 'blocks'),
+        ('planner_handler_last_seconds', 'gauge', 'Wall time of the latest call in seconds', 'last_wall'),
+        ('planner_handler_max_seconds', 'gauge', 'Slowest call in seconds', 'max_wall'),
+    ]
+    if TRACE_MEMORY:
+        families.append(('planner_handler_allocated_bytes_total', 'counter',
+                         'Net change in traced bytes', 'bytes'))
+    lines = []
+    for metric, kind, help_text, field in families:
+        lines.append(f"# HELP {metric} {help_text}.")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, values in sorted(metrics.items()):
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{metric}{{handler="{label}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def export_prometheus(path):
+    with open(path, 'w') as f:
+        f.write(prometheus_text())
+
+
+def export(base=METRICS_PATH):
+    export_json(base + '.json')
+    export_prometheus(base + '.prom')
+
+
+def overlay_text(limit=14):
+    metrics = snapshot()
+    rows = sorted(metrics.items(), key=lambda item: -item[1]['last_wall'])[:limit]
+    lines = [f"{'handler':<26}{'last ms':>9}{'cpu ms':>9}{'blocks':>9}{'calls':>7}"]
+    for name, values in rows:
+        lines.append(f"{name[:25]:<26}{values['last_wall'] * 1e3:>9.1f}{values['last_cpu'] * 1e3:>9.1f}"
+                     f"{values['last_blocks']:>9}{values['calls']:>7}")
+    return "\n".join(lines)
+
+
+class Overlay:
+    # Latest timings drawn over the top-right corner of the window
+    def __init__(self, root):
+        import tkinter as tk
+
+        self.root = root
+        self.visible = False
+        self.pending = None  # after() id of the next refresh
+        self.label = tk.Label(root, justify='left', anchor='nw', font='TkFixedFont',
+                              bg='#FFFFE0', relief='solid', borderwidth=1)
+        root.bind_all(OVERLAY_KEY, self.toggle)
+
+    def toggle(self, event=None):
+        self.visible = not self.visible
+        if self.visible:
+            self.label.place(relx=1.0, x=-10, y=10, anchor='ne')
+            self.label.lift()
+            self.refresh()
+        else:
+            self.label.place_forget()
+            if self.pending:
+                self.root.after_cancel(self.pending)
+                self.pending = None
+
+    def refresh(self):
+        self.label.configure(text=overlay_text())
+        self.pending = self.root.after(OVERLAY_REFRESH_MS, self.refresh)
+
+
+def install(root):
+    # Called by the planners once the root window exists
+    if not ENABLED:
+        return None
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    atexit.register(export)
+    return Overlay(root)
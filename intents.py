@@ -0,0 +1,148 @@
+import re
+from collections import deque
+
+import pandas as pd
+
+# Intent matching for the AI Study Assistant chat.
+#
+# Every keyword of every intent is compiled into one Aho-Corasick automaton,
+# so a message is scanned once no matter how many intents there are. Keywords
+# match whole words: the text is lowercased, punctuation becomes spaces, and
+# both text and keywords are padded with spaces. An intent scores the summed
+# weight of the distinct keywords found (by default a keyword weighs its word
+# count, so "study tips" beats a lone "study"); the best score wins and ties
+# go to the intent listed first.
+
+# name -> (keywords, response)
+INTENTS = {
+    'suggest task': (
+        ['suggest task', 'suggest tasks', 'task suggestion', 'task suggestions', 'suggest',
+         'suggestion', 'suggestions', 'recommend', 'what should i study', 'what to study',
+         'what next', 'next task'],
+        "Try reviewing notes, working on high-priority tasks, or preparing summaries."),
+    'organize schedule': (
+        ['organize schedule', 'organise schedule', 'schedule organization', 'organize', 'organise',
+         'schedule', 'timetable', 'plan', 'planning', 'plan my day', 'plan my week'],
+        "Start with high-priority tasks, allocate breaks, and adjust as needed."),
+    'study tips': (
+        ['study tips', 'study tip', 'tips', 'tip', 'advice', 'how to study', 'how do i study',
+         'technique', 'techniques', 'pomodoro'],
+        "Use the Pomodoro method: 25 mins study, 5 mins rest. Adjust to your needs."),
+    'break': (
+        ['break', 'breaks', 'rest', 'pause', 'tired', 'exhausted', 'burnout', 'burned out'],
+        "Take regular breaks: 15 minutes after each hour of study helps maintain focus."),
+    'motivation': (
+        ['motivation', 'motivate', 'motivated', 'unmotivated', 'give up', 'procrastinate',
+         'procrastinating', 'procrastination', 'lazy'],
+        "Remember your goals! Each study session brings you closer to success."),
+    'focus': (
+        ['focus', 'focused', 'concentrate', 'concentration', 'distracted', 'distraction',
+         'distractions', 'cant focus'],
+        "Try the 5-4-3-2-1 grounding technique or meditation before studying."),
+    'help': (
+        ['help', 'what can you do', 'commands', 'options'],
+        "You can ask about: 'suggest task', 'organize schedule', 'study tips', 'break', 'motivation', or 'focus'."),
+}
+
+FALLBACK = ("To get suggestions, try asking about 'task suggestions', 'schedule organization', "
+            "'study tips', 'breaks', 'motivation', or 'focus'.")
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    # "Any study-tips?" -> " any study tips "
+    words = _NON_WORD.sub(' ', str(text).lower().replace("'", "")).strip()
+    return f" {words} "
+
+
+class IntentMatcher:
+    def __init__(self, intents=INTENTS, weights=None):
+        # intents: name -> (keywords, response); weights: keyword -> weight
+        weights = weights or {}
+        self.names = list(intents)
+        self.responses = {name: response for name, (_, response) in intents.items()}
+        self.keywords = []  # (intent index, weight) per keyword id
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # keyword ids ending at each state
+        for index, name in enumerate(self.names):
+            for keyword in intents[name][0]:
+                pattern = normalize(keyword)
+                weight = weights.get(keyword, len(pattern.split()))
+                self._add(pattern, len(self.keywords))
+                self.keywords.append((index, weight))
+        self._link()
+
+    def _add(self, pattern, keyword_id):
+        state = 0
+        for char in pattern:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append(keyword_id)
+
+    def _link(self):
+        # Breadth-first failure links; each state also inherits the outputs
+        # of its failure state so a scan never has to follow the chain
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                back = self.fail[state]
+                while back and char not in self.goto[back]:
+                    back = self.fail[back]
+                self.fail[nxt] = self.goto[back].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find(self, text):
+        # Ids of every keyword in text, one pass over the normalized string
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def scores(self, text):
+        # intent name -> score, for the intents that matched at all
+        totals = {}
+        for keyword_id in self.find(text):
+            index, weight = self.keywords[keyword_id]
+            totals[index] = totals.get(index, 0) + weight
+        return {self.names[index]: score for index, score in sorted(totals.items())}
+
+    def classify(self, text):
+        # Best intent name, or None when nothing matched
+        best, best_score = None, 0
+        for name, score in self.scores(text).items():
+            if score > best_score:
+                best, best_score = name, score
+        return best
+
+    def classify_many(self, messages):
+        # Batch classify: repeated messages are matched once
+        codes, uniques = pd.factorize(pd.Series(messages, dtype=object).map(normalize))
+        labels = [self.classify(message) for message in uniques]
+        return [labels[code] for code in codes]
+
+    def respond(self, text, fallback=FALLBACK):
+        intent = self.classify(text)
+        return self.responses[intent] if intent else fallback
+
+
+default_matcher = IntentMatcher()
+
+
+def respond(text, fallback=FALLBACK):
+    return default_matcher.respond(text, fallback)
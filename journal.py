@@ -0,0 +1,226 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import threading
+
+import pandas as pd
+
+from timetable import TASK_COLUMNS
+
+# Append-only persistence for the task list.
+#
+# SAVE_FILE stays a plain CSV snapshot; every add/delete/clear is appended as
+# one JSON line to SAVE_FILE.journal.<n>. Compaction starts a new journal,
+# writes a fresh snapshot on a background thread and then drops the old
+# journals. Before the snapshot is swapped in, each old journal gets a
+# "compacted" marker carrying the new snapshot's hash, so startup can tell
+# whether a leftover journal is already folded into the snapshot. A
+# compaction asked for while one is being written takes its snapshot and
+# starts its journal right away, and is written as soon as the first one is
+# done; a later request replaces it with a newer snapshot.
+
+
+def write_snapshot_bytes(data, path):
+    # Write to a temp file and rename over the target, so a crash mid-write
+    # leaves the previous file intact instead of a truncated one
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_snapshot(frame, path):
+    data = frame.to_csv(index=False).encode('utf-8')
+    write_snapshot_bytes(data, path)
+    return hashlib.sha1(data).hexdigest()
+
+
+def read_records(path):
+    records = []
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Torn line from a crash mid-append
+                continue
+    return records
+
+
+class TaskJournal:
+    def __init__(self, path, state, columns=TASK_COLUMNS, compact_every=1000):
+        self.path = path
+        self.state = state  # callable returning the current task DataFrame
+        self.columns = list(columns)
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.active = None
+        self.active_number = 0
+        self.ops = 0
+        self.compactor = None
+        self.compacting = None  # journals the compactor is folding in, while it runs
+        self.queued = None  # (frame, journals) to compact next
+
+    def _journals(self):
+        found = []
+        for name in glob.glob(glob.escape(self.path) + '.journal.*'):
+            suffix = name.rsplit('.', 1)[1]
+            if suffix.isdigit():
+                found.append((int(suffix), name))
+        return [name for _, name in sorted(found)]
+
+    def _open(self, number):
+        if self.active:
+            self.active.close()
+        self.active_number = number
+        self.active = open(f"{self.path}.journal.{number}", 'ab')
+        self.ops = 0
+
+    def load(self):
+        # Rebuild state from the snapshot plus every journal not yet in it
+        self.wait()
+        digest = None
+        rows = []
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha1(data).hexdigest()
+            if data.strip():
+                snapshot = pd.read_csv(io.BytesIO(data))
+                rows = snapshot.reindex(columns=self.columns).values.tolist()
+        # Deletes name the tasks by 'ids' when the tasks carry an Id column;
+        # older journals give the list 'index' instead
+        key = self.columns.index('Id') if 'Id' in self.columns else None
+        positions = None  # task id -> index into rows, built on the first delete by id
+
+        journals = self._journals()
+        replayed = False
+        for name in journals:
+            records = read_records(name)
+            if not records:
+                os.remove(name)
+                continue
+            if any(r.get('op') == 'compacted' and r.get('snapshot') == digest for r in records):
+                os.remove(name)
+                continue
+            for record in records:
+                op = record.get('op')
+                if op == 'add':
+                    for task in record['tasks'] if 'tasks' in record else [record['task']]:
+                        rows.append([task.get(c) for c in self.columns])
+                        if positions is not None:
+                            positions[rows[-1][key]] = len(rows) - 1
+                elif op == 'delete' and 'ids' in record and key is not None:
+                    if positions is None:
+                        positions = {row[key]: i for i, row in enumerate(rows)}
+                    for task_id in record['ids']:
+                        if task_id in positions:
+                            rows[positions.pop(task_id)] = None
+                elif op == 'delete':
+                    rows = [row for row in rows if row is not None]
+                    positions = None
+                    if 0 <= record['index'] < len(rows):
+                        rows.pop(record['index'])
+                elif op == 'clear':
+                    rows = []
+                    positions = None
+            replayed = True
+
+        numbers = [int(name.rsplit('.', 1)[1]) for name in journals]
+        self._open(max(numbers, default=0) + 1)
+        frame = pd.DataFrame([row for row in rows if row is not None], columns=self.columns)
+        if key is not None and frame['Id'].isna().any():
+            # Snapshot from before tasks had ids: number the rest after the
+            # highest id, and snapshot them so later deletes can name them
+            missing = frame['Id'].isna()
+            start = int(frame['Id'].max()) + 1 if not missing.all() else 1
+            frame.loc[missing, 'Id'] = range(start, start + int(missing.sum()))
+            frame['Id'] = frame['Id'].astype('int64')
+            replayed = True
+        if replayed:
+            # Fold the recovered journals into a new snapshot
+            self.compact(frame)
+        return frame
+
+    def _append(self, record):
+        line = (json.dumps(record, default=str) + '\n').encode('utf-8')
+        with self.lock:
+            self.active.write(line)
+            self.active.flush()
+            os.fsync(self.active.fileno())
+            self.ops += 1
+            due = self.ops >= self.compact_every
+        if due:
+            self.compact()
+
+    def record_add(self, task):
+        self._append({'op': 'add', 'task': task})
+
+    def record_add_many(self, tasks):
+        # One record for tasks put back together (Undo/Redo)
+        self._append({'op': 'add', 'tasks': tasks})
+
+    def record_delete(self, task_ids):
+        # One record for a whole selection
+        self._append({'op': 'delete', 'ids': [int(task_id) for task_id in task_ids]})
+
+    def record_clear(self):
+        self._append({'op': 'clear'})
+
+    def compact(self, frame=None):
+        with self.lock:
+            if frame is None:
+                frame = self.state()
+            frame = frame.copy()
+            old = [name for name in self._journals()
+                   if int(name.rsplit('.', 1)[1]) <= self.active_number and name not in (self.compacting or ())]
+            self._open(self.active_number + 1)
+            if self.compacting is not None:
+                self.queued = (frame, old)
+                return
+            self.compacting = old
+            # Non-daemon so a snapshot in progress finishes before exit
+            self.compactor = threading.Thread(target=self._run, args=(frame, old))
+            self.compactor.start()
+
+    def _run(self, frame, old):
+        # Compactor thread: this compaction, then any queued meanwhile
+        try:
+            while True:
+                self._compact(frame, old)
+                with self.lock:
+                    if self.queued is None:
+                        return
+                    (frame, old), self.queued = self.queued, None
+                    self.compacting = old
+        finally:
+            # After a failed write the queued snapshot is dropped: its
+            # journals stay, and the next compaction folds them in
+            with self.lock:
+                self.compacting = self.queued = None
+
+    def _compact(self, frame, old):
+        data = frame.to_csv(index=False).encode('utf-8')
+        marker = json.dumps({'op': 'compacted', 'snapshot': hashlib.sha1(data).hexdigest()})
+        for name in old:
+            with open(name, 'ab') as f:
+                f.write(b'\n' + marker.encode('utf-8') + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+        write_snapshot_bytes(data, self.path)
+        for name in old:
+            os.remove(name)
+
+    def wait(self):
+        if self.compactor:
+            self.compactor.join()
+
+    def close(self):
+        self.wait()
+        if self.active:
+            self.active.close()
+            self.active = None
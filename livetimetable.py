@@ -0,0 +1,377 @@
+import bisect
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import breakpolicy
+import deadlines
+import recurrence
+import timetable
+
+# Generated timetable that follows task edits.
+#
+# Tasks are kept in schedule order (Priority, or the deadline keys, then task
+# Id) in a list of sorted blocks of at most 2 * BLOCK_SIZE tasks. Each block
+# knows its study minutes and, for the break policy's study threshold, a
+# transition table: for every "minutes studied since the last break" coming
+# in, how many breaks the block adds and what it hands on to the next block.
+# Break lengths depend only on the running break count, so they are applied
+# when rows are rendered. A per-block prefix (where the block starts, in
+# minutes, breaks and display rows) is recomputed only from the first
+# changed block onward, so an add or delete touches one block plus the
+# prefixes after it, and the display renders just the rows on screen without
+# rebuilding the slot table.
+#
+# A recurring task is one entry per occurrence due within the horizon, keyed
+# after the one-off tasks it ties with (by due time, then Id, then occurrence
+# number), the order deadlines.build gives the expanded tasks.
+
+LIVE_MODES = ('Priority', 'Earliest deadline', 'Weighted slack')
+BLOCK_SIZE = 256
+
+
+def _priority_key(value):
+    # Single-value deadlines._priority_keys: missing or non-numeric go last
+    try:
+        key = float(value)
+    except (TypeError, ValueError):
+        return np.inf
+    return np.inf if np.isnan(key) else key
+
+
+def transitions(minutes, limit):
+    # For each incoming state s = 0..limit (study minutes since the last
+    # break, capped at limit): breaks taken before tasks of the block and the
+    # outgoing state, under breakpolicy.cycle_breaks' rule
+    count = len(minutes)
+    before = np.concatenate(([0], np.cumsum(minutes)))
+    # After a break before task k, the next one comes before task after[k]
+    after = np.searchsorted(before[:count], before[:count] + limit, side='left').tolist()
+    reset_breaks = [0] * count
+    reset_state = [0] * count
+    total = int(before[-1])
+    for k in range(count - 1, -1, -1):
+        j = after[k]
+        if j < count:
+            reset_breaks[k] = 1 + reset_breaks[j]
+            reset_state[k] = reset_state[j]
+        else:
+            reset_state[k] = min(limit, total - int(before[k]))
+    states = np.arange(limit + 1)
+    first = np.searchsorted(before[:count], limit - states, side='left')
+    none = first >= count
+    first = np.minimum(first, count - 1)
+    breaks = np.where(none, 0, 1 + np.array(reset_breaks)[first])
+    state = np.where(none, np.minimum(limit, states + total), np.array(reset_state)[first])
+    return breaks, state
+
+
+class Block:
+    __slots__ = ('keys', 'ids', 'minutes', 'subjects', 'priorities', 'dues', 'total', 'breaks', 'state')
+
+    def __init__(self, keys, ids, minutes, subjects, priorities, dues):
+        self.keys, self.ids, self.minutes = keys, ids, minutes
+        self.subjects, self.priorities, self.dues = subjects, priorities, dues
+
+    def update(self, limit):
+        self.total = sum(self.minutes)
+        if limit:
+            breaks, state = transitions(np.array(self.minutes, dtype=np.int64), limit)
+            self.breaks, self.state = breaks.tolist(), state.tolist()
+
+    def split(self):
+        half = len(self.keys) // 2
+        tail = Block(*(getattr(self, name)[half:] for name in Block.__slots__[:6]))
+        for name in Block.__slots__[:6]:
+            del getattr(self, name)[half:]
+        return tail
+
+
+class LiveTimetable:
+    def __init__(self, mode='Priority', start=None, policy=None, horizon_days=recurrence.HORIZON_DAYS):
+        if start is None:
+            start = datetime.now()
+        self.mode = mode
+        self.start = start
+        self.base = np.datetime64(start, 'm')
+        self.policy = breakpolicy.policy(policy) or breakpolicy.BreakPolicy()
+        self.horizon_days = horizon_days
+        self.end = start + timedelta(days=horizon_days)
+        self.blocks = []
+        self.firsts = []  # first key of each block, for bisect
+        self.keys = {}  # task id -> keys (one per occurrence), for deletes
+        self.skipped = {}  # task id -> Subject of tasks with a bad Duration
+        # Per block: (state, minutes, breaks, tasks, rows) before it; valid
+        # for blocks[:valid]
+        self.prefix = []
+        self.valid = 0
+
+    @classmethod
+    def from_tasks(cls, tasks, mode='Priority', start=None, **layout):
+        # Bulk build from a TaskStore.frame(), sorted once
+        live = cls(mode, start, **layout)
+        tasks = recurrence.expand_tasks(tasks, live.start, live.horizon_days)
+        minutes = timetable.task_minutes(tasks)
+        ids = tasks['Id'].to_numpy(dtype=np.int64)
+        bad = np.isnan(minutes)
+        live.skipped = dict(zip(ids[bad].tolist(), tasks['Subject'].to_numpy(dtype=object)[bad].tolist()))
+        tasks, minutes, ids = tasks[~bad], minutes[~bad].astype(np.int64), ids[~bad]
+        priority_keys = deadlines._priority_keys(tasks)
+        numbers = (tasks['Occurrence'].to_numpy(dtype=np.int64) if 'Occurrence' in tasks
+                   else np.zeros(len(tasks), dtype=np.int64))
+        ranks = np.zeros(len(tasks), dtype=np.int64)
+        repeated = numbers > 0
+        if repeated.any():
+            ranks[repeated] = pd.to_datetime(tasks['Deadline'].to_numpy()[repeated], format=recurrence.DUE_FORMAT) \
+                .values.astype('datetime64[m]').astype(np.int64)
+        if mode == 'Priority':
+            dues = np.full(len(tasks), np.datetime64('NaT'), dtype='datetime64[m]')
+            columns = [priority_keys, ranks]
+        else:
+            dues = deadlines.parse_deadlines(tasks['Deadline'], now=live.start)
+            columns = [deadlines.deadline_keys(dues, minutes, priority_keys, live.start, mode), priority_keys, ranks]
+        order = np.lexsort([numbers, ids] + columns[::-1])
+        keys = list(zip(*(column[order].tolist() for column in columns), ids[order].tolist(),
+                        numbers[order].tolist()))
+        for key in keys:
+            live.keys.setdefault(key[-2], []).append(key)
+        data = [ids[order].tolist(), minutes[order].tolist(),
+                tasks['Subject'].to_numpy(dtype=object)[order].tolist(),
+                tasks['Priority'].to_numpy(dtype=object)[order].tolist(), list(dues[order])]
+        for first in range(0, len(keys), BLOCK_SIZE):
+            chunk = slice(first, first + BLOCK_SIZE)
+            block = Block(keys[chunk], *(column[chunk] for column in data))
+            block.update(live.policy.study)
+            live.blocks.append(block)
+            live.firsts.append(block.keys[0])
+        return live
+
+    def _key(self, task_id, minutes, priority, due, rank=0, number=0):
+        # rank orders occurrences after one-off tasks (0): their due time in
+        # minutes since the epoch
+        if self.mode == 'Priority':
+            return (_priority_key(priority), rank, task_id, number)
+        priority_key = _priority_key(priority)
+        key = deadlines.deadline_keys(np.array([due], dtype='datetime64[m]'), np.array([float(minutes)]),
+                                      np.array([priority_key]), self.start, self.mode)[0]
+        return (float(key), priority_key, rank, task_id, number)
+
+    def _changed(self, index):
+        self.valid = min(self.valid, index)
+
+    def add(self, task_id, subject, duration, priority, deadline):
+        # (due, rank, number) per entry: one for a one-off task, one per
+        # occurrence in the horizon for a recurring one
+        rule = recurrence.parse_rule(deadline)
+        if rule is None:
+            due = np.datetime64('NaT', 'm')
+            if self.mode != 'Priority':
+                parsed = deadlines.parse_deadline(deadline, now=self.start)
+                if parsed:
+                    due = np.datetime64(parsed, 'm')
+            entries = [(due, 0, 0)]
+        else:
+            entries = []
+            for number, when in enumerate(rule.occurrences(self.start, self.end), 1):
+                due = np.datetime64(when, 'm')
+                entries.append((due if self.mode != 'Priority' else np.datetime64('NaT', 'm'),
+                                int(due.astype(np.int64)), number))
+        if not entries:
+            return
+        minutes = timetable.duration_minutes(duration)
+        if np.isnan(minutes):
+            self.skipped[task_id] = subject
+            return
+        minutes = int(minutes)
+        keys = self.keys[task_id] = []
+        for due, rank, number in entries:
+            key = self._key(task_id, minutes, priority, due, rank, number)
+            keys.append(key)
+            self._insert(key, task_id, minutes, subject, priority, due)
+
+    def _insert(self, key, task_id, minutes, subject, priority, due):
+        if not self.blocks:
+            self.blocks.append(Block([], [], [], [], [], []))
+            self.firsts.append(key)
+        index = max(0, bisect.bisect_right(self.firsts, key) - 1)
+        block = self.blocks[index]
+        at = bisect.bisect_left(block.keys, key)
+        for name, value in zip(Block.__slots__[:6], (key, task_id, minutes, subject, priority, due)):
+            getattr(block, name).insert(at, value)
+        self.firsts[index] = block.keys[0]
+        if len(block.keys) > 2 * BLOCK_SIZE:
+            tail = block.split()
+            tail.update(self.policy.study)
+            self.blocks.insert(index + 1, tail)
+            self.firsts.insert(index + 1, tail.keys[0])
+        block.update(self.policy.study)
+        self._changed(index)
+
+    def add_many(self, tasks):
+        # add() for each row of a task frame with Id (Undo putting tasks back)
+        for task_id, subject, duration, priority, deadline in zip(
+                tasks['Id'].tolist(), tasks['Subject'], tasks['Duration'], tasks['Priority'], tasks['Deadline']):
+            self.add(task_id, subject, duration, priority, deadline)
+
+    def remove(self, task_id):
+        if self.skipped.pop(task_id, None) is not None:
+            return
+        for key in self.keys.pop(task_id, ()):
+            self._delete(key)
+
+    def _delete(self, key):
+        index = bisect.bisect_right(self.firsts, key) - 1
+        block = self.blocks[index]
+        at = bisect.bisect_left(block.keys, key)
+        for name in Block.__slots__[:6]:
+            del getattr(block, name)[at]
+        if block.keys:
+            self.firsts[index] = block.keys[0]
+            block.update(self.policy.study)
+        else:
+            del self.blocks[index], self.firsts[index]
+        self._changed(index)
+
+    def remove_many(self, task_ids):
+        for task_id in task_ids:
+            self.remove(task_id)
+
+    def clear(self):
+        self.__init__(self.mode, self.start, self.policy, self.horizon_days)
+
+    def copy(self):
+        # Read-only snapshot for another thread (Export Timetable): later
+        # edits to this timetable don't show through. It renders rows but
+        # has no id index, so it can't be edited itself.
+        live = LiveTimetable(self.mode, self.start, self.policy, self.horizon_days)
+        for block in self.blocks:
+            twin = Block(*(list(getattr(block, name)) for name in Block.__slots__[:6]))
+            # update() replaces these rather than changing them in place
+            for name in Block.__slots__[6:]:
+                if hasattr(block, name):
+                    setattr(twin, name, getattr(block, name))
+            live.blocks.append(twin)
+        live.firsts = list(self.firsts)
+        live.skipped = dict(self.skipped)
+        return live
+
+    def set_policy(self, policy):
+        # Switch break policy in place. Break lengths and gaps only enter the
+        # offsets at render time; a new study threshold rebuilds each block's
+        # transition table.
+        policy = breakpolicy.policy(policy) or breakpolicy.BreakPolicy()
+        if policy.study != self.policy.study:
+            for block in self.blocks:
+                block.update(policy.study)
+            self._changed(0)
+        self.policy = policy
+
+    def _prefixes(self):
+        # Bring the prefixes up to date from the first changed block
+        del self.prefix[self.valid:]
+        if self.prefix:
+            state, minutes, breaks, tasks, rows = self.prefix[-1]
+            block = self.blocks[len(self.prefix) - 1]
+            state, minutes, breaks, tasks, rows = self._after(block, state, minutes, breaks, tasks, rows)
+        else:
+            state = minutes = breaks = tasks = rows = 0
+        for block in self.blocks[len(self.prefix):]:
+            self.prefix.append((state, minutes, breaks, tasks, rows))
+            state, minutes, breaks, tasks, rows = self._after(block, state, minutes, breaks, tasks, rows)
+        self.valid = len(self.blocks)
+        return rows
+
+    def _after(self, block, state, minutes, breaks, tasks, rows):
+        added = block.breaks[state] if self.policy.study else 0
+        next_state = block.state[state] if self.policy.study else 0
+        count = len(block.keys)
+        return next_state, minutes + block.total, breaks + added, tasks + count, rows + count + added
+
+    def __len__(self):
+        # Slot rows, breaks included
+        return self._prefixes()
+
+    def late_frame(self):
+        # Subject and Late for every scheduled task, in one vectorized pass
+        # (the input deadlines.late_warning reads); Priority plans have no
+        # deadlines and no Late column, as with timetable.schedule
+        if self.mode == 'Priority':
+            return pd.DataFrame({'Subject': []})
+        minutes = np.array([m for block in self.blocks for m in block.minutes], dtype=np.int64)
+        dues = np.array([d for block in self.blocks for d in block.dues], dtype='datetime64[m]')
+        ends = self.policy.plan(minutes)[0] + minutes
+        return pd.DataFrame({
+            'Subject': [s for block in self.blocks for s in block.subjects],
+            'Late': self.base + ends.astype('timedelta64[m]') > dues,
+        })
+
+    def skipped_frame(self):
+        return pd.DataFrame({'Subject': list(self.skipped.values())}, columns=['Subject'])
+
+    def slots(self, first=0, last=None):
+        # Slot rows first..last in timetable.schedule's layout, plus Due and
+        # Late for the deadline modes, as deadlines.build gives them
+        total = self._prefixes()
+        last = total if last is None else min(last, total)
+        starts, ends, subjects, priorities, is_break, slot_due, late = [], [], [], [], [], [], []
+        index = max(0, bisect.bisect_right([p[4] for p in self.prefix], first) - 1) if self.prefix else 0
+        policy = self.policy
+        limit, gap = policy.study, policy.gap
+        row = None
+        while index < len(self.blocks) and (row is None or row < last):
+            state, minutes, breaks, tasks, row = self.prefix[index]
+            block = self.blocks[index]
+            for length, subject, priority, due in zip(block.minutes, block.subjects, block.priorities, block.dues):
+                if row >= last:
+                    break
+                if limit and state >= limit:
+                    breaks += 1
+                    state = 0
+                    if row >= first:
+                        at = minutes + policy.paused(breaks) + tasks * gap
+                        starts.append(at - policy.length(breaks))
+                        ends.append(at)
+                        subjects.append(timetable.BREAK_LABEL)
+                        priorities.append(None)
+                        is_break.append(True)
+                        slot_due.append(np.datetime64('NaT', 'm'))
+                        late.append(False)
+                    row += 1
+                    if row >= last:
+                        break
+                if row >= first:
+                    at = minutes + policy.paused(breaks) + tasks * gap
+                    starts.append(at)
+                    ends.append(at + length)
+                    subjects.append(subject)
+                    priorities.append(priority)
+                    is_break.append(False)
+                    slot_due.append(due)
+                    late.append(bool(self.base + np.timedelta64(at + length, 'm') > due))
+                row += 1
+                minutes += length
+                tasks += 1
+                if limit:
+                    state = min(limit, state + length)
+            index += 1
+        slots = pd.DataFrame({
+            'Start': self.base + np.array(starts, dtype='timedelta64[m]'),
+            'End': self.base + np.array(ends, dtype='timedelta64[m]'),
+            'Subject': np.array(subjects, dtype=object),
+            'Priority': np.array(priorities, dtype=object),
+            'Break': np.array(is_break, dtype=bool),
+        }, columns=timetable.SLOT_COLUMNS)
+        if self.mode != 'Priority':
+            slots['Due'] = np.array(slot_due, dtype='datetime64[m]')
+            slots['Late'] = np.array(late, dtype=bool)
+        return slots
+
+    def rows(self, start, stop):
+        # Display rows like timetable.timetable_rows; row 0 is the heading
+        rows = []
+        if start == 0:
+            rows.append("Generated Timetable:\n")
+            start = 1
+        rows.extend(timetable.timetable_lines(self.slots(start - 1, max(start, stop) - 1), break_spacing=False))
+        return rows
@@ -0,0 +1,10 @@
+# Scheduling modes offered next to Generate Timetable (see deadlines.build).
+# Kept free of pandas/NumPy so the window can be built before they load.
+
+SCHEDULE_MODES = ['Priority', 'Earliest deadline', 'Weighted slack', 'Study windows', 'Best of strategies']
+
+# Break policies offered next to the scheduling mode (see breakpolicy.POLICIES)
+BREAK_POLICIES = ['Hourly', 'Pomodoro 25/5', 'Pomodoro, long break every 4', '10 min after each task', 'No breaks']
+
+# Deadline filters offered next to the task list search (see taskindex.due_window)
+DEADLINE_WINDOWS = ['Any deadline', 'Overdue', 'Due today', 'Due within 7 days', 'Due within 30 days', 'No deadline']
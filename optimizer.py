@@ -0,0 +1,258 @@
+import heapq
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import timetable
+
+# Multi-day timetable optimizer.
+#
+# Tasks are packed into per-day study windows (by default 18:00-22:00 on
+# weekdays) instead of being laid end to end through the night. The goal is
+# to maximize the priority weight (priority 1 weighs 5 ... priority 5 weighs
+# 1) of tasks that finish before their deadline. Tasks are never split.
+#
+# Search is a depth-first branch-and-bound over include/exclude decisions
+# taken in earliest-deadline order, so its first dive is the EDF greedy
+# schedule. Each node is pruned with a capacity bound; the search stops at
+# the time limit and returns the best schedule found so far (at worst the
+# greedy one).
+
+DEFAULT_WINDOWS = {day: [('18:00', '22:00')] for day in range(5)}
+DEFAULT_WINDOWS.update({5: [('10:00', '14:00')], 6: [('10:00', '14:00')]})
+DEFAULT_HORIZON_DAYS = 14
+DEFAULT_TIME_LIMIT = 2.0
+MAX_STATES = 2000000  # memory cap for the visited-state table
+
+
+def _clock(text):
+    hours, minutes = map(int, text.split(':'))
+    return hours * 60 + minutes
+
+
+def study_windows(start, windows=DEFAULT_WINDOWS, horizon_days=DEFAULT_HORIZON_DAYS):
+    # Window start/end as minutes from start, clipped so nothing is in the past
+    midnight = datetime(start.year, start.month, start.day)
+    now = (start - midnight).total_seconds() / 60
+    starts, ends = [], []
+    for day in range(horizon_days):
+        weekday = (midnight + timedelta(days=day)).weekday()
+        for open_at, close_at in windows.get(weekday, []):
+            begin = day * 1440 + _clock(open_at) - now
+            end = day * 1440 + _clock(close_at) - now
+            if end > max(begin, 0):
+                starts.append(max(begin, 0.0))
+                ends.append(end)
+    return np.array(starts, dtype=float), np.array(ends, dtype=float)
+
+
+class Packer:
+    # Earliest slot of a given length at or after a cursor, inside the windows
+    def __init__(self, win_start, win_end):
+        self.win_start = win_start.tolist()
+        self.win_end = win_end.tolist()
+        lengths = win_end - win_start
+        # Study minutes in windows k.. (for the capacity bound)
+        self.after = np.concatenate((np.cumsum(lengths[::-1])[::-1], [0.0])).tolist()
+        self.longest = float(lengths.max()) if len(lengths) else 0.0
+
+    def fit(self, cursor, duration):
+        if duration > self.longest:
+            return None
+        k = bisect_right(self.win_end, cursor)
+        while k < len(self.win_end):
+            begin = max(cursor, self.win_start[k])
+            if begin + duration <= self.win_end[k]:
+                return begin
+            k += 1
+        return None
+
+    def available(self, cursor):
+        k = bisect_right(self.win_end, cursor)
+        if k >= len(self.win_end):
+            return 0.0
+        return self.after[k + 1] + self.win_end[k] - max(cursor, self.win_start[k])
+
+
+def _free(minutes, due, packer):
+    # Zero-minute tasks that make their deadline, and where they go: they
+    # take no study time, so each one sits at the first window and is always
+    # worth having. Kept out of the search and the bounds, where a weight per
+    # minute means nothing for them.
+    begin = packer.fit(0.0, 0.0)
+    if begin is None:
+        return np.empty(0, dtype=np.int64), None
+    return np.flatnonzero((minutes <= 0) & (due >= begin)), begin
+
+
+def root_bound(minutes, weights, due, packer):
+    # Fractional knapsack over the window capacity before the last deadline:
+    # no schedule can beat it, so it measures how far from optimal we are
+    free, _ = _free(minutes, due, packer)
+    extra = float(weights[free].sum())
+    timed = minutes > 0
+    minutes, weights, due = minutes[timed], weights[timed], due[timed]
+    # Tasks with no deadline can use every window, so then nothing is cut off
+    horizon = due.max() if len(due) else np.inf
+    capacity = packer.available(0.0) - (packer.available(horizon) if np.isfinite(horizon) else 0.0)
+    order = np.argsort(-(weights / np.maximum(minutes, 1)), kind='stable')
+    taken = np.cumsum(minutes[order])
+    full = taken <= capacity
+    bound = weights[order][full].sum()
+    rest = np.flatnonzero(~full)
+    if len(rest):
+        i = rest[0]
+        spare = capacity - (taken[i] - minutes[order][i])
+        bound += weights[order][i] * max(spare, 0) / max(minutes[order][i], 1)
+    return float(bound) + extra
+
+
+def _pack(candidates, order, minutes, weights, due, packer, value=0.0, chain=None):
+    # Walk candidates (EDF positions) and keep each task that still fits,
+    # adding to value and chain
+    cursor = 0.0
+    for i in candidates:
+        begin = packer.fit(cursor, minutes[i])
+        if begin is not None and begin + minutes[i] <= due[i]:
+            cursor = begin + minutes[i]
+            value += weights[i]
+            chain = (order[i], begin, chain)
+    return value, chain
+
+
+def _swap_out(minutes, weights, due, packer):
+    # Weighted Moore-Hodgson: add tasks in EDF order and, whenever the study
+    # time before the current deadline is overbooked, drop the chosen task
+    # with the lowest weight per minute. O(n log n); ignores how tasks pack
+    # into separate windows, which _pack then sorts out.
+    total = packer.available(0.0)
+    kept = []
+    booked = 0.0
+    for i in range(len(minutes)):
+        heapq.heappush(kept, (weights[i] / max(minutes[i], 1), i))
+        booked += minutes[i]
+        capacity = total - packer.available(due[i]) if due[i] != np.inf else total
+        while booked > capacity:
+            booked -= minutes[heapq.heappop(kept)[1]]
+    return sorted(i for _, i in kept)
+
+
+def branch_and_bound(minutes, weights, due, packer, time_limit=DEFAULT_TIME_LIMIT, stop=None):
+    # Returns (placements, stats); placements is a list of (task, start).
+    # stop() is polled with the clock and ends the search early when true.
+    started = time.perf_counter()
+    free, free_begin = _free(minutes, due, packer)
+    free_value, free_chain = float(weights[free].sum()), None
+    for task in free:
+        free_chain = (task, free_begin, free_chain)
+    timed = np.flatnonzero(minutes > 0)
+    n = len(timed)
+    order = timed[np.lexsort((-weights[timed], due[timed]))]
+    minutes_o = minutes[order].tolist()
+    weights_o = weights[order].tolist()
+    due_o = due[order].tolist()
+    density = (weights[order] / np.maximum(minutes[order], 1))
+    suffix_weight = np.concatenate((np.cumsum(weights[order][::-1])[::-1], [0.0])).tolist()
+    suffix_density = np.concatenate((np.maximum.accumulate(density[::-1])[::-1], [0.0])).tolist()
+
+    # Incumbent: the better of the plain EDF greedy plan and the swap-out
+    # plan. Both are built before the search so there is always a plan.
+    best_value, best_chain = _pack(range(n), order, minutes_o, weights_o, due_o, packer,
+                                   free_value, free_chain)
+    value, chain = _pack(_swap_out(minutes_o, weights_o, due_o, packer),
+                         order, minutes_o, weights_o, due_o, packer, free_value, free_chain)
+    if value > best_value:
+        best_value, best_chain = value, chain
+    greedy_value = best_value
+
+    nodes = 0
+    complete = True
+    # Best value seen for each (next task, cursor) state: whatever follows a
+    # state is the same, so reaching it again with no more value is pruned
+    seen = {}
+    # Node: (next task, cursor, value, chain of (task, start, parent))
+    stack = [(0, 0.0, free_value, free_chain)]
+    while stack:
+        nodes += 1
+        if nodes & 1023 == 0 and (time.perf_counter() - started > time_limit or (stop and stop())):
+            complete = False
+            break
+        i, cursor, value, chain = stack.pop()
+        bound = value + min(suffix_weight[i], packer.available(cursor) * suffix_density[i])
+        if bound <= best_value:
+            continue
+        if seen.get((i, cursor), -1.0) >= value:
+            continue
+        if len(seen) < MAX_STATES:
+            seen[i, cursor] = value
+        if i == n:
+            best_value, best_chain = value, chain
+            continue
+        stack.append((i + 1, cursor, value, chain))  # exclude task i
+        begin = packer.fit(cursor, minutes_o[i])
+        if begin is not None and begin + minutes_o[i] <= due_o[i]:
+            # include task i; pushed last so the dive tries it first
+            stack.append((i + 1, begin + minutes_o[i], value + weights_o[i], (order[i], begin, chain)))
+
+    placements = []
+    while best_chain:
+        task, begin, best_chain = best_chain
+        placements.append((int(task), begin))
+    placements.reverse()
+    stats = {
+        'value': best_value,
+        'greedy': greedy_value,
+        'bound': root_bound(minutes, weights, due, packer),
+        'total': float(weights.sum()),
+        'nodes': nodes,
+        'optimal': complete,
+        'seconds': time.perf_counter() - started,
+    }
+    return placements, stats
+
+
+def optimize(tasks, due, start=None, windows=DEFAULT_WINDOWS,
+             horizon_days=DEFAULT_HORIZON_DAYS, time_limit=DEFAULT_TIME_LIMIT, stop=None):
+    # tasks: task DataFrame; due: datetime64 deadlines aligned with it (NaT = none).
+    # Returns (slots, skipped, unscheduled, stats).
+    if start is None:
+        start = datetime.now()
+    # Whole minutes, so slots line up with the window edges
+    start = start.replace(second=0, microsecond=0)
+    minutes = timetable.task_minutes(tasks)
+    valid = ~np.isnan(minutes)
+    skipped = tasks[~valid]
+    tasks = tasks[valid]
+    minutes = minutes[valid]
+    due = due[valid]
+
+    priority = pd.to_numeric(tasks['Priority'], errors='coerce').to_numpy(dtype=float, na_value=5)
+    weights = 6 - np.clip(np.nan_to_num(priority, nan=5), 1, 5)
+    due_minutes = (due - np.datetime64(start, 'm')).astype('timedelta64[m]').astype(float)
+    due_minutes[np.isnat(due)] = np.inf
+
+    win_start, win_end = study_windows(start, windows, horizon_days)
+    packer = Packer(win_start, win_end)
+    placements, stats = branch_and_bound(minutes, weights, due_minutes, packer, time_limit, stop)
+
+    placements.sort(key=lambda placement: placement[1])
+    chosen = np.array([task for task, _ in placements], dtype=np.int64)
+    offsets = np.array([begin for _, begin in placements], dtype=float)
+    base = np.datetime64(start, 'ns')
+    begins = base + (offsets * 60).round().astype('timedelta64[s]')
+    ends = begins + (minutes[chosen] * 60).round().astype('timedelta64[s]')
+    slots = pd.DataFrame({
+        'Start': begins,
+        'End': ends,
+        'Subject': tasks['Subject'].to_numpy(dtype=object)[chosen],
+        'Priority': tasks['Priority'].to_numpy(dtype=object)[chosen],
+        'Break': np.zeros(len(chosen), dtype=bool),
+        'Due': due[chosen],
+        'Late': np.zeros(len(chosen), dtype=bool),
+    })
+    slots['Day'] = pd.DatetimeIndex(slots['Start']).strftime('%a %d %b')
+    unscheduled = tasks.drop(tasks.index[chosen])
+    return slots, skipped, unscheduled, stats
@@ -1,46 +1,254 @@
+import startup
 import tkinter as tk
-from tkinter import messagebox, scrolledtext
-import pandas as pd
+from tkinter import filedialog, messagebox, scrolledtext
 import os
-from datetime import datetime, timedelta
 import re
+import instrument
+import modes
+import strategypool
+import workers
+from chatlog import ChatLog
+from virtualview import VirtualText
+
+# The strategy search's worker processes are forked while this is still the
+# only thread (see strategypool.py)
+strategypool.start()
+
+# pandas and the modules built on it are imported in the background while
+# the window paints (see startup.py)
+timetable = startup.lazy('timetable')
+deadlines = startup.lazy('deadlines')
+intents = startup.lazy('intents')
+journal = startup.lazy('journal')
+columnstore = startup.lazy('columnstore')
+sqlitestore = startup.lazy('sqlitestore')
+taskstore = startup.lazy('taskstore')
+bulkimport = startup.lazy('bulkimport')
+livetimetable = startup.lazy('livetimetable')
+export = startup.lazy('export')
+recurrence = startup.lazy('recurrence')
+history = startup.lazy('history')
 
 # Data Setup
 SAVE_FILE = 'study_tasks.csv'
-if os.path.exists(SAVE_FILE):
-    study_data = pd.read_csv(SAVE_FILE)
-else:
-    study_data = pd.DataFrame(columns=['Subject', 'Duration', 'Priority', 'Deadline'])
+COLUMN_STORE = 'study_tasks.cols'
+DB_FILE = 'study_tasks.db'
+CHAT_LOG = 'study_chat.log'  # every chat message; the chat box shows the latest (chatlog.py)
+# 'csv' rewrites SAVE_FILE on every edit, 'journal' appends each edit to a log,
+# 'columns' keeps a typed memory-mapped store in COLUMN_STORE, 'sqlite' writes
+# each edit as one transaction to DB_FILE
+PERSISTENCE_MODE = os.environ.get('STUDY_PERSISTENCE', 'csv')
+# Minutes lets the timetable engine skip re-parsing Duration
+COLUMNAR_LOAD = ['Subject', 'Duration', 'Priority', 'Deadline', 'Minutes', 'Id']
+task_journal = None
+task_db = None
+study_data = None  # TaskStore, set once the startup load finishes
+live_timetable = None  # LiveTimetable while a generated timetable follows edits
+timetable_slots = None  # slot table of a generated timetable that is not live, for Export
+task_history = None  # history.History of the edits since the tasks were loaded, for Undo/Redo
+
+# Chat keeps this planner's own break advice and fallback; the matcher is
+# compiled on the first message
+CHAT_BREAK = "Take breaks after each study hour; it helps refresh your mind."
+CHAT_FALLBACK = "To get suggestions, ask for 'task suggestions', 'schedule organization', or 'study tips'."
+chat_matcher = None
 
 # Functions
-def save_tasks():
-    study_data.to_csv(SAVE_FILE, index=False)
-    messagebox.showinfo("Info", "Tasks saved!")
+def write_tasks(frame):
+    # Runs on a worker thread (see workers.py)
+    if PERSISTENCE_MODE == 'columns':
+        with instrument.span('Save Tasks/write_columns'):
+            columnstore.write_columns(frame, COLUMN_STORE)
+    else:
+        with instrument.span('Save Tasks/to_csv'):
+            journal.write_snapshot(frame[taskstore.SAVED_COLUMNS], SAVE_FILE)
 
-def load_tasks():
-    global study_data
+@instrument.timed('Save Tasks')
+def save_tasks(notify=True):
+    # Edits save quietly; the Save button confirms once the write is done.
+    # study_data.frame() is a snapshot: TaskStore never rewrites a slot.
+    if loading():
+        return
+    if task_journal:
+        task_journal.compact()
+        if notify:
+            messagebox.showinfo("Info", "Tasks saved!")
+        return
+    if task_db:
+        # Every edit is already committed; Save only checkpoints the WAL
+        on_done = (lambda result: messagebox.showinfo("Info", "Tasks saved!")) if notify else None
+        worker_pool.submit('save', lambda job: task_db.checkpoint(), on_done=on_done,
+                           label="Saving tasks", cancellable=False)
+        return
+    on_done = (lambda: messagebox.showinfo("Info", "Tasks saved!")) if notify else None
+    task_saver.request(study_data.frame(), on_done)
+
+@instrument.timed('Load Tasks/read')
+def read_tasks(job):
+    # Runs on a worker thread; None when there is nothing to load
+    if task_journal:
+        return taskstore.TaskStore.from_frame(task_journal.load())
+    if task_db:
+        return taskstore.TaskStore.from_frame(task_db.load())
+    if PERSISTENCE_MODE == 'columns' and columnstore.exists(COLUMN_STORE):
+        return taskstore.TaskStore.from_columns(columnstore.load_frame(COLUMN_STORE, columns=COLUMNAR_LOAD))
     if os.path.exists(SAVE_FILE):
-        study_data = pd.read_csv(SAVE_FILE)
-        display_tasks()
-        messagebox.showinfo("Info", "Tasks loaded!")
-    else:
+        return taskstore.TaskStore.from_frame(workers.read_csv(SAVE_FILE, job))
+    return None
+
+def read_loaded(job):
+    # Runs on a worker thread: the tasks with their totals counted, and the
+    # undo history's tree of them
+    store = read_tasks(job)
+    if store is None:
+        return None, None
+    store.rollups()
+    return store, history.TaskTree.from_frame(store.frame())
+
+@instrument.timed('Load Tasks/show')
+def tasks_loaded(result):
+    global study_data, live_timetable, timetable_slots
+    store, tree = result
+    if store is None:
         messagebox.showwarning("Warning", "No tasks to load.")
+        return
+    study_data = store
+    task_history.reset(tree)
+    live_timetable = timetable_slots = None
+    display_tasks()
+    update_statistics()
+    messagebox.showinfo("Info", "Tasks loaded!")
+
+def open_tasks(job):
+    # Startup load on a worker thread: the deferred imports, then the saved
+    # tasks. Returns (journal or None, database or None, TaskStore, the
+    # undo history's TaskTree of it).
+    startup.preload()
+    opened = database = None
+    if PERSISTENCE_MODE == 'journal':
+        opened = journal.TaskJournal(SAVE_FILE, state=lambda: study_data.task_frame(),
+                                     columns=taskstore.SAVED_COLUMNS)
+        store = taskstore.TaskStore.from_frame(opened.load())
+    elif PERSISTENCE_MODE == 'sqlite':
+        database = sqlitestore.TaskDatabase(DB_FILE)
+        store = taskstore.TaskStore.from_frame(database.load())
+    else:
+        store = read_tasks(job)
+        if store is None:
+            store = taskstore.TaskStore()
+    store.rollups()
+    return opened, database, store, history.TaskTree.from_frame(store.frame())
 
+def tasks_opened(result):
+    global task_journal, task_db, study_data, task_history
+    task_journal, task_db, study_data, tree = result
+    task_history = history.History(tree)
+    update_statistics()
+    startup.loaded()
+
+def open_failed(error):
+    global study_data, task_history
+    study_data = taskstore.TaskStore()
+    task_history = history.History()
+    update_statistics()
+    startup.loaded()
+    worker_pool.report_error(error)
+
+@instrument.timed('Import Tasks')
+def import_tasks():
+    if loading():
+        return
+    path = filedialog.askopenfilename(title="Import tasks",
+                                      filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+    if not path:
+        return
+    # Rows inserted into the database can't be taken back, so a SQLite
+    # import runs to the end
+    imported = ([], [])  # ids and rows added so far, for one undo step at the end
+    worker_pool.submit('import', lambda job: read_import(path, job),
+                       on_chunk=lambda frame: add_imported(imported, frame),
+                       on_done=lambda stats: tasks_imported(imported, stats),
+                       on_cancel=lambda: tasks_imported(imported),
+                       on_error=lambda error: tasks_imported(imported, error=error),
+                       label="Importing tasks", cancellable=task_db is None)
+
+def read_import(path, job):
+    # Runs on a worker thread: each validated chunk goes to the Tk thread as
+    # soon as it is read, so only a couple of chunks are held at a time
+    def accept(frame):
+        if task_db:
+            frame['Id'] = task_db.insert_frame(frame)
+        job.deliver(frame)
+    return bulkimport.import_csv(path, accept, job=job)
+
+@instrument.timed('Import Tasks/chunk')
+def add_imported(imported, frame):
+    task_ids, rows = imported
+    task_ids.extend(study_data.extend(frame).tolist())
+    rows.extend(history.task_rows(frame))
+
+@instrument.timed('Import Tasks/show')
+def tasks_imported(imported, stats=None, error=None):
+    # Also runs when the import is cancelled or fails (stats None): the
+    # tasks added before it stopped stay, and are saved and undoable
+    task_ids, rows = imported
+    if task_ids:
+        task_history.added(task_ids, rows, "Import Tasks")
+    display_tasks()
+    update_statistics()
+    if task_journal:
+        task_journal.compact()
+    elif not task_db:
+        save_tasks(notify=False)
+    if live_timetable is not None:
+        generate_timetable()
+    if error is not None:
+        worker_pool.report_error(error)
+    elif stats is None:
+        messagebox.showinfo("Info", f"Import cancelled after {len(task_ids)} tasks.")
+    else:
+        messagebox.showinfo("Info", bulkimport.summary(stats))
+
+@instrument.timed('Load Tasks')
+def load_tasks():
+    if worker_pool.running('load'):
+        return
+    worker_pool.submit('load', read_loaded, on_done=tasks_loaded, label="Loading tasks")
+
+def loading():
+    # Edits made while a load runs would be lost when it finishes
+    if worker_pool.running('load'):
+        messagebox.showwarning("Warning", "Tasks are still loading.")
+        return True
+    return False
+
+@instrument.timed('Clear All Tasks')
 def clear_tasks():
-    global study_data
-    study_data.drop(study_data.index, inplace=True)
-    task_display.delete("1.0", tk.END)
-    save_tasks()
+    if loading():
+        return
+    task_history.cleared("Clear All Tasks")
+    study_data.clear()
+    follow_edit(lambda live: live.clear())
+    display_tasks()
+    update_statistics()
+    if task_journal:
+        task_journal.record_clear()
+    elif task_db:
+        task_db.clear()
+    else:
+        save_tasks(notify=False)
     messagebox.showinfo("Info", "All tasks cleared!")
 
+@instrument.timed('Add Task')
 def add_task():
-    global study_data
     subject = subject_entry.get().strip()
     duration = duration_entry.get().strip()
     priority = priority_entry.get().strip()
     deadline = deadline_entry.get().strip()
 
     # Validation
+    if loading():
+        return
     if not subject or not duration or not priority:
         messagebox.showwarning("Warning", "Please fill in all required fields.")
         return
@@ -57,83 +265,217 @@ def add_task():
         messagebox.showwarning("Warning", "Priority must be an integer between 1 and 5.")
         return
 
-    # Append the new task to the DataFrame
-    task = pd.DataFrame({
-        'Subject': [subject],
-        'Duration': [duration],
-        'Priority': [priority],
-        'Deadline': [deadline]
-    })
-    study_data = pd.concat([study_data, task], ignore_index=True)
+    # Append the new task; a bare "review" series starts today
+    deadline = recurrence.anchor(deadline)
+    task_id = task_db.add(subject, duration, priority, deadline) if task_db else -1
+    task_id = study_data.append(subject, duration, priority, deadline, task_id)
+    task_history.added([task_id], [(subject, duration, priority, deadline)], "Add Task")
+    follow_edit(lambda live: live.add(task_id, subject, duration, priority, deadline))
     display_tasks()
-    save_tasks()
+    update_statistics()
+    if task_journal:
+        task_journal.record_add({'Subject': subject, 'Duration': duration,
+                                 'Priority': priority, 'Deadline': deadline, 'Id': task_id})
+    elif not task_db:
+        save_tasks(notify=False)
     messagebox.showinfo("Info", "Task added!")
     clear_inputs()
 
+@instrument.timed('Undo')
+def undo():
+    if loading():
+        return
+    change = task_history.undo()
+    if change is None:
+        messagebox.showwarning("Warning", "Nothing to undo.")
+        return
+    apply_change(change)
+    messagebox.showinfo("Info", f"Undone: {change.label}")
+
+@instrument.timed('Redo')
+def redo():
+    if loading():
+        return
+    change = task_history.redo()
+    if change is None:
+        messagebox.showwarning("Warning", "Nothing to redo.")
+        return
+    apply_change(change)
+    messagebox.showinfo("Info", f"Redone: {change.label}")
+
+def apply_change(change):
+    # Bring the tasks, a live timetable and the saved tasks to the version
+    # the history stepped to
+    restore = change.restore
+    if change.clear:
+        study_data.clear()
+        follow_edit(lambda live: live.clear())
+    elif change.remove:
+        study_data.delete_ids(change.remove)
+        follow_edit(lambda live: live.remove_many(change.remove))
+    if len(restore):
+        study_data.restore(restore)
+        if live_timetable is not None and len(restore) > livetimetable.BLOCK_SIZE:
+            # Many tasks back at once: start the timetable over, as an import does
+            generate_timetable()
+        else:
+            follow_edit(lambda live: live.add_many(restore))
+    display_tasks()
+    update_statistics()
+    if task_journal:
+        if change.clear:
+            task_journal.record_clear()
+        elif change.remove:
+            task_journal.record_delete(change.remove)
+        if len(restore):
+            task_journal.record_add_many(restore.to_dict('records'))
+    elif task_db:
+        if change.clear:
+            task_db.clear()
+        elif change.remove:
+            task_db.delete_many(change.remove)
+        if len(restore):
+            task_db.restore(restore)
+    else:
+        save_tasks(notify=False)
+
 def clear_inputs():
     subject_entry.delete(0, tk.END)
     duration_entry.delete(0, tk.END)
     priority_entry.delete(0, tk.END)
     deadline_entry.delete(0, tk.END)
 
+def task_count():
+    return len(study_data) if study_data is not None else 0
+
+@instrument.timed('render/task details')
+def task_display_rows(start, stop):
+    if study_data is None:
+        return []
+    return [(f"Subject: {subject}, Duration: {duration}, "
+             f"Priority: {priority}, Deadline: {deadline}\n")
+            for subject, duration, priority, deadline in study_data.rows(start, stop)]
+
 def display_tasks():
-    task_display.delete("1.0", tk.END)
-    for _, row in study_data.iterrows():
-        task_info = (f"Subject: {row['Subject']}, Duration: {row['Duration']}, "
-                     f"Priority: {row['Priority']}, Deadline: {row['Deadline']}\n")
-        task_display.insert(tk.END, task_info)
+    # A generated timetable stays on screen and follows edits
+    if live_timetable is not None:
+        task_view.show(live_count, live_rows)
+        return
+    # Only the visible rows are rendered; see virtualview.py
+    task_view.show(task_count, task_display_rows)
 
+@instrument.timed('render/statistics')
+def update_statistics():
+    # Running totals kept by the task store (rollups.py), not a pass over the tasks
+    if study_data is not None:
+        statistics_text.set("\n".join(study_data.rollups().summary()))
+
+@instrument.timed('Send')
 def chat_response():
+    global chat_matcher
     user_input = chat_input.get().strip().lower()
     if not user_input:
         return
 
-    response = ""
-    if "suggest task" in user_input:
-        response = "Try reviewing notes, working on high-priority tasks, or preparing summaries."
-    elif "organize schedule" in user_input:
-        response = "Start with high-priority tasks, allocate breaks, and adjust as needed."
-    elif "study tips" in user_input:
-        response = "Use the Pomodoro method: 25 mins study, 5 mins rest. Adjust to your needs."
-    elif "break" in user_input:
-        response = "Take breaks after each study hour; it helps refresh your mind."
-    else:
-        response = "To get suggestions, ask for 'task suggestions', 'schedule organization', or 'study tips'."
+    if chat_matcher is None:
+        chat_matcher = intents.IntentMatcher({**intents.INTENTS,
+                                              'break': (intents.INTENTS['break'][0], CHAT_BREAK)})
+    response = chat_matcher.respond(user_input, fallback=CHAT_FALLBACK)
 
-    chat_display.insert(tk.END, f"You: {user_input}\nAI: {response}\n\n")
+    chat_log.add(f"You: {user_input}\nAI: {response}\n\n")
     chat_input.delete(0, tk.END)
 
+@instrument.timed('Generate Timetable')
 def generate_timetable():
+    if loading():
+        return
     if study_data.empty:
         messagebox.showwarning("Warning", "No tasks available to generate a timetable.")
         return
 
-    timetable_display = ""
-    sorted_tasks = study_data.sort_values(by="Priority").reset_index(drop=True)
-    current_time = datetime.now()
+    # A newer request replaces one still running
+    worker_pool.cancel('generate')
+    frame, mode, policy = study_data.frame(), schedule_mode.get(), break_policy.get()
+    worker_pool.submit('generate', lambda job: build_timetable(frame, mode, policy, job),
+                       on_done=show_timetable, label="Generating timetable")
+
+@instrument.timed('Generate Timetable/build')
+def build_timetable(frame, mode, policy, job):
+    # Runs on a worker thread. Returns (slots, live, skipped, late warning);
+    # modes livetimetable supports give a LiveTimetable instead of slots.
+    if mode in livetimetable.LIVE_MODES:
+        live = livetimetable.LiveTimetable.from_tasks(frame, mode, policy=policy)
+        return None, live, live.skipped_frame(), deadlines.late_warning(live.late_frame())
+    slots, skipped = deadlines.build(frame, mode, policy=policy, stop=lambda: job.cancelled)
+    return slots, None, skipped, deadlines.late_warning(slots)
+
+@instrument.timed('Generate Timetable/show')
+def show_timetable(result):
+    global live_timetable, timetable_slots
+    slots, live_timetable, skipped, late = result
+    timetable_slots = slots
+    if not skipped.empty:
+        messagebox.showwarning("Warning", timetable.skipped_warning(skipped))
+    if late:
+        messagebox.showwarning("Warning", late)
+
+    if live_timetable is not None:
+        task_view.show(live_count, live_rows)
+        return
+    task_view.show(lambda: len(slots) + 1,
+                   lambda start, stop: timetable_display_rows(slots, start, stop))
+
+def follow_edit(update):
+    # Apply an edit to the live timetable. A Generate still running started
+    # from the old tasks, so it is restarted.
+    if live_timetable is not None:
+        update(live_timetable)
+    if worker_pool.running('generate'):
+        generate_timetable()
 
-    for _, row in sorted_tasks.iterrows():
-        try:
-            # Parse duration in HH:MM format
-            duration_parts = row['Duration'].split(":")
-            duration = timedelta(hours=int(duration_parts[0]), minutes=int(duration_parts[1]))
-        except (ValueError, IndexError):
-            messagebox.showwarning("Warning", f"Invalid duration format for {row['Subject']}. Skipping task.")
-            continue
+def change_breaks(name=None):
+    # A live timetable takes the new break policy in place
+    follow_edit(lambda live: live.set_policy(break_policy.get()))
+    if live_timetable is not None:
+        task_view.refresh()
 
-        end_time = current_time + duration
-        timetable_display += (f"{current_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}: "
-                              f"{row['Subject']} (Priority {row['Priority']})\n")
-        current_time = end_time + timedelta(minutes=10)
+@instrument.timed('Export Timetable')
+def export_timetable():
+    if live_timetable is None and timetable_slots is None:
+        messagebox.showwarning("Warning", "Generate a timetable before exporting it.")
+        return
+    path = filedialog.asksaveasfilename(title="Export timetable", defaultextension=".ics",
+                                        filetypes=[("iCalendar", "*.ics"), ("CSV files", "*.csv")])
+    if not path:
+        return
+    # The live timetable keeps following edits while the file is written
+    source = live_timetable.copy() if live_timetable is not None else timetable_slots
+    worker_pool.submit('export', lambda job: export.write(source, path, job=job),
+                       on_done=lambda count: messagebox.showinfo("Info", f"Exported {count} slots to {path}."),
+                       label="Exporting timetable")
 
-    task_display.delete("1.0", tk.END)
-    task_display.insert(tk.END, "Generated Timetable:\n" + timetable_display)
+def live_count():
+    return len(live_timetable) + 1
+
+@instrument.timed('render/timetable')
+def live_rows(start, stop):
+    return live_timetable.rows(start, stop)
+
+@instrument.timed('render/timetable')
+def timetable_display_rows(slots, start, stop):
+    return timetable.timetable_rows(slots, start, stop)
 
 # Tkinter GUI Setup
 root = tk.Tk()
 root.title("Smart Study Planner")
 root.geometry("600x700")
 
+# Save/Load/Generate run in the background; the status bar shows progress
+worker_pool = workers.WorkerPool(root)
+task_saver = workers.LatestWriter(worker_pool, write_tasks)
+# Handler timings and the F12 overlay, when STUDY_INSTRUMENT is set
+instrument.install(root)
+
 tk.Label(root, text="Subject:").grid(row=0, column=0, padx=10, pady=5)
 subject_entry = tk.Entry(root)
 subject_entry.grid(row=0, column=1, padx=10, pady=5)
@@ -145,26 +487,57 @@ duration_entry.grid(row=1, column=1, padx=10, pady=5)
 tk.Label(root, text="Priority (1-5):").grid(row=2, column=0, padx=10, pady=5)
 priority_entry = tk.Entry(root)
 priority_entry.grid(row=2, column=1, padx=10, pady=5)
+tk.Button(root, text="Undo", command=undo, width=15).grid(row=2, column=2, padx=10, pady=5)
 
 tk.Label(root, text="Deadline (e.g., Monday):").grid(row=3, column=0, padx=10, pady=5)
 deadline_entry = tk.Entry(root)
 deadline_entry.grid(row=3, column=1, padx=10, pady=5)
+tk.Button(root, text="Redo", command=redo, width=15).grid(row=3, column=2, padx=10, pady=5)
 
 tk.Button(root, text="Add Task", command=add_task, width=15).grid(row=4, column=0, pady=10)
 tk.Button(root, text="Save Tasks", command=save_tasks, width=15).grid(row=4, column=1, pady=10)
+tk.Button(root, text="Export Timetable", command=export_timetable, width=15).grid(row=4, column=2, padx=10, pady=10)
 tk.Button(root, text="Load Tasks", command=load_tasks, width=15).grid(row=5, column=0, pady=10)
 tk.Button(root, text="Clear All Tasks", command=clear_tasks, width=15).grid(row=5, column=1, pady=10)
-tk.Button(root, text="Generate Timetable", command=generate_timetable, width=30).grid(row=6, column=0, columnspan=2, pady=10)
+tk.Button(root, text="Import Tasks", command=import_tasks, width=15).grid(row=5, column=2, padx=10, pady=10)
+tk.Button(root, text="Generate Timetable", command=generate_timetable, width=30).grid(row=6, column=0, pady=10)
+schedule_mode = tk.StringVar(value=modes.SCHEDULE_MODES[0])
+tk.OptionMenu(root, schedule_mode, *modes.SCHEDULE_MODES).grid(row=6, column=1, pady=10)
+# 10-minute gap after every task by default
+break_policy = tk.StringVar(value='10 min after each task')
+tk.OptionMenu(root, break_policy, *modes.BREAK_POLICIES, command=change_breaks).grid(row=6, column=2, pady=10)
 
 task_display = tk.Text(root, height=10, width=70)
-task_display.grid(row=7, column=0, columnspan=2, padx=10, pady=10)
+task_display.grid(row=7, column=0, columnspan=2, padx=(10, 0), pady=10)
+task_display_scrollbar = tk.Scrollbar(root, orient="vertical")
+task_display_scrollbar.grid(row=7, column=2, sticky="ns", pady=10)
+task_view = VirtualText(task_display, task_display_scrollbar)
+
+statistics_text = tk.StringVar()
+tk.Label(root, textvariable=statistics_text, justify="left", anchor="w").grid(row=8, column=0, columnspan=3,
+                                                                             sticky="ew", padx=10)
 
-tk.Label(root, text="AI Suggestion Chatbox:").grid(row=8, column=0, columnspan=2, pady=10)
+tk.Label(root, text="AI Suggestion Chatbox:").grid(row=9, column=0, columnspan=2, pady=10)
 chat_display = scrolledtext.ScrolledText(root, height=8, width=70)
-chat_display.grid(row=9, column=0, columnspan=2, padx=10, pady=5)
+chat_display.grid(row=10, column=0, columnspan=2, padx=10, pady=5)
+chat_log = ChatLog(chat_display, chat_display.vbar, CHAT_LOG)
 
 chat_input = tk.Entry(root, width=50)
-chat_input.grid(row=10, column=0, padx=10, pady=5)
-tk.Button(root, text="Send", command=chat_response).grid(row=10, column=1, pady=5)
+chat_input.grid(row=11, column=0, padx=10, pady=5)
+tk.Button(root, text="Send", command=chat_response).grid(row=11, column=1, pady=5)
+
+status_bar = workers.StatusBar(root, worker_pool)
+status_bar.grid(row=12, column=0, columnspan=3, sticky="ew", padx=10, pady=(0, 5))
+
+# Undo/Redo from anywhere in the window
+root.bind('<Control-z>', lambda event: undo())
+root.bind('<Control-y>', lambda event: redo())
+root.bind('<Control-Z>', lambda event: redo())
+
+# Window first, tasks second. The load can't be cancelled: every handler needs
+# the task store it sets up.
+startup.watch(root)
+worker_pool.submit('load', open_tasks, on_done=tasks_opened, on_error=open_failed, label="Loading tasks",
+                   cancellable=False)
 
 root.mainloop()
@@ -0,0 +1,180 @@
+import heapq
+import re
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Recurring tasks and spaced-repetition reviews.
+#
+# A task repeats when its Deadline holds a rule instead of a single date:
+#
+#   every day / every weekday / every weekend / every mon, wed and fri
+#   review / review 1,3,7,14,30      (days after the `from` date)
+#
+# optionally followed by "at HH:MM" (the due time on each day, default end of
+# day), "from YYYY-MM-DD" and "until YYYY-MM-DD". A review series is anchored
+# when the task is added: a bare "review" is saved as "review from <today>".
+#
+# The task stays one row. Occurrences are only produced while a timetable is
+# built: each rule is a generator of due times, the generators are merged
+# into one stream ordered by time, and the stream is read up to the horizon
+# being scheduled, so nothing beyond it is ever materialized.
+
+HORIZON_DAYS = 7
+REVIEW_DAYS = (1, 3, 7, 14, 30)
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+DAY_SETS = {'day': range(7), 'weekday': range(5), 'weekend': range(5, 7)}
+DUE_FORMAT = '%Y-%m-%d %H:%M'
+
+RULE = re.compile(
+    r"^(?:every\s+(?P<days>[a-z ,]+?)|review(?:\s+(?P<offsets>\d+(?:\s*,\s*\d+)*))?)"
+    r"(?:\s+at\s+(?P<hour>\d{1,2}):(?P<minute>\d{2}))?"
+    r"(?:\s+from\s+(?P<since>\d{4}-\d{2}-\d{2}))?"
+    r"(?:\s+until\s+(?P<until>\d{4}-\d{2}-\d{2}))?$")
+
+
+class Rule:
+    __slots__ = ('weekdays', 'offsets', 'clock', 'since', 'until')
+
+    def __init__(self, weekdays=None, offsets=None, clock=time(23, 59), since=None, until=None):
+        self.weekdays = weekdays  # set of weekday numbers, for "every" rules
+        self.offsets = offsets  # sorted day offsets from since, for reviews
+        self.clock = clock
+        self.since = since
+        self.until = until
+
+    def days(self, first, last):
+        # Occurrence dates from first to last (inclusive), in order
+        if self.offsets is not None:
+            since = self.since or first
+            for offset in self.offsets:
+                day = since + timedelta(days=offset)
+                if day > last or (self.until and day > self.until):
+                    return
+                if day >= first:
+                    yield day
+            return
+        day = max(first, self.since) if self.since else first
+        last = min(last, self.until) if self.until else last
+        while day <= last:
+            if day.weekday() in self.weekdays:
+                yield day
+            day += timedelta(days=1)
+
+    def occurrences(self, start, end):
+        # Due datetimes in [start, end), in order
+        for day in self.days(start.date(), end.date()):
+            due = datetime.combine(day, self.clock)
+            if start <= due < end:
+                yield due
+
+
+def _weekdays(text):
+    # "weekdays", "mon, wed and fri", "tuesdays"
+    names = [name.rstrip('s') for name in re.split(r"[\s,]+", text) if name and name != 'and']
+    if len(names) == 1 and names[0] in DAY_SETS:
+        return set(DAY_SETS[names[0]])
+    days = set()
+    for name in names:
+        matches = [i for i, weekday in enumerate(WEEKDAYS) if len(name) >= 3 and weekday.startswith(name)]
+        if not matches:
+            return None
+        days.add(matches[0])
+    return days
+
+
+def _date(text):
+    return date.fromisoformat(text) if text else None
+
+
+def parse_rule(text):
+    # Deadline text -> Rule, or None for a one-off deadline
+    if not isinstance(text, str):
+        return None
+    match = RULE.match(text.strip().lower())
+    if not match:
+        return None
+    clock = time(23, 59)
+    if match.group('hour'):
+        hour, minute = int(match.group('hour')), int(match.group('minute'))
+        if hour > 23 or minute > 59:
+            return None
+        clock = time(hour, minute)
+    try:
+        since, until = _date(match.group('since')), _date(match.group('until'))
+    except ValueError:
+        return None
+    if match.group('days') is not None:
+        weekdays = _weekdays(match.group('days'))
+        return Rule(weekdays=weekdays, clock=clock, since=since, until=until) if weekdays else None
+    offsets = match.group('offsets')
+    offsets = sorted({int(n) for n in offsets.split(',')}) if offsets else list(REVIEW_DAYS)
+    return Rule(offsets=offsets, clock=clock, since=since, until=until)
+
+
+def anchor(text, now=None):
+    # A review series without a start date starts today
+    rule = parse_rule(text)
+    if rule is None or rule.offsets is None or rule.since is not None:
+        return text
+    text = text.strip()
+    day = (now or datetime.now()).date().isoformat()
+    # "from" goes before any "until"
+    until = re.search(r"\s+until\s", text.lower())
+    at = until.start() if until else len(text)
+    return f"{text[:at]} from {day}{text[at:]}"
+
+
+def anchor_all(deadlines, now=None):
+    # anchor() for a column; only the distinct values are looked at
+    codes, uniques = pd.factorize(pd.Series(deadlines, copy=False), use_na_sentinel=True)
+    if not len(uniques):
+        return deadlines
+    anchored = np.array([anchor(value, now) for value in uniques] + [np.nan], dtype=object)
+    return anchored[codes]
+
+
+def rules(deadlines):
+    # Rule or None per row; rules repeat, so each distinct text is parsed once
+    codes, uniques = pd.factorize(pd.Series(deadlines, copy=False), use_na_sentinel=True)
+    parsed = np.array([parse_rule(value) for value in uniques] + [None], dtype=object)
+    return parsed[codes]
+
+
+def _numbered(dues, task_id, row):
+    for number, due in enumerate(dues, 1):
+        yield due, task_id, number, row
+
+
+def occurrences(tasks, row_rules, start, end):
+    # One stream of (due, task id, occurrence number, row) for every
+    # recurring row, earliest first (ties by task id)
+    ids = tasks['Id'].to_numpy() if 'Id' in tasks else np.arange(len(tasks))
+    rows = np.flatnonzero(pd.notna(row_rules))
+    return heapq.merge(*(_numbered(row_rules[row].occurrences(start, end), int(ids[row]), row)
+                         for row in rows.tolist()))
+
+
+def expand_tasks(tasks, start, horizon_days=HORIZON_DAYS):
+    # tasks with every recurring row replaced by its occurrences due before
+    # start + horizon_days: one-off rows first, then occurrences in time
+    # order, each with a plain Deadline and its number in an Occurrence
+    # column (0 for one-off rows). Without recurring rows, tasks itself.
+    if 'Deadline' not in tasks:
+        return tasks
+    row_rules = rules(tasks['Deadline'])
+    recurring = pd.notna(row_rules)
+    if not recurring.any():
+        return tasks
+    stream = occurrences(tasks, row_rules, start, start + timedelta(days=horizon_days))
+    dues, numbers, rows = [], [], []
+    for due, task_id, number, row in stream:
+        dues.append(due)
+        numbers.append(number)
+        rows.append(row)
+    once = tasks[~recurring].assign(Occurrence=0)
+    repeated = tasks.iloc[rows].assign(
+        Deadline=pd.DatetimeIndex(dues).strftime(DUE_FORMAT) if dues else [],
+        Occurrence=np.array(numbers, dtype=np.int64))
+    return pd.concat([once, repeated], ignore_index=True)
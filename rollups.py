@@ -0,0 +1,116 @@
+import heapq
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from taskindex import NO_DUE, NO_PRIORITY, priority_values
+
+# Running workload totals for the statistics panel.
+#
+# Tasks and study minutes per subject, tasks per priority, and tasks and
+# minutes due on each day. A TaskStore keeps one Rollups up to date: every
+# task added or deleted adds or takes away its own share, so an edit costs
+# O(1) per task (a bulk add groups its rows first), Clear All just empties
+# the totals, and a full pass over the tasks only happens when a store is
+# built, i.e. when the tasks are loaded. A task with an unreadable Duration
+# counts as a task with no minutes; days come from the store's due minutes,
+# so repeat rules and unreadable deadlines count as no deadline.
+
+MINUTES_PER_DAY = 24 * 60
+NO_DAY = -1 << 62
+SMALL = 64  # edits of fewer tasks are applied a task at a time
+TOP_SUBJECTS = 6
+DAYS_AHEAD = 7
+
+
+def _priority(value):
+    # priority_values for one value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return NO_PRIORITY
+
+
+def _subject(value):
+    return value if isinstance(value, str) else ('' if pd.isna(value) else str(value))
+
+
+def _bump(totals, key, tasks, minutes):
+    entry = totals.get(key)
+    if entry is None:
+        entry = totals[key] = [0, 0]
+    entry[0] += tasks
+    entry[1] += minutes
+    if not entry[0]:
+        del totals[key]
+
+
+def clock(minutes):
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+class Rollups:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.tasks = 0
+        self.minutes = 0
+        self.subjects = {}  # subject -> [tasks, minutes]
+        self.priorities = {}  # priority (NO_PRIORITY when unreadable) -> [tasks, minutes]
+        self.days = {}  # due day (days since the epoch, NO_DAY for none) -> [tasks, minutes]
+
+    def update(self, subjects, priorities, minutes, dues, sign=1):
+        # Add (sign 1) or take away (sign -1) the shares of tasks given as
+        # columns: Subject, Priority, TaskStore minutes (-1 for a bad
+        # Duration) and due minutes
+        minutes = np.maximum(np.asarray(minutes, dtype=np.int64), 0)
+        dues = np.asarray(dues, dtype=np.int64)
+        days = np.where(dues == NO_DUE, NO_DAY, dues // MINUTES_PER_DAY)
+        self.tasks += sign * len(minutes)
+        self.minutes += sign * int(minutes.sum())
+        if len(minutes) < SMALL:
+            for subject, priority, spent, day in zip(subjects, priorities, minutes.tolist(), days.tolist()):
+                _bump(self.subjects, _subject(subject), sign, sign * spent)
+                _bump(self.priorities, _priority(priority), sign, sign * spent)
+                _bump(self.days, day, sign, sign * spent)
+            return
+        rows = pd.DataFrame({'minutes': minutes,
+                             'subject': pd.Series(subjects, dtype=object, copy=False).map(_subject),
+                             'priority': priority_values(priorities), 'day': days})
+        for column, totals in (('subject', self.subjects), ('priority', self.priorities), ('day', self.days)):
+            groups = rows.groupby(column, sort=False, dropna=False)['minutes'].agg(['size', 'sum'])
+            for key, tasks, spent in zip(groups.index.tolist(), groups['size'].tolist(), groups['sum'].tolist()):
+                _bump(totals, key, sign * tasks, sign * spent)
+
+    def summary(self, today=None):
+        # Lines for the statistics panel
+        today = (today or date.today()).toordinal() - date(1970, 1, 1).toordinal()
+        lines = [f"{self.tasks} tasks, {clock(self.minutes)} of study"]
+        top = heapq.nlargest(TOP_SUBJECTS, self.subjects.items(), key=lambda item: item[1][1])
+        if top:
+            more = len(self.subjects) - len(top)
+            lines.append("By subject: " + ", ".join(f"{subject or '(none)'} {clock(spent)} ({tasks})"
+                                                   for subject, (tasks, spent) in top)
+                         + (f" and {more} more" if more > 0 else ""))
+        if self.priorities:
+            lines.append("By priority: " + ", ".join(
+                f"{priority if priority != NO_PRIORITY else '?'}: {self.priorities[priority][0]}"
+                for priority in sorted(self.priorities)))
+        overdue = [0, 0]
+        for day, (tasks, spent) in self.days.items():
+            if day != NO_DAY and day < today:
+                overdue[0] += tasks
+                overdue[1] += spent
+        undated = self.days.get(NO_DAY, [0, 0])[0]
+        lines.append(f"Overdue: {overdue[0]} tasks, {clock(overdue[1])}; no deadline: {undated} tasks")
+        # Work due on each coming day, and all of it due by then
+        due_by = overdue[1]
+        for day in range(today, today + DAYS_AHEAD):
+            tasks, spent = self.days.get(day, (0, 0))
+            due_by += spent
+            if tasks:
+                label = np.datetime64(day, 'D').astype(object).strftime('%a %d %b')
+                lines.append(f"Due {label}: {tasks} tasks, {clock(spent)} ({clock(due_by)} due by then)")
+        return lines
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import bulkimport
+import deadlines
+import journal
+import modes
+import taskstore
+from timetable import TASK_COLUMNS
+
+# Headless planner service: task CRUD and timetable generation for many
+# students over a local HTTP/JSON API, on asyncio with no extra packages.
+#
+#   GET    /health
+#   GET    /students/<student>/tasks?offset=&limit=
+#   POST   /students/<student>/tasks            {"subject", "duration", "priority", "deadline"} or a list
+#   DELETE /students/<student>/tasks            clear
+#   DELETE /students/<student>/tasks/<id>
+#   POST   /students/<student>/timetable        {"mode": one of modes.SCHEDULE_MODES,
+#                                                 "breaks": one of modes.BREAK_POLICIES}
+#
+# Every student has their own TaskStore. Task edits run on the event loop
+# (they are O(1)); scheduling runs in a process pool on a frame() snapshot,
+# so a long optimizer search never blocks other requests. With --data each
+# student's tasks are loaded from and saved to <data>/<student>.csv, written
+# SAVE_DELAY seconds after the last edit.
+
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_BODY = 8 * 1024 * 1024
+SAVE_DELAY = 1.0
+STUDENT = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# smartstudyplanner's breaks, unless a request names another policy
+BREAKS = 'Hourly'
+STATUS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+          405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+ROUTES = [
+    (re.compile(r"^/health$"), {'GET': 'health'}),
+    (re.compile(r"^/students/(?P<student>[^/]+)/tasks$"),
+     {'GET': 'list_tasks', 'POST': 'add_tasks', 'DELETE': 'clear_tasks'}),
+    (re.compile(r"^/students/(?P<student>[^/]+)/tasks/(?P<task_id>\d+)$"), {'DELETE': 'delete_task'}),
+    (re.compile(r"^/students/(?P<student>[^/]+)/timetable$"), {'POST': 'timetable'}),
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _plain(value):
+    # JSON-safe scalar: NumPy numbers to Python, NaN/NA to null
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def task_records(frame):
+    return [{'id': int(task_id), 'subject': _plain(subject), 'duration': _plain(duration),
+             'priority': _plain(priority), 'deadline': _plain(deadline) or None}
+            for subject, duration, priority, deadline, task_id in zip(
+                frame['Subject'], frame['Duration'], frame['Priority'], frame['Deadline'], frame['Id'])]
+
+
+def plan(frame, mode, start, policy):
+    # Runs in the scheduling executor; returns the JSON payload
+    slots, skipped = deadlines.build(frame, mode, start, policy=policy)
+    rows = {
+        'start': slots['Start'].dt.strftime('%Y-%m-%dT%H:%M').tolist(),
+        'end': slots['End'].dt.strftime('%Y-%m-%dT%H:%M').tolist(),
+        'subject': slots['Subject'].astype(str).tolist(),
+        'priority': [_plain(p) for p in slots['Priority']],
+        'break': slots['Break'].astype(bool).tolist(),
+    }
+    if 'Late' in slots:
+        rows['late'] = slots['Late'].astype(bool).tolist()
+    names = list(rows)
+    return {
+        'mode': mode,
+        'breaks': policy,
+        'slots': [dict(zip(names, values)) for values in zip(*rows.values())],
+        'skipped': skipped['Subject'].astype(str).tolist(),
+        'warning': deadlines.late_warning(slots),
+    }
+
+
+class Student:
+    def __init__(self, name, store):
+        self.name = name
+        self.store = store
+        self.save_pending = False
+        # One save at a time: they share the snapshot's temporary file, and
+        # the later snapshot must be the one left in place
+        self.saving = asyncio.Lock()
+
+
+class PlannerService:
+    def __init__(self, data_dir=None, executor=None, breaks=BREAKS):
+        self.data_dir = data_dir
+        self.executor = executor or ProcessPoolExecutor()
+        self.breaks = breaks
+        self.students = {}
+        self.opening = {}  # student -> Future while their saved tasks are read
+        self.requests = 0
+
+    # Students
+
+    def _path(self, name):
+        return os.path.join(self.data_dir, name + '.csv')
+
+    def _read(self, name):
+        if self.data_dir and os.path.exists(self._path(name)):
+            return taskstore.TaskStore.from_frame(pd.read_csv(self._path(name)))
+        return taskstore.TaskStore()
+
+    async def student(self, name):
+        if not STUDENT.match(name):
+            raise HTTPError(400, "Student ids are 1-64 letters, digits, '-' or '_'.")
+        student = self.students.get(name)
+        if student:
+            return student
+        if name not in self.opening:
+            # One read per student even when their first requests overlap
+            self.opening[name] = asyncio.get_running_loop().run_in_executor(None, self._read, name)
+        try:
+            store = await self.opening[name]
+        finally:
+            self.opening.pop(name, None)
+        return self.students.setdefault(name, Student(name, store))
+
+    def _changed(self, student):
+        if not self.data_dir or student.save_pending:
+            return
+        student.save_pending = True
+        asyncio.get_running_loop().call_later(SAVE_DELAY, lambda: asyncio.ensure_future(self._save(student)))
+
+    async def _save(self, student):
+        async with student.saving:
+            student.save_pending = False
+            frame = student.store.task_frame()  # snapshot: TaskStore never rewrites a slot
+            await asyncio.get_running_loop().run_in_executor(
+                None, journal.write_snapshot, frame, self._path(student.name))
+
+    async def _saved(self, student):
+        # Wait for a save that is already being written
+        async with student.saving:
+            pass
+
+    async def flush(self):
+        # Write every student with unsaved edits, and finish the saves in
+        # progress (on shutdown)
+        if self.data_dir:
+            await asyncio.gather(*(self._save(s) if s.save_pending else self._saved(s)
+                                   for s in self.students.values()))
+
+    # Handlers: (status, payload)
+
+    async def health(self, query, body):
+        return 200, {'students': len(self.students), 'requests': self.requests}
+
+    async def list_tasks(self, query, body, student):
+        store = (await self.student(student)).store
+        offset = int(query.get('offset', 0))
+        limit = int(query.get('limit', len(store)))
+        frame = store.frame().iloc[offset:offset + limit]
+        return 200, {'total': len(store), 'tasks': task_records(frame)}
+
+    async def add_tasks(self, query, body, student):
+        student = await self.student(student)
+        items = body if isinstance(body, list) else [body]
+        if not all(isinstance(item, dict) for item in items):
+            raise HTTPError(400, "Send a task object or a list of them.")
+        # add_task's rules, through the bulk import validator
+        chunk = pd.DataFrame([{name: '' if item.get(name.lower(), item.get(name)) is None
+                               else str(item.get(name.lower(), item.get(name))) for name in TASK_COLUMNS}
+                              for item in items], columns=TASK_COLUMNS)
+        valid, rejected = bulkimport.validate(chunk)
+        if isinstance(body, dict) and len(rejected):
+            raise HTTPError(400, rejected['Reason'].iloc[0])
+        ids = [student.store.append(*row) for row in valid[TASK_COLUMNS].itertuples(index=False)]
+        if ids:
+            self._changed(student)
+        rejects = [{'index': int(index), 'reason': reason} for index, reason in rejected['Reason'].items()]
+        if isinstance(body, dict):
+            return 201, {'id': ids[0]}
+        return 201, {'ids': ids, 'rejected': rejects}
+
+    async def delete_task(self, query, body, student, task_id):
+        student = await self.student(student)
+        if not student.store.delete_id(int(task_id)):
+            raise HTTPError(404, f"No task {task_id}.")
+        self._changed(student)
+        return 200, {'deleted': int(task_id)}
+
+    async def clear_tasks(self, query, body, student):
+        student = await self.student(student)
+        student.store.clear()
+        self._changed(student)
+        return 200, {'deleted': 'all'}
+
+    async def timetable(self, query, body, student):
+        student = await self.student(student)
+        mode = (body or {}).get('mode', modes.SCHEDULE_MODES[0])
+        if mode not in modes.SCHEDULE_MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(modes.SCHEDULE_MODES)}.")
+        policy = (body or {}).get('breaks', self.breaks)
+        if policy not in modes.BREAK_POLICIES:
+            raise HTTPError(400, f"breaks must be one of {', '.join(modes.BREAK_POLICIES)}.")
+        if student.store.empty:
+            return 200, {'mode': mode, 'breaks': policy, 'slots': [], 'skipped': [], 'warning': None}
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.executor, plan, student.store.frame(), mode, datetime.now(), policy)
+        return 200, result
+
+    # HTTP
+
+    async def dispatch(self, method, target, raw):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        for pattern, handlers in ROUTES:
+            match = pattern.match(url.path)
+            if not match:
+                continue
+            if method not in handlers:
+                raise HTTPError(405, f"{method} not allowed here.")
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                raise HTTPError(400, "Body is not valid JSON.")
+            try:
+                return await getattr(self, handlers[method])(query, body, **match.groupdict())
+            except ValueError as error:
+                raise HTTPError(400, str(error))
+        raise HTTPError(404, f"No route for {url.path}.")
+
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                    length = int(headers.get('content-length') or 0)
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "Body too large.")
+                    raw = await reader.readexactly(length) if length else b''
+                    self.requests += 1
+                    status, payload = await self.dispatch(method, target, raw)
+                except HTTPError as error:
+                    version = 'HTTP/1.1'
+                    status, payload = error.status, {'error': str(error)}
+                except ValueError:
+                    version, headers['connection'] = 'HTTP/1.1', 'close'
+                    status, payload = 400, {'error': "Malformed request."}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as error:
+                    status, payload = 500, {'error': str(error)}
+                keep = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                data = json.dumps(payload, default=_plain).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT, ready=None):
+        server = await asyncio.start_server(self.serve_client, host, port, backlog=1024)
+        try:
+            # SIGTERM stops the server like Ctrl+C, so pending saves are written
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except NotImplementedError:  # Windows
+            pass
+        if ready:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.flush()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON planner service")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--data', help="directory for per-student task CSVs (default: in memory only)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="scheduling processes")
+    parser.add_argument('--threads', action='store_true', help="schedule on threads instead of processes")
+    parser.add_argument('--breaks', default=BREAKS, choices=modes.BREAK_POLICIES,
+                        help="break policy when a request names none")
+    args = parser.parse_args()
+
+    if args.data:
+        os.makedirs(args.data, exist_ok=True)
+    pool = ThreadPoolExecutor if args.threads else ProcessPoolExecutor
+    service = PlannerService(args.data, pool(args.workers), args.breaks)
+    print(f"serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
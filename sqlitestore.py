@@ -0,0 +1,238 @@
+import argparse
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from timetable import TASK_COLUMNS, duration_minutes, task_minutes
+
+# SQLite task store: one row per task with a stable integer id.
+#
+# The database runs in WAL mode, so readers never block the writer and
+# several planner windows or batch jobs can share one file. Every add,
+# delete and clear is its own BEGIN IMMEDIATE transaction: the write lock is
+# taken up front, and a second writer waits up to BUSY_TIMEOUT seconds
+# instead of failing halfway through. Priority, Deadline and Subject are
+# indexed for ordered loads and lookups.
+
+DB_FILE = 'study_tasks.db'
+BUSY_TIMEOUT = 5.0
+POOL_SIZE = 4
+ORDERS = {'id': 'id', 'priority': 'priority, id', 'deadline': 'deadline, id', 'subject': 'subject, id'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    minutes INTEGER NOT NULL DEFAULT -1,
+    priority INTEGER,
+    deadline TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_priority ON tasks (priority);
+CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks (deadline);
+CREATE INDEX IF NOT EXISTS tasks_subject ON tasks (subject);
+"""
+
+
+class ConnectionPool:
+    # Reuses up to `size` connections across threads. A connection is only
+    # ever used by one thread at a time, so check_same_thread is off.
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.closed = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL stays consistent after a crash; a power cut may lose
+        # the last commits but never corrupts the file
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            # A connection left inside a transaction would hold the write
+            # lock for whoever gets it next
+            if self.closed or conn.in_transaction or self.idle.qsize() >= self.size:
+                conn.close()
+            else:
+                self.idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.execute('COMMIT')
+            except BaseException:
+                # COMMIT itself can fail (SQLITE_BUSY, disk full) and leave
+                # the transaction open
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def _value(value):
+    # NaN / pd.NA from a DataFrame become NULL
+    return None if value is None or pd.isna(value) else value
+
+
+def _priority(value):
+    value = _value(value)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _minutes(value):
+    minutes = duration_minutes(value)
+    return -1 if np.isnan(minutes) else int(minutes)
+
+
+class TaskDatabase:
+    def __init__(self, path=DB_FILE, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def add(self, subject, duration, priority, deadline):
+        # Returns the new task's id
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                'INSERT INTO tasks (subject, duration, minutes, priority, deadline) VALUES (?, ?, ?, ?, ?)',
+                (str(subject), str(duration), _minutes(duration), _priority(priority), _value(deadline)))
+            return cursor.lastrowid
+
+    def delete(self, task_id):
+        with self.pool.transaction() as conn:
+            return conn.execute('DELETE FROM tasks WHERE id = ?', (int(task_id),)).rowcount
+
+    def delete_many(self, task_ids):
+        # One transaction for a multi-row selection
+        with self.pool.transaction() as conn:
+            return conn.executemany('DELETE FROM tasks WHERE id = ?',
+                                    [(int(task_id),) for task_id in task_ids]).rowcount
+
+    def clear(self):
+        with self.pool.transaction() as conn:
+            conn.execute('DELETE FROM tasks')
+
+    def insert_frame(self, frame):
+        # Batch insert in one transaction; returns the new ids in row order
+        frame = frame.reindex(columns=TASK_COLUMNS)
+        minutes = task_minutes(frame)
+        with self.pool.transaction() as conn:
+            # The ids are assigned here, past every id AUTOINCREMENT has
+            # handed out, rather than assumed consecutive; the write lock
+            # keeps them free until COMMIT
+            first = conn.execute(
+                "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0), "
+                "COALESCE((SELECT MAX(id) FROM tasks), 0)) + 1").fetchone()[0]
+            ids = np.arange(first, first + len(frame), dtype=np.int64)
+            conn.executemany(
+                'INSERT INTO tasks (id, subject, duration, minutes, priority, deadline) VALUES (?, ?, ?, ?, ?, ?)',
+                [(int(task_id), str(subject), str(duration), -1 if np.isnan(m) else int(m), _priority(priority),
+                  _value(deadline))
+                 for task_id, subject, duration, priority, deadline, m in zip(
+                     ids, frame['Subject'], frame['Duration'], frame['Priority'], frame['Deadline'], minutes)])
+        return ids
+
+    def restore(self, frame):
+        # Put tasks back under their saved ids (Undo/Redo), in one transaction
+        frame = frame.reindex(columns=TASK_COLUMNS + ['Id'])
+        minutes = task_minutes(frame)
+        rows = [(int(task_id), str(subject), str(duration), -1 if np.isnan(m) else int(m), _priority(priority),
+                 _value(deadline))
+                for subject, duration, priority, deadline, task_id, m in zip(
+                    frame['Subject'], frame['Duration'], frame['Priority'], frame['Deadline'], frame['Id'], minutes)]
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO tasks (id, subject, duration, minutes, priority, deadline) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def count(self):
+        with self.pool.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def load(self, order='id'):
+        # Tasks as a DataFrame with the CSV columns plus Minutes and Id
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f'SELECT subject, duration, priority, deadline, minutes, id FROM tasks ORDER BY {ORDERS[order]}'
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=TASK_COLUMNS + ['Minutes', 'Id'])
+        frame['Priority'] = frame['Priority'].astype('Int64')  # NULLs would make it float
+        frame['Minutes'] = frame['Minutes'].astype(np.int32)
+        frame['Id'] = frame['Id'].astype(np.int64)
+        return frame
+
+    def checkpoint(self):
+        # Fold the WAL back into the main file; readers still in progress
+        # keep their snapshot
+        with self.pool.connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+    def close(self):
+        self.pool.close()
+
+
+def csv_to_db(csv_path, path=DB_FILE):
+    db = TaskDatabase(path)
+    try:
+        ids = db.insert_frame(pd.read_csv(csv_path, dtype={'Subject': str, 'Duration': str, 'Deadline': str}))
+    finally:
+        db.close()
+    return len(ids)
+
+
+def db_to_csv(path=DB_FILE, csv_path='study_tasks.csv'):
+    db = TaskDatabase(path)
+    try:
+        db.load()[TASK_COLUMNS + ['Id']].to_csv(csv_path, index=False)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move tasks between study_tasks.csv and the SQLite store.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    to_db = sub.add_parser('import', help="append the tasks of a CSV file to the database")
+    to_db.add_argument('csv', nargs='?', default='study_tasks.csv')
+    to_db.add_argument('db', nargs='?', default=DB_FILE)
+    to_csv = sub.add_parser('export', help="database -> CSV")
+    to_csv.add_argument('db', nargs='?', default=DB_FILE)
+    to_csv.add_argument('csv', nargs='?', default='study_tasks.csv')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f"imported {csv_to_db(args.csv, args.db)} tasks into {args.db}")
+    else:
+        db_to_csv(args.db, args.csv)
+
+
+if __name__ == '__main__':
+    main()
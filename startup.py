@@ -0,0 +1,95 @@
+import importlib
+import os
+import sys
+import time
+
+# Cold start support for the Tk planners.
+#
+# The entry points import this module first, build the window with only
+# tkinter loaded, and reach pandas/NumPy and the modules built on them
+# through lazy() proxies. A worker thread preloads those modules and then
+# reads the saved tasks while the window is already on screen.
+#
+# Startup timing: run an entry point with --startup-timing (or set
+# STUDY_STARTUP_TIMING=1) to print how long the window, the first paint, the
+# deferred imports and the task load took, then exit.
+
+STARTED = time.perf_counter()
+TIMING = '--startup-timing' in sys.argv or bool(os.environ.get('STUDY_STARTUP_TIMING'))
+# Modules the planners use once tasks are loaded
+BACKEND_MODULES = ['pandas', 'timetable', 'taskstore', 'journal', 'columnstore', 'sqlitestore',
+                   'recurrence', 'strategies', 'deadlines', 'livetimetable', 'bulkimport', 'export', 'history',
+                   'taskindex', 'rollups', 'intents']
+# Marks the timing report waits for before exiting
+REPORT_AFTER = ('first paint', 'tasks loaded')
+
+marks = {}
+_root = None
+
+
+class LazyModule:
+    # Stand-in for a module that is imported on first attribute access
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+def lazy(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def preload(names=BACKEND_MODULES):
+    # Import on the calling (worker) thread so the Tk thread never waits
+    for name in names:
+        importlib.import_module(name)
+    mark('imports')
+
+
+def mark(name):
+    # Seconds since the entry point started
+    marks.setdefault(name, time.perf_counter() - STARTED)
+
+
+def watch(root):
+    # Record the first paint; with timing on, report and exit once the
+    # tasks are loaded as well
+    global _root
+    _root = root
+    mark('window built')
+    root.bind('<Map>', _mapped, add='+')
+
+
+def _mapped(event):
+    if event.widget is _root:
+        _root.after_idle(_painted)
+
+
+def _painted():
+    mark('first paint')
+    _finish()
+
+
+def loaded():
+    # Call on the Tk thread once the startup load is done
+    mark('tasks loaded')
+    _finish()
+
+
+def _finish():
+    if TIMING and _root is not None and all(name in marks for name in REPORT_AFTER):
+        report()
+        _root.after(0, _root.destroy)
+
+
+def report(out=sys.stdout):
+    print("startup timing (seconds since launch)", file=out)
+    for name, seconds in sorted(marks.items(), key=lambda item: item[1]):
+        print(f"  {name:<14} {seconds:8.3f}", file=out)
+    out.flush()
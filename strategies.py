@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+import breakpolicy
+import strategypool
+
+# Best-of-strategies scheduling.
+#
+# Several candidate orders for the tasks are laid out with the break policy
+# and scored, and the best one is kept: priority first (the plain Priority
+# timetable), earliest deadline first, shortest first, subject blocks, and
+# randomized restarts of the deadline order. A score is (priority weight of
+# the tasks that miss their deadline, how many miss, subject switches), so
+# deadlines come first and fewer context switches break ties. Subject
+# blocks studies each subject in one go, the subjects in order of their
+# earliest deadline, which is the order with the fewest switches; one that
+# interleaved the subjects would only ever lose on that score.
+#
+# Candidates run on strategypool's workers, one per CPU: processes forked
+# when a planner starts, else threads. The task columns are written once per
+# search as .npy files in a temporary directory and every worker
+# memory-maps them, so a task only sends the strategy name and seed and gets
+# back a score. The search stops after time_limit seconds, or when stop()
+# says so, with the best candidate finished by then; the parent rebuilds
+# that candidate's order, which is cheap next to scoring them all. Nothing
+# here imports more than NumPy and breakpolicy, so that is all a worker loads.
+
+STRATEGIES = ['Priority first', 'Earliest deadline', 'Shortest first', 'Subject blocks']
+RANDOMIZED = 'Randomized'
+RESTARTS = 12
+JITTER = 0.02  # a randomized restart moves tasks within 2% of the list
+COLUMNS = ('minutes', 'due', 'priority', 'subject')
+POLL = 0.05  # seconds between stop() checks
+
+_loaded = (None, None)  # (directory, columns) last mapped by this worker
+
+
+def weights(priorities):
+    # Priority 1 weighs 5 ... priority 5 (or none) weighs 1, as in the optimizer
+    return 6 - np.clip(np.nan_to_num(priorities, posinf=5), 1, 5)
+
+
+def order(name, columns, seed=0):
+    # Task positions in the order strategy name studies them
+    minutes, due, priority, subject = (columns[column] for column in COLUMNS)
+    if name == 'Priority first':
+        return np.argsort(priority, kind='stable')
+    if name == 'Earliest deadline':
+        return np.lexsort((priority, due))
+    if name == 'Shortest first':
+        return np.lexsort((priority, minutes))
+    if name == 'Subject blocks':
+        first = np.full(int(subject.max()) + 1 if len(subject) else 0, np.inf)
+        np.minimum.at(first, subject, due)
+        return np.lexsort((priority, due, subject, first[subject]))
+    # Randomized: the deadline order, each task nudged up to JITTER of the list
+    ranks = np.empty(len(due))
+    ranks[np.lexsort((priority, due))] = np.arange(len(due))
+    noise = np.random.default_rng(seed).uniform(0, max(1.0, JITTER * len(due)), len(due))
+    return np.argsort(ranks + noise, kind='stable')
+
+
+def score(ordered, columns, policy):
+    # (missed priority weight, tasks missed, subject switches) for the tasks
+    # studied in the given order
+    minutes = np.asarray(columns['minutes'])[ordered]
+    starts = (breakpolicy.policy(policy) or breakpolicy.BreakPolicy()).plan(minutes)[0]
+    late = starts + minutes > np.asarray(columns['due'])[ordered]
+    subject = np.asarray(columns['subject'])[ordered]
+    missed = float(weights(np.asarray(columns['priority'])[ordered][late]).sum())
+    return missed, int(late.sum()), int(np.count_nonzero(subject[1:] != subject[:-1]))
+
+
+def _columns(directory):
+    global _loaded
+    if _loaded[0] != directory:
+        _loaded = (directory, {column: np.load(os.path.join(directory, column + '.npy'), mmap_mode='r')
+                               for column in COLUMNS})
+    return _loaded[1]
+
+
+def _candidate(directory, name, seed, policy):
+    # Runs in the pool: score one strategy against the mapped columns
+    columns = _columns(directory)
+    return score(order(name, columns, seed), columns, policy), name, seed
+
+
+def candidates(restarts=RESTARTS):
+    return [(name, 0) for name in STRATEGIES] + [(RANDOMIZED, seed) for seed in range(1, restarts + 1)]
+
+
+def search(minutes, due, priorities, subjects, policy=None, time_limit=2.0, stop=None, restarts=RESTARTS):
+    # Best order of the tasks: minutes (ints), due as minutes from the start
+    # (inf for none), priority keys (inf for none) and subject codes. Returns
+    # (order, results) with results the (score, name, seed) of every
+    # candidate that finished, best first.
+    columns = {'minutes': np.asarray(minutes, dtype=np.int64), 'due': np.asarray(due, dtype=float),
+               'priority': np.asarray(priorities, dtype=float), 'subject': np.asarray(subjects, dtype=np.int64)}
+    policy = breakpolicy.policy(policy)
+    started = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory(prefix='strategies-', ignore_cleanup_errors=True) as directory:
+        for column in COLUMNS:
+            np.save(os.path.join(directory, column + '.npy'), columns[column])
+        pending = {strategypool.executor().submit(_candidate, directory, name, seed, policy)
+                   for name, seed in candidates(restarts)}
+        while pending:
+            left = time_limit - (time.perf_counter() - started)
+            if left <= 0 or (stop and stop()):
+                break
+            done, pending = wait(pending, timeout=min(left, POLL), return_when=FIRST_COMPLETED)
+            results.extend(future.result() for future in done)
+        for future in pending:
+            future.cancel()
+    if not results:
+        # Nothing finished in time: the Priority timetable
+        results.append((score(order(STRATEGIES[0], columns), columns, policy), STRATEGIES[0], 0))
+    results.sort()
+    _, name, seed = results[0]
+    return order(name, columns, seed), results
@@ -0,0 +1,53 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Worker pool for the best-of-strategies search (strategies.py).
+#
+# Candidates are scored in worker processes, one per CPU. Forking a process
+# that already runs threads (Tk's, the background job pool's) can leave the
+# child holding a lock that one of them had taken and nothing will ever
+# release, so every worker is forked by start(), which the planners call
+# before they build the window or start a thread, and none after that. The
+# parent has imported little more than tkinter by then, and the workers
+# import strategies (NumPy and breakpolicy) with their first candidate.
+# Spawned or forkserver workers would avoid forking altogether, but they
+# re-run the planner's __main__ script, and with it the whole window.
+#
+# A process that never called start() (the service and its workers, the
+# benchmarks), had threads by then, or has no fork scores candidates on a
+# thread pool instead. Either pool is shut down at exit.
+
+_pool = None
+
+
+def start(workers=None):
+    # Fork the worker processes; call while this is the only thread
+    global _pool
+    if _pool is not None or threading.active_count() > 1:
+        return
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return
+    _pool = ProcessPoolExecutor(workers or os.cpu_count(), mp_context=multiprocessing.get_context('fork'))
+    # A fork pool starts all of its workers with the first job, before the
+    # thread that feeds them
+    _pool.submit(os.getpid)
+    atexit.register(shutdown)
+
+
+def executor():
+    # The pool start() forked, else a thread pool started on first use
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        atexit.register(shutdown)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -0,0 +1,244 @@
+import bisect
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import deadlines
+
+# As-you-type search over the task list.
+#
+# A TaskIndex sits next to a TaskStore, one entry per slot. The store builds
+# it on the first search (the planners do that on the load worker) and hands
+# it every task added after; deleted tasks are skipped by their alive flag,
+# and a compaction, which moves the slots, drops the index.
+#
+# Subjects are matched a word prefix at a time. Every distinct word of every
+# distinct subject sits in one sorted list, so a search term is a bisect to
+# the run of words it starts, and a subject matches when each term does.
+# Each slot keeps its subject's code, its priority and its deadline (the
+# store's due minutes), with a SortedIndex on each. A search asks the indexes how
+# many slots each filter lets through, reads the candidates of the most
+# selective one by binary search and checks the other filters on just those.
+# When no filter narrows the list much, one vectorized pass over the typed
+# columns is cheaper than sorting a large candidate set back to list order.
+#
+# Relative deadlines ("friday", "in 3 days") are read when the task is
+# indexed; repeat rules (recurrence.py) count as no deadline.
+
+# A SortedIndex holds new slots unsorted until they pass MERGE_EVERY and
+# 1/MERGE_SHARE of the index, then merges them in with one O(n) insert
+MERGE_EVERY = 4096
+MERGE_SHARE = 64
+SCAN_SHARE = 16  # use an index when it picks under 1/SCAN_SHARE of the slots
+NO_PRIORITY = -1
+NO_DUE = np.iinfo(np.int64).max
+WORD = re.compile(r"\w+")
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+def words(text):
+    return WORD.findall(str(text).lower())
+
+
+def due_minutes(values, now=None):
+    # Deadline texts -> minutes since the epoch, NO_DUE where unreadable
+    due = deadlines.parse_deadlines(values, now)
+    minutes = due.astype(np.int64)
+    minutes[np.isnat(due)] = NO_DUE
+    return minutes
+
+
+def due_minute(text, now=None):
+    # due_minutes for one deadline
+    due = deadlines.parse_deadline(text, now)
+    return NO_DUE if due is None else int(np.datetime64(due, 'm').astype(np.int64))
+
+
+def priority_values(values):
+    # Priorities -> integers, NO_PRIORITY where not a number; only the
+    # distinct values are converted
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object, copy=False), use_na_sentinel=True)
+    priority = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float)
+    priority = np.append(np.where(np.isnan(priority), NO_PRIORITY, priority).astype(np.int64), NO_PRIORITY)
+    return priority[codes]
+
+
+def _minute(value):
+    return int(value.astype('datetime64[m]').astype(np.int64))
+
+
+def due_window(name, now=None):
+    # A modes.DEADLINE_WINDOWS choice -> (first, last) minute, inclusive, or
+    # None when it doesn't filter
+    now = np.datetime64(now or datetime.now(), 'm')
+    today = now.astype('datetime64[D]')
+    if name == 'Overdue':
+        return np.iinfo(np.int64).min, _minute(now) - 1
+    if name == 'Due today':
+        return _minute(today), _minute(today + 1) - 1
+    if name == 'Due within 7 days':
+        return _minute(now), _minute(now + np.timedelta64(7, 'D'))
+    if name == 'Due within 30 days':
+        return _minute(now), _minute(now + np.timedelta64(30, 'D'))
+    if name == 'No deadline':
+        return NO_DUE, NO_DUE
+    return None
+
+
+class SortedIndex:
+    # Slots ordered by one key column, and an unsorted tail of new slots
+    def __init__(self, keys):
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.slots = order.astype(np.int64)
+        self.tail = EMPTY
+
+    def add(self, slots, column):
+        self.tail = np.concatenate([self.tail, slots])
+        if len(self.tail) >= max(MERGE_EVERY, len(self.keys) // MERGE_SHARE):
+            keys = column[self.tail]
+            order = np.argsort(keys, kind='stable')
+            at = np.searchsorted(self.keys, keys[order], side='right')
+            self.keys = np.insert(self.keys, at, keys[order])
+            self.slots = np.insert(self.slots, at, self.tail[order])
+            self.tail = EMPTY
+
+    def _ranges(self, lows, highs):
+        return (np.searchsorted(self.keys, lows, side='left'),
+                np.searchsorted(self.keys, highs, side='right'))
+
+    def count(self, lows, highs):
+        # Slots with a key in any of the [low, high] ranges, counting the
+        # whole tail
+        firsts, lasts = self._ranges(lows, highs)
+        return int((lasts - firsts).sum()) + len(self.tail)
+
+    def candidates(self, lows, highs):
+        # Slots with a key in the ranges, plus the whole tail, in no order
+        firsts, lasts = self._ranges(lows, highs)
+        lengths = lasts - firsts
+        total = int(lengths.sum())
+        if len(lengths) == 1:
+            found = self.slots[firsts[0]:lasts[0]]
+        else:
+            # Positions of every range at once: each range's start, shifted
+            # by where its run begins in the output
+            starts = np.repeat(firsts - (np.cumsum(lengths) - lengths), lengths)
+            found = self.slots[starts + np.arange(total)]
+        return np.concatenate([found, self.tail]) if len(self.tail) else found
+
+
+class TaskIndex:
+    def __init__(self, subjects, priorities, dues):
+        self.size = 0
+        self.code = np.empty(0, dtype=np.int64)
+        self.priority = np.empty(0, dtype=np.int64)
+        self.due = np.empty(0, dtype=np.int64)
+        self.codes = {}  # subject -> code
+        self.vocabulary = []  # sorted distinct words of the subjects
+        self.subjects_of = {}  # word -> codes of the subjects that have it
+        self._append(subjects, priorities, dues)
+        self.by_code = SortedIndex(self.code[:self.size])
+        self.by_priority = SortedIndex(self.priority[:self.size])
+        self.by_due = SortedIndex(self.due[:self.size])
+
+    def _reserve(self, needed):
+        capacity = len(self.code)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 1024)
+        for name in ('code', 'priority', 'due'):
+            grown = np.empty(capacity, dtype=np.int64)
+            grown[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, grown)
+
+    def _subject_codes(self, subjects):
+        # Code per subject, registering the words of subjects not seen before
+        codes, uniques = pd.factorize(pd.Series(subjects, dtype=object, copy=False), use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        new_words = []
+        for i, subject in enumerate(list(uniques) + ['']):
+            subject = str(subject)
+            code = self.codes.get(subject)
+            if code is None:
+                code = self.codes[subject] = len(self.codes)
+                for word in set(words(subject)):
+                    if word not in self.subjects_of:
+                        new_words.append(word)
+                        self.subjects_of[word] = []
+                    self.subjects_of[word].append(code)
+            lookup[i] = code
+        if new_words:
+            # Sorted runs merge in linear time
+            self.vocabulary.extend(sorted(new_words))
+            self.vocabulary.sort()
+        return lookup[codes]
+
+    def _append(self, subjects, priorities, dues):
+        count = len(subjects)
+        self._reserve(self.size + count)
+        new = slice(self.size, self.size + count)
+        self.code[new] = self._subject_codes(subjects)
+        self.priority[new] = priority_values(priorities)
+        self.due[new] = dues
+        self.size += count
+        return np.arange(new.start, new.stop, dtype=np.int64)
+
+    def extend(self, subjects, priorities, dues):
+        # Index the tasks in the store's next slots; dues from due_minutes
+        if not len(subjects):
+            return
+        slots = self._append(subjects, priorities, dues)
+        self.by_code.add(slots, self.code)
+        self.by_priority.add(slots, self.priority)
+        self.by_due.add(slots, self.due)
+
+    def matching_codes(self, text):
+        # Codes of the subjects with a word starting with each word of text
+        found = None
+        for term in words(text):
+            first = bisect.bisect_left(self.vocabulary, term)
+            last = bisect.bisect_left(self.vocabulary, term[:-1] + chr(ord(term[-1]) + 1))
+            codes = set()
+            for word in self.vocabulary[first:last]:
+                codes.update(self.subjects_of[word])
+            found = codes if found is None else found & codes
+            if not found:
+                break
+        return np.array(sorted(found), dtype=np.int64) if found else EMPTY
+
+    def search(self, alive, text='', priorities=None, due=None):
+        # Slots of the live tasks whose subject matches text (word prefixes)
+        # with a priority and deadline in the inclusive (low, high) ranges
+        # given, in list order
+        filters = []  # (index, lows, highs, test)
+        if words(text):
+            codes = self.matching_codes(text)
+            if not len(codes):
+                return EMPTY
+            hits = np.zeros(len(self.codes), dtype=bool)
+            hits[codes] = True
+            filters.append((self.by_code, codes, codes, lambda slots: hits[self.code[slots]]))
+        for index, column, bounds in ((self.by_priority, self.priority, priorities), (self.by_due, self.due, due)):
+            if bounds is not None:
+                low, high = bounds
+                filters.append((index, np.array([low]), np.array([high]),
+                                lambda slots, column=column, low=low, high=high:
+                                (column[slots] >= low) & (column[slots] <= high)))
+        alive = alive[:self.size]
+        if not filters:
+            return np.flatnonzero(alive)
+        counts = [index.count(lows, highs) for index, lows, highs, _ in filters]
+        best = int(np.argmin(counts))
+        if counts[best] * SCAN_SHARE < self.size:
+            index, lows, highs, _ = filters[best]
+            slots = np.sort(index.candidates(lows, highs))
+            keep = alive[slots]
+        else:
+            slots = slice(0, self.size)
+            keep = alive.copy()
+        for _, _, _, test in filters:
+            keep &= test(slots)
+        return slots[keep] if isinstance(slots, np.ndarray) else np.flatnonzero(keep)
@@ -0,0 +1,321 @@
+import numpy as np
+import pandas as pd
+
+from rollups import Rollups
+from taskindex import TaskIndex, due_minute, due_minutes
+from timetable import TASK_COLUMNS, duration_minutes, task_minutes
+
+# In-memory task table with amortized O(1) append and delete.
+#
+# Columns live in preallocated NumPy arrays that double in capacity when
+# full, so an append writes one slot instead of copying the table the way
+# pd.concat / study_data.loc[len(study_data)] did. Deletes only clear the
+# slot's alive flag; the arrays are compacted once dead slots outnumber
+# live ones, which keeps deletes amortized O(1) as well.
+#
+# Every task has a stable integer Id that is saved with it. The task list
+# turns a selection into ids (ids_at) and deletes by id through an id -> slot
+# map, so a delete always removes the row that was selected, whatever the
+# list positions have shifted to since.
+#
+# Searches (search, rows/ids_at with slots) go through a TaskIndex built on
+# the first one and kept up to date by append and extend; see taskindex.py.
+# The workload totals (rollups()) are built on first use as well and then
+# follow every add, delete, clear and restore; see rollups.py.
+
+MIN_CAPACITY = 1024
+# Columns written by the CSV, journal and columnar saves
+SAVED_COLUMNS = TASK_COLUMNS + ['Id']
+
+
+class TaskStore:
+    def __init__(self, capacity=MIN_CAPACITY):
+        capacity = max(capacity, MIN_CAPACITY)
+        self.size = 0  # slots in use, live or dead
+        self.dead = 0
+        self.subject = np.empty(capacity, dtype=object)
+        self.duration = np.empty(capacity, dtype=object)
+        self.priority = np.empty(capacity, dtype=object)
+        self.deadline = np.empty(capacity, dtype=object)
+        self.minutes = np.empty(capacity, dtype=np.int32)  # -1 when Duration is invalid
+        self.due = np.empty(capacity, dtype=np.int64)  # Deadline in minutes since the epoch, see taskindex
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.next_id = 1
+        self._order = None  # cached slots of live rows, in display order
+        self._slots = None  # task id -> slot, built on the first delete by id
+        self._index = None  # TaskIndex, built on the first search
+        self._rollups = None  # Rollups, built on the first call to rollups()
+
+    @classmethod
+    def from_frame(cls, frame):
+        store = cls(len(frame))
+        store.extend(frame)
+        return store
+
+    @classmethod
+    def from_columns(cls, frame):
+        # from_frame for columnstore.load_frame with Minutes and Id: those
+        # two become the store's own arrays, still memory-mapped, instead of
+        # being copied. The first append that needs room moves them into
+        # memory with the rest.
+        store = cls(len(frame))
+        minutes, ids = frame['Minutes'].to_numpy(), frame['Id'].to_numpy()
+        if len(store.alive) != len(frame) or minutes.dtype != store.minutes.dtype or ids.dtype != store.ids.dtype:
+            # Under MIN_CAPACITY the store has room to spare: copy as usual
+            store.extend(frame)
+            return store
+        store.minutes = minutes
+        # pandas hands the arrays out read-only: copy the ids if some need numbering
+        store.ids = store._new_ids(ids.copy() if (ids < 0).any() else ids)
+        store._fill(slice(0, len(frame)), frame.reindex(columns=TASK_COLUMNS))
+        return store
+
+    def __len__(self):
+        return self.size - self.dead
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def _columns(self):
+        return ('subject', 'duration', 'priority', 'deadline', 'minutes', 'due', 'ids', 'alive')
+
+    def _reserve(self, needed):
+        capacity = len(self.alive)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self._columns():
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype) if name == 'alive' else np.empty(capacity, dtype=old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def _new_ids(self, ids):
+        # Fresh ids for rows saved without one (missing or negative)
+        missing = ids < 0
+        if not missing.all():
+            self.next_id = max(self.next_id, int(ids.max()) + 1)
+        count = int(missing.sum())
+        if count:
+            ids[missing] = np.arange(self.next_id, self.next_id + count)
+            self.next_id += count
+        return ids
+
+    def append(self, subject, duration, priority, deadline, task_id=-1):
+        # Returns the task's id; task_id comes from a backend that assigns
+        # its own (SQLite)
+        self._reserve(self.size + 1)
+        slot = self.size
+        if task_id < 0:
+            task_id = self.next_id
+        self.next_id = max(self.next_id, task_id + 1)
+        self.ids[slot] = task_id
+        if self._slots is not None:
+            self._slots[task_id] = slot
+        self.subject[slot] = subject
+        self.duration[slot] = duration
+        self.priority[slot] = priority
+        self.deadline[slot] = deadline
+        minutes = duration_minutes(duration)
+        self.minutes[slot] = -1 if np.isnan(minutes) else minutes
+        self.due[slot] = due_minute(deadline)
+        self.alive[slot] = True
+        self.size += 1
+        self._order = None
+        if self._index is not None:
+            self._index.extend([subject], [priority], self.due[slot:slot + 1])
+        self._count(slice(slot, slot + 1))
+        return task_id
+
+    def extend(self, frame):
+        # Bulk append of a task DataFrame, one vectorized copy per column.
+        # Returns the new tasks' ids.
+        count = len(frame)
+        if not count:
+            return np.empty(0, dtype=np.int64)
+        self._reserve(self.size + count)
+        new = slice(self.size, self.size + count)
+        if 'Id' in frame:
+            ids = pd.to_numeric(frame['Id'], errors='coerce').fillna(-1).to_numpy(dtype=np.int64, copy=True)
+        else:
+            ids = np.full(count, -1, dtype=np.int64)
+        self.ids[new] = self._new_ids(ids)
+        frame = frame.reindex(columns=TASK_COLUMNS + (['Minutes'] if 'Minutes' in frame else []))
+        self.minutes[new] = np.nan_to_num(task_minutes(frame), nan=-1)
+        return self._fill(new, frame)
+
+    def _fill(self, new, frame):
+        # The rest of extend, once the ids and minutes are in place
+        self.subject[new] = frame['Subject'].to_numpy(dtype=object)
+        self.duration[new] = frame['Duration'].to_numpy(dtype=object)
+        self.priority[new] = frame['Priority'].to_numpy(dtype=object)
+        self.deadline[new] = frame['Deadline'].to_numpy(dtype=object)
+        self.due[new] = due_minutes(frame['Deadline'].to_numpy(dtype=object))
+        self.alive[new] = True
+        self.size = new.stop
+        self._order = None
+        self._slots = None
+        if self._index is not None:
+            self._index.extend(self.subject[new], self.priority[new], self.due[new])
+        self._count(new)
+        return self.ids[new].copy()
+
+    def restore(self, frame):
+        # Put deleted tasks back under their own ids (Undo). A task whose
+        # slot is still there is revived in place. The rest are merged in by
+        # id while the slots are in id order, as they are unless a file was
+        # saved out of order; otherwise they go at the end.
+        ids = frame['Id'].to_numpy(dtype=np.int64)
+        held = self.ids[:self.size]
+        in_order = bool((held[1:] > held[:-1]).all())
+        if in_order and self.size and len(ids):
+            slots = np.minimum(np.searchsorted(held, ids), self.size - 1)
+            revive = (held[slots] == ids) & ~self.alive[slots]
+            self.alive[slots[revive]] = True
+            self._count(slots[revive])
+            self.dead -= int(revive.sum())
+            self._order = None
+            self._slots = None
+            frame, ids = frame[~revive], ids[~revive]
+        if not len(ids):
+            return
+        live = self.ids[self.order()]
+        if not in_order or not len(live) or ids.min() > live.max():
+            self.extend(frame.iloc[np.argsort(ids, kind='stable')])
+            return
+        merged = pd.concat([self.task_frame(), frame[SAVED_COLUMNS]], ignore_index=True)
+        merged = merged.iloc[np.argsort(merged['Id'].to_numpy(), kind='stable')]
+        next_id, rollups = self.next_id, self._rollups
+        self.__init__(len(merged))
+        self.extend(merged)
+        self.next_id = max(self.next_id, next_id)
+        # The totals only gain the restored tasks
+        self._rollups = rollups
+        restored = np.flatnonzero(np.isin(self.ids[:self.size], ids))
+        self._count(restored)
+
+    def order(self):
+        # Slots of the live rows; position i in the task list is order()[i]
+        if self._order is None:
+            self._order = np.flatnonzero(self.alive[:self.size])
+        return self._order
+
+    def delete(self, slot):
+        if not self.alive[slot]:
+            return
+        self.alive[slot] = False
+        self.dead += 1
+        self._count(slice(slot, slot + 1), -1)
+        self._order = None
+        if self._slots is not None:
+            self._slots.pop(int(self.ids[slot]), None)
+        if self.dead > MIN_CAPACITY and self.dead > self.size // 2:
+            self.compact()
+
+    def delete_at(self, position):
+        self.delete(self.order()[position])
+
+    def ids_at(self, positions, slots=None):
+        # Task ids for list positions, or for positions in slots (a search
+        # result) when given
+        slots = self.order() if slots is None else slots
+        return self.ids[slots[np.asarray(positions, dtype=np.intp)]].tolist()
+
+    def _slot_map(self):
+        if self._slots is None:
+            live = self.order()
+            self._slots = dict(zip(self.ids[live].tolist(), live.tolist()))
+        return self._slots
+
+    def delete_id(self, task_id):
+        # False when no live task has this id
+        slot = self._slot_map().get(task_id)
+        if slot is None:
+            return False
+        self.delete(slot)
+        return True
+
+    def delete_ids(self, task_ids):
+        return sum(self.delete_id(task_id) for task_id in task_ids)
+
+    def compact(self):
+        # Fresh arrays rather than shifting in place, so frames handed out
+        # earlier keep their data
+        keep = self.order()
+        capacity = len(self.alive)
+        for name in self._columns():
+            old = getattr(self, name)
+            column = np.zeros(capacity, dtype=old.dtype) if name == 'alive' else np.empty(capacity, dtype=old.dtype)
+            column[:len(keep)] = old[keep]
+            setattr(self, name, column)
+        self.size = len(keep)
+        self.dead = 0
+        self._order = None
+        self._slots = None
+        self._index = None
+
+    def clear(self):
+        # Ids keep counting up, so a cleared id is never handed out again
+        next_id, rollups = self.next_id, self._rollups
+        self.__init__()
+        self.next_id = next_id
+        if rollups is not None:
+            rollups.clear()
+            self._rollups = rollups
+
+    def row(self, slot):
+        return (self.subject[slot], self.duration[slot], self.priority[slot], self.deadline[slot])
+
+    def rows(self, start=0, stop=None, slots=None):
+        # (Subject, Duration, Priority, Deadline) tuples for a range of
+        # positions, in the list or in slots (a search result) when given
+        slots = (self.order() if slots is None else slots)[start:stop]
+        return zip(self.subject[slots], self.duration[slots], self.priority[slots], self.deadline[slots])
+
+    def search_index(self):
+        if self._index is None:
+            size = self.size
+            self._index = TaskIndex(self.subject[:size], self.priority[:size], self.due[:size])
+        return self._index
+
+    def rollups(self):
+        if self._rollups is None:
+            self._rollups = Rollups()
+            live = self.order()
+            self._rollups.update(self.subject[live], self.priority[live], self.minutes[live], self.due[live])
+        return self._rollups
+
+    def _count(self, slots, sign=1):
+        # Add tasks at slots to the totals, once built (sign -1 takes them away)
+        if self._rollups is not None:
+            self._rollups.update(self.subject[slots], self.priority[slots], self.minutes[slots],
+                                 self.due[slots], sign)
+
+    def search(self, text='', priorities=None, due=None):
+        # Slots of the live tasks with subject words starting with the words
+        # of text, a priority in priorities and a deadline (minutes since the
+        # epoch) in due, both inclusive (low, high) pairs; in list order
+        return self.search_index().search(self.alive, text, priorities, due)
+
+    def frame(self):
+        # DataFrame of the live rows for scheduling and saving. With no dead
+        # slots the columns are views of the backing arrays.
+        if self.dead:
+            index = self.order()
+        else:
+            index = slice(0, self.size)
+        return pd.DataFrame({
+            'Subject': self.subject[index],
+            'Duration': self.duration[index],
+            'Priority': self.priority[index],
+            'Deadline': self.deadline[index],
+            'Minutes': self.minutes[index],
+            'Id': self.ids[index],
+        }, copy=False)
+
+    def task_frame(self):
+        # frame() without the derived Minutes column, the CSV layout
+        return self.frame()[SAVED_COLUMNS]
@@ -0,0 +1,172 @@
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import breakpolicy
+
+# Headless timetable engine shared by the planner windows.
+# Takes a task table (Subject, Duration, Priority, Deadline) and returns a
+# slot table (Start, End, Subject, Priority, Break); Tk only renders it.
+
+TASK_COLUMNS = ['Subject', 'Duration', 'Priority', 'Deadline']
+SLOT_COLUMNS = ['Start', 'End', 'Subject', 'Priority', 'Break']
+BREAK_LABEL = '*** BREAK TIME ***'
+
+DURATION_PATTERN = re.compile(r"^\s*(\d+)\s*:\s*(\d+)\s*$")
+
+# "HH:MM" label for every minute of the day, indexed by minute-of-day
+CLOCK_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)], dtype=object)
+
+
+def duration_minutes(value):
+    # parse_duration for a single value: minutes, or NaN when invalid
+    match = DURATION_PATTERN.match(str(value))
+    if not match:
+        return np.nan
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def parse_durations(durations):
+    # Vectorized parse_duration: "HH:MM" -> minutes (float, NaN when invalid).
+    # Durations repeat a lot, so only the distinct values go through the regex.
+    codes, uniques = pd.factorize(pd.Series(durations, copy=False), use_na_sentinel=True)
+    parsed = np.array([duration_minutes(value) for value in uniques] + [np.nan], dtype=float)
+    return parsed[codes]
+
+
+def task_minutes(tasks):
+    # Prefer an integer Minutes column (columnar store) over re-parsing Duration;
+    # rows added since the load have no Minutes yet and fall back to parsing
+    if 'Minutes' not in tasks:
+        return parse_durations(tasks['Duration'])
+    minutes = tasks['Minutes'].to_numpy(dtype=float, na_value=np.nan, copy=True)
+    minutes[minutes < 0] = np.nan
+    missing = np.isnan(minutes)
+    if missing.any():
+        minutes[missing] = parse_durations(tasks['Duration'][missing])
+    return minutes
+
+
+def order_by_priority(tasks):
+    key = pd.to_numeric(tasks['Priority'], errors='coerce')
+    return tasks.iloc[np.argsort(key.to_numpy(dtype=float, na_value=np.inf), kind='stable')]
+
+
+def schedule(tasks, start=None, policy=None):
+    # Lay out already-ordered tasks end to end from start, with breaks from
+    # policy (a breakpolicy.BreakPolicy or a name from modes.BREAK_POLICIES; None
+    # for none). Returns (slots, skipped) where skipped holds rows with a bad
+    # Duration.
+    if start is None:
+        start = datetime.now()
+    policy = breakpolicy.policy(policy) or breakpolicy.BreakPolicy()
+    minutes = task_minutes(tasks)
+    valid = ~np.isnan(minutes)
+    skipped = tasks[~valid]
+    tasks = tasks[valid]
+    minutes = minutes[valid].astype(np.int64)
+    n = len(minutes)
+
+    # Offsets in minutes from start, all in one cumulative pass
+    task_start, is_before, lengths = policy.plan(minutes)
+    task_end = task_start + minutes
+
+    # Interleave the break rows in front of the tasks that follow them
+    task_rows = np.arange(n) + np.cumsum(is_before)
+    break_rows = task_rows[is_before] - 1
+    total = n + len(break_rows)
+
+    offset_start = np.empty(total, dtype=np.int64)
+    offset_end = np.empty(total, dtype=np.int64)
+    subject = np.empty(total, dtype=object)
+    priority = np.empty(total, dtype=object)
+    is_break = np.zeros(total, dtype=bool)
+
+    offset_start[task_rows] = task_start
+    offset_end[task_rows] = task_end
+    subject[task_rows] = tasks['Subject'].to_numpy(dtype=object)
+    priority[task_rows] = tasks['Priority'].to_numpy(dtype=object)
+
+    offset_start[break_rows] = task_start[is_before] - lengths[is_before]
+    offset_end[break_rows] = task_start[is_before]
+    subject[break_rows] = BREAK_LABEL
+    priority[break_rows] = None
+    is_break[break_rows] = True
+
+    base = np.datetime64(start, 'ns')
+    slots = pd.DataFrame({
+        'Start': base + offset_start.astype('timedelta64[m]'),
+        'End': base + offset_end.astype('timedelta64[m]'),
+        'Subject': subject,
+        'Priority': priority,
+        'Break': is_break,
+    }, columns=SLOT_COLUMNS)
+    return slots, skipped
+
+
+def build_timetable(tasks, start=None, policy=None):
+    # Priority-first timetable, the order generate_timetable has always used
+    return schedule(order_by_priority(tasks), start, policy)
+
+
+def clock_labels(times):
+    times = pd.DatetimeIndex(times)
+    return CLOCK_LABELS[times.hour * 60 + times.minute]
+
+
+def timetable_lines(slots, break_spacing=True):
+    # One display line per slot; break rows get a blank line either side
+    # when break_spacing is set (the smartstudyplanner layout of the whole
+    # text, which the one-line rows of a virtual view can't use). Slots from
+    # deadline scheduling carry a Late flag that is shown after the task;
+    # multi-day plans from the optimizer carry a Day label shown in front.
+    starts = clock_labels(slots['Start'])
+    if 'Day' in slots:
+        starts = [f"{day} {start}" for day, start in zip(slots['Day'], starts)]
+    ends = clock_labels(slots['End'])
+    if 'Late' in slots:
+        late = slots['Late'].to_numpy()
+    else:
+        late = np.zeros(len(slots), dtype=bool)
+    for start, end, subject, priority, is_break, is_late in zip(
+            starts, ends, slots['Subject'].to_numpy(dtype=object),
+            slots['Priority'].to_numpy(dtype=object), slots['Break'].to_numpy(), late):
+        if is_break:
+            yield f"\n{start} - {end}: {subject}\n\n" if break_spacing else f"{start} - {end}: {subject}\n"
+        elif is_late:
+            yield f"{start} - {end}: {subject} (Priority {priority}) - MISSES DEADLINE\n"
+        else:
+            yield f"{start} - {end}: {subject} (Priority {priority})\n"
+
+
+def heading(slots):
+    # Best-of-strategies plans name the strategy that won
+    strategy = slots.attrs.get('strategy')
+    if strategy is None:
+        return "Generated Timetable:\n"
+    return f"Generated Timetable ({strategy}, best of {len(slots.attrs['strategies'])} strategies):\n"
+
+
+def timetable_rows(slots, start, stop):
+    # Display rows start..stop of a rendered timetable, one line each; row 0
+    # is the heading
+    rows = []
+    if start == 0:
+        rows.append(heading(slots))
+        start = 1
+    rows.extend(timetable_lines(slots.iloc[start - 1:max(start, stop) - 1], break_spacing=False))
+    return rows
+
+
+def format_timetable(slots, break_spacing=True):
+    return heading(slots) + "".join(timetable_lines(slots, break_spacing))
+
+
+def skipped_warning(skipped, limit=10):
+    # One warning for every bad row instead of one dialog per row
+    names = [str(s) for s in skipped['Subject'].head(limit)]
+    more = len(skipped) - len(names)
+    text = ", ".join(names) + (f" and {more} more" if more > 0 else "")
+    return f"Invalid duration format for {text}. Skipping {'task' if len(skipped) == 1 else 'tasks'}."
@@ -0,0 +1,193 @@
+import tkinter as tk
+from tkinter import font as tkfont
+
+# Event.state bits
+SHIFT = 0x0001
+CONTROL = 0x0004
+
+# Virtualized Listbox / Text rendering.
+#
+# The widget only ever holds the rows that fit on screen. Rows come from a
+# source: count() gives the total and render(start, stop) the display strings
+# for that range, exactly one line each, since the view counts rows as lines.
+# A separate scrollbar is driven from the virtual position, so scrolling,
+# adds and deletes cost O(visible rows) no matter how many tasks there are.
+
+
+class VirtualView:
+    def __init__(self, widget, scrollbar=None, count=None, render=None):
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.count = count or (lambda: 0)
+        self.render = render or (lambda start, stop: [])
+        self.top = 0
+        self.rows = int(widget.cget('height'))
+        self.line_height = max(1, tkfont.Font(font=widget.cget('font')).metrics('linespace'))
+        if scrollbar:
+            scrollbar.configure(command=self.yview)
+        widget.bind('<Configure>', self._resize)
+        widget.bind('<MouseWheel>', self._wheel)
+        widget.bind('<Button-4>', lambda event: self.scroll(-3))
+        widget.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def show(self, count, render):
+        # Switch to another row source; returns True when the source changed
+        changed = (count, render) != (self.count, self.render)
+        if changed:
+            self.count, self.render = count, render
+            self.top = 0
+        self.refresh()
+        return changed
+
+    def reset(self):
+        # Back to the top, for a different set of rows from the same source
+        self.top = 0
+        self.refresh()
+
+    def _resize(self, event):
+        rows = max(1, event.height // self.line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
+
+    def _wheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+    def _clamp(self):
+        self.top = max(0, min(self.top, self.count() - self.rows))
+
+    def scroll(self, rows):
+        self.top += rows
+        self._clamp()
+        self.refresh()
+        return 'break'
+
+    def yview(self, *args):
+        # Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * self.count())
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.top += int(args[1]) * step
+        self._clamp()
+        self.refresh()
+
+    def see(self, position):
+        if not self.top <= position < self.top + self.rows:
+            self.top = position - self.rows + 1 if position >= self.top else position
+            self._clamp()
+            self.refresh()
+
+    def _update_scrollbar(self):
+        if not self.scrollbar:
+            return
+        total = self.count()
+        if total <= self.rows:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.rows) / total)
+
+    def refresh(self):
+        self._clamp()
+        self._draw(self.render(self.top, self.top + self.rows))
+        self._update_scrollbar()
+
+    def inserted(self, position):
+        if position < self.top:
+            self.top += 1  # keep the same rows on screen
+        elif position < self.top + self.rows:
+            self._insert_row(position)
+        self._update_scrollbar()
+
+    def deleted(self, position):
+        if position < self.top:
+            self.top -= 1
+        elif position < self.top + self.rows:
+            self._delete_row(position)
+        self._update_scrollbar()
+
+    # Widget specific
+    def _draw(self, lines):
+        raise NotImplementedError
+
+    def _insert_row(self, position):
+        self.refresh()
+
+    def _delete_row(self, position):
+        self.refresh()
+
+
+class VirtualListbox(VirtualView):
+    def __init__(self, widget, scrollbar=None, count=None, render=None):
+        super().__init__(widget, scrollbar, count, render)
+        self.selected = set()  # absolute positions, kept across scrolling
+        widget.bind('<<ListboxSelect>>', self._select)
+        widget.bind('<ButtonPress-1>', self._click, add='+')
+
+    def _click(self, event):
+        # A plain click starts a new selection, dropping rows selected
+        # earlier that have scrolled out of the widget; Ctrl/Shift extend it
+        if not event.state & (SHIFT | CONTROL):
+            self.selected.clear()
+
+    def _select(self, event=None):
+        visible = range(self.top, self.top + self.widget.size())
+        self.selected.difference_update(visible)
+        self.selected.update(self.top + i for i in self.widget.curselection())
+
+    def selection(self):
+        return sorted(self.selected)
+
+    def reset(self):
+        self.selected.clear()
+        super().reset()
+
+    def _restore_selection(self):
+        for position in self.selected:
+            if self.top <= position < self.top + self.rows:
+                self.widget.selection_set(position - self.top)
+
+    def _draw(self, lines):
+        self.widget.delete(0, tk.END)
+        if lines:
+            self.widget.insert(tk.END, *lines)
+        self._restore_selection()
+
+    def _shift_selection(self, position, delta):
+        self.selected = {p + delta if p >= position else p
+                         for p in self.selected if p != position or delta > 0}
+
+    def inserted(self, position):
+        self._shift_selection(position, 1)
+        super().inserted(position)
+
+    def deleted(self, position):
+        self._shift_selection(position, -1)
+        super().deleted(position)
+
+    def _insert_row(self, position):
+        # One Tk insert, and drop the row pushed off the bottom
+        row = self.render(position, position + 1)
+        self.widget.insert(position - self.top, *row)
+        if self.widget.size() > self.rows:
+            self.widget.delete(self.rows, tk.END)
+
+    def _delete_row(self, position):
+        # One Tk delete, and pull up the next row from below the window
+        self.widget.delete(position - self.top)
+        bottom = self.top + self.widget.size()
+        self.widget.insert(tk.END, *self.render(bottom, bottom + 1))
+        if self.top and self.top + self.rows > self.count():
+            self.refresh()
+
+
+class VirtualText(VirtualView):
+    def __init__(self, widget, scrollbar=None, count=None, render=None):
+        # A wrapped row would take two lines and push the last one out of view
+        widget.configure(wrap='none')
+        super().__init__(widget, scrollbar, count, render)
+
+    def _draw(self, lines):
+        self.widget.delete("1.0", tk.END)
+        self.widget.insert(tk.END, "".join(lines))
@@ -0,0 +1,236 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox, ttk
+
+# Background jobs for the Tk planners.
+#
+# Save, Load and Generate run on a small thread pool so the mainloop keeps
+# repainting. Workers never touch widgets: results, errors and progress go
+# into a queue that the Tk thread drains every POLL_MS via root.after, and
+# every callback runs there. Jobs are cancelled cooperatively: work calls
+# job.check() (or polls job.cancelled) between steps. A job that streams its
+# result hands it over a chunk at a time with job.deliver(); at most
+# PENDING_CHUNKS wait in the queue, so a worker can't read ahead of the Tk
+# thread and pile a whole file up in memory.
+
+POLL_MS = 50
+CSV_CHUNK_ROWS = 100000
+PENDING_CHUNKS = 2
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, pool, name, label, cancellable):
+        self.pool = pool
+        self.name = name
+        self.label = label
+        self.cancellable = cancellable
+        self._cancel = threading.Event()
+        self._room = threading.Semaphore(PENDING_CHUNKS)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        if self.cancellable:
+            self._cancel.set()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, text=None, done=None, total=None):
+        # Safe to call from the worker thread
+        self.pool.events.put(('progress', self, (text, done, total)))
+
+    def deliver(self, chunk):
+        # Hand part of the result to on_chunk on the Tk thread. Runs on the
+        # worker thread; waits while PENDING_CHUNKS are still queued.
+        while not self._room.acquire(timeout=POLL_MS / 1000):
+            self.check()
+        self.pool.events.put(('chunk', self, chunk))
+
+
+class WorkerPool:
+    def __init__(self, root, workers=2):
+        self.root = root
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='planner')
+        self.events = queue.Queue()
+        self.jobs = []  # submitted and not finished, oldest first
+        self.listeners = []  # called as listener(event, job, payload) on the Tk thread
+        root.after(POLL_MS, self._poll)
+
+    def submit(self, name, work, on_done=None, on_error=None, label=None, cancellable=True,
+               on_chunk=None, on_cancel=None):
+        # Run work(job) on the pool; on_done(result) / on_error(error) run on
+        # the Tk thread, as do on_chunk(chunk) for every job.deliver(chunk)
+        # and on_cancel() when the job is cancelled.
+        job = Job(self, name, label or name, cancellable)
+        job.on_done = on_done
+        job.on_error = on_error or self.report_error
+        job.on_chunk = on_chunk
+        job.on_cancel = on_cancel
+
+        def run():
+            try:
+                result = work(job)
+                job.check()
+            except Cancelled:
+                self.events.put(('cancelled', job, None))
+            except Exception as error:
+                self.events.put(('error', job, error))
+            else:
+                self.events.put(('done', job, result))
+
+        self.jobs.append(job)
+        self._notify('started', job, None)
+        self.executor.submit(run)
+        return job
+
+    def running(self, name):
+        return any(job.name == name for job in self.jobs)
+
+    def cancel(self, name=None):
+        for job in self.jobs:
+            if name is None or job.name == name:
+                job.cancel()
+
+    def report_error(self, error):
+        messagebox.showerror("Error", str(error))
+
+    def _notify(self, event, job, payload):
+        for listener in self.listeners:
+            listener(event, job, payload)
+
+    def _poll(self):
+        try:
+            while True:
+                event, job, payload = self.events.get_nowait()
+                if event == 'chunk':
+                    job._room.release()
+                    job.on_chunk(payload)
+                    continue
+                if event != 'progress':
+                    self.jobs.remove(job)
+                self._notify(event, job, payload)
+                if event == 'done' and job.on_done:
+                    job.on_done(payload)
+                elif event == 'error':
+                    job.on_error(payload)
+                elif event == 'cancelled' and job.on_cancel:
+                    job.on_cancel()
+        except queue.Empty:
+            pass
+        finally:
+            # Keep polling even if a callback raised
+            self.root.after(POLL_MS, self._poll)
+
+
+class LatestWriter:
+    # Coalesced saves: while a write is running, further requests only
+    # replace the pending state, so a burst of edits ends in one more write
+    # of the newest state rather than one write per edit.
+    def __init__(self, pool, write, label="Saving tasks"):
+        self.pool = pool
+        self.write = write
+        self.label = label
+        self.job = None
+        self.pending = None
+        self.waiting = []  # on_done callbacks for the pending state
+
+    def request(self, state, on_done=None):
+        self.pending = state
+        if on_done:
+            self.waiting.append(on_done)
+        if self.job is None:
+            self._start()
+
+    def _start(self):
+        state, self.pending = self.pending, None
+        callbacks, self.waiting = self.waiting, []
+        self.job = self.pool.submit('save', lambda job: self.write(state),
+                                    on_done=lambda result: self._finished(callbacks),
+                                    on_error=lambda error: self._failed(error),
+                                    label=self.label, cancellable=False)
+
+    def _finished(self, callbacks):
+        self.job = None
+        if self.pending is not None:
+            self._start()
+        for callback in callbacks:
+            callback()
+
+    def _failed(self, error):
+        self._finished([])
+        self.pool.report_error(error)
+
+
+def read_csv(path, job, chunksize=CSV_CHUNK_ROWS, **options):
+    # pd.read_csv in chunks, reporting progress by bytes read and checking
+    # for cancellation between chunks. pandas is imported here rather than
+    # at the top so the window can be built without it (see startup.py).
+    import pandas as pd
+
+    total = os.path.getsize(path)
+    chunks = []
+    rows = 0
+    with open(path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize, **options):
+            job.check()
+            chunks.append(chunk)
+            rows += len(chunk)
+            job.progress(f"{job.label}: {rows} rows", f.tell(), total)
+    if not chunks:
+        return pd.read_csv(path, **options)
+    return pd.concat(chunks, ignore_index=True)
+
+
+class StatusBar(ttk.Frame):
+    # Label, progress bar and Cancel button for the newest running job
+    def __init__(self, parent, pool, **options):
+        super().__init__(parent, **options)
+        self.pool = pool
+        self.text = ttk.Label(self, text="Ready")
+        self.text.pack(side="left", padx=5)
+        self.cancel_button = ttk.Button(self, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="right", padx=5)
+        self.bar = ttk.Progressbar(self, length=160, mode='indeterminate')
+        self.bar.pack(side="right", padx=5)
+        pool.listeners.append(self.update_job)
+
+    def cancel(self):
+        self.pool.cancel()
+
+    def update_job(self, event, job, payload):
+        if event == 'progress':
+            text, done, total = payload
+            if total:
+                self.bar.stop()
+                self.bar.configure(mode='determinate', maximum=total, value=done)
+            if text:
+                self.text.configure(text=text)
+            return
+        if event == 'started':
+            self.bar.configure(mode='indeterminate', value=0)
+            self.bar.start(10)
+        elif event == 'error':
+            self.text.configure(text=f"{job.label} failed")
+        elif event == 'cancelled':
+            self.text.configure(text=f"{job.label} cancelled")
+        if self.pool.jobs:
+            current = self.pool.jobs[-1]
+            self.text.configure(text=f"{current.label}...")
+            cancellable = any(j.cancellable for j in self.pool.jobs)
+            self.cancel_button.configure(state="normal" if cancellable else "disabled")
+        else:
+            self.bar.stop()
+            self.bar.configure(mode='determinate', value=0)
+            self.cancel_button.configure(state="disabled")
+            if event == 'done':
+                self.text.configure(text="Ready")